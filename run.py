@@ -2,7 +2,12 @@
 # -*- coding: utf-8 -*-
 # Author: Alex Wang
 
+import argparse
+
 import src.my_flow as my_flow
 
 if __name__ == '__main__':
-	my_flow.main_flow()
+	parser = argparse.ArgumentParser(description='Current consumption test')
+	parser.add_argument('--resume', action='store_true',
+	                    help='continue the last run of the same setup from the results journal')
+	my_flow.main_flow(parser.parse_args().resume)
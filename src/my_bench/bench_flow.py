@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import itertools
+import tracemalloc
+import configparser
+from collections import OrderedDict
+
+import src.my_config.config_basic as config_basic
+import src.my_bt_case.case_registry as case_registry
+import src.my_misc.my_timer as my_timer
+import src.my_ssh.ssh_fake_dut as ssh_fake_dut
+import src.my_flow as my_flow
+
+# Count settings of every trigger/sample count type
+count_type_name_list = ['Flat', 'Pulse', 'Active']
+
+
+def write_bench_config(directory, dmm_count, trigger_count, sample_count, case_count, time_scale=0.0,
+                       base_config='config.ini', ssh_server=''):
+	"""
+	Write config.ini of one benchmark run: simulated DUT host and DMMs, outputs in directory
+	:param directory: run directory
+	:param dmm_count: active DMM count, 1 to 4
+	:param trigger_count: trigger count of every count type
+	:param sample_count: sample count of every count type
+	:param case_count: enabled case count besides Deep Sleep, in case table order
+	:param time_scale: simulated latency scale of DUT host and DMMs. 1.0: real time; 0: no latency
+	:param base_config: config.ini the run is derived from
+	:param ssh_server: ssh_fake_dut server address to run the paramiko SSH path against, empty for in-process SIM
+	:return: config file name
+	"""
+	config = configparser.ConfigParser()
+	config.read(base_config)
+	if ssh_server:
+		config['SSH']['SSH_Backend'] = 'SSH'
+		config['SSH']['SSH_Server'] = ssh_server
+	else:
+		config['SSH']['SSH_Backend'] = 'SIM'
+	config['SSH']['SSH_Sim_Time_Scale'] = str(time_scale)
+	config['DMM']['DMM_Backend'] = 'SIM'
+	config['DMM']['DMM_Sim_Time_Scale'] = str(time_scale)
+	config['DMM']['DMM_Count'] = str(dmm_count)
+	config['DMM']['DMM_Raw_Spool_Dir'] = directory
+	for name in count_type_name_list:
+		config['DMM']['{0}_Trigger_Count'.format(name)] = str(trigger_count)
+		config['DMM']['{0}_Sample_Count'.format(name)] = str(sample_count)
+	config['BASIC']['Excel_Report_Path'] = os.path.join(directory, 'bench.xlsx')
+	# HDF5 raw export, bench_raw.npz when h5py is not installed
+	config['BASIC']['Raw_Export_Path'] = os.path.join(directory, 'bench_raw.h5')
+	config['BASIC']['Results_Journal_Path'] = os.path.join(directory, 'bench_journal.jsonl')
+	case_list = [case for case in case_registry.case_table if case.key is not None]
+	enable_group_set = set()
+	for i, case in enumerate(case_list):
+		config['Test_Case'][case.key] = '1' if i < case_count else '0'
+		if i < case_count:
+			enable_group_set.add(case.group)
+	for group in set(case.group for case in case_list):
+		config['Test_Case'][group] = '1' if group in enable_group_set else '0'
+	config_file = os.path.join(directory, 'config.ini')
+	with open(config_file, 'w') as f:
+		config.write(f)
+	return config_file
+
+
+def phase_total(timing):
+	"""
+	Sum phase durations over all cases
+	:param timing: my_timer.summary()
+	:return: {phase: total seconds}
+	"""
+	total = OrderedDict()
+	for phase_dict in timing.values():
+		for phase, value in phase_dict.items():
+			total[phase] = round(total.get(phase, 0.0) + value['seconds'], 6)
+	return total
+
+
+def run_bench(directory, dmm_count, trigger_count, sample_count, case_count, time_scale=0.0,
+              base_config='config.ini', ssh_server=''):
+	"""
+	Run main_flow once against simulated DUT host and DMMs
+	:param directory: run directory, config.ini, report, journal and spool files are written here
+	:param dmm_count: active DMM count, 1 to 4
+	:param trigger_count: trigger count of every count type
+	:param sample_count: sample count of every count type
+	:param case_count: enabled case count besides Deep Sleep
+	:param time_scale: simulated latency scale. 1.0: real time; 0: no latency
+	:param base_config: config.ini the run is derived from
+	:param ssh_server: ssh_fake_dut server address, empty for in-process SIM DUT host
+	:return: result dict: settings, wall time, peak traced memory, phase durations
+	"""
+	os.makedirs(directory, exist_ok=True)
+	config_file = write_bench_config(directory, dmm_count, trigger_count, sample_count, case_count, time_scale,
+	                                 base_config, ssh_server)
+	base_config_file = config_basic.config_file_name
+	config_basic.config_file_name = config_file
+	tracemalloc.start()
+	start_time = time.perf_counter()
+	try:
+		my_flow.main_flow()
+	finally:
+		wall_time = time.perf_counter() - start_time
+		peak_memory = tracemalloc.get_traced_memory()[1]
+		tracemalloc.stop()
+		config_basic.config_file_name = base_config_file
+	timing = my_timer.summary()
+	return OrderedDict((('dmm_count', dmm_count),
+	                    ('trigger_count', trigger_count),
+	                    ('sample_count', sample_count),
+	                    ('case_count', case_count),
+	                    ('time_scale', time_scale),
+	                    ('ssh_backend', 'FAKE' if ssh_server else 'SIM'),
+	                    ('wall_seconds', round(wall_time, 6)),
+	                    ('peak_memory_bytes', peak_memory),
+	                    ('phase_seconds', phase_total(timing)),
+	                    ('case_timing', timing)))
+
+
+def main(argv=None):
+	"""
+	Benchmark main_flow over every combination of DMM count, trigger/sample count and case count, e.g.
+	python -m src.my_bench.bench_flow --dmm-count 1 4 --sample-count 100 10000 --case-count 3 25
+	:param argv: command line arguments, None for sys.argv
+	:return: result dict list
+	"""
+	parser = argparse.ArgumentParser(description='Benchmark main_flow against simulated DUT host and DMMs')
+	parser.add_argument('--dmm-count', type=int, nargs='+', default=[2])
+	parser.add_argument('--trigger-count', type=int, nargs='+', default=[1])
+	parser.add_argument('--sample-count', type=int, nargs='+', default=[100])
+	parser.add_argument('--case-count', type=int, nargs='+', default=[len(case_registry.case_table) - 1])
+	parser.add_argument('--time-scale', type=float, default=0.0, help='1.0: real time latency; 0: no latency')
+	parser.add_argument('--fake-ssh', action='store_true',
+	                    help='run the paramiko SSH path against a local ssh_fake_dut server instead of in-process SIM')
+	parser.add_argument('--work-dir', default='', help='run directories, empty for a new temp directory')
+	parser.add_argument('--output', default='bench.json', help='JSON result file')
+	args = parser.parse_args(argv)
+
+	work_dir = args.work_dir or tempfile.mkdtemp(prefix='cc_bench_')
+	server = None
+	if args.fake_ssh:
+		config = configparser.ConfigParser()
+		config.read('config.ini')
+		server = ssh_fake_dut.FakeDUTServer(username=config['SSH'].get('SSH_Username'),
+		                                    password=config['SSH'].get('SSH_Password'),
+		                                    dut=ssh_fake_dut.FakeDUT(sleep_scale=args.time_scale)).start()
+	result_list = []
+	try:
+		for dmm_count, trigger_count, sample_count, case_count in itertools.product(
+				args.dmm_count, args.trigger_count, args.sample_count, args.case_count):
+			directory = os.path.join(work_dir, 'dmm{0}_trig{1}_samp{2}_case{3}'.format(dmm_count, trigger_count,
+			                                                                          sample_count, case_count))
+			result_list.append(run_bench(directory, dmm_count, trigger_count, sample_count, case_count,
+			                             args.time_scale, ssh_server=server.address if server else ''))
+	finally:
+		if server is not None:
+			server.stop()
+	with open(args.output, 'w') as f:
+		json.dump(OrderedDict((('python', sys.version.split()[0]),
+		                       ('platform', platform.platform()),
+		                       ('runs', result_list))), f, indent=1)
+	print('Benchmark results saved to {0}'.format(args.output))
+	return result_list
+
+
+if __name__ == '__main__':
+	main()
@@ -94,7 +94,6 @@ class PowerLevel(Init):
 			log_bt_case.info('Invalid chip version, pls check config.ini file')
 
 		cmd = 'hcitool -i {0} cmd 3F 64 9F 01 01 04 00 00 00 00 00 00\n' \
-		      'sleep 1\n' \
 		      'hcitool -i {1} cmd 3F 64 B1 01 01 {2} 00 00 00 00 00 00'.format(self.hci_dut, self.hci_dut, set_power)
 		log_bt_case.info(cmd)
 		return cmd
@@ -184,10 +183,24 @@ class BT(Init):
 		log_bt_case.info(cmd)
 		return cmd
 
+	@enter_hci_header_footer()
+	def bt_acl_create_connection(self, ref_address):
+		"""
+		BT ACL connection to Ref, DUT as master
+		:param ref_address: Ref BD addr
+		:return: ACL create connection cmd
+		"""
+		ref_address = str(ref_address).strip().split(':')
+		ref_address = ':'.join(ref_address)
+
+		cmd = 'hcitool -i {0} cc --role=m {1}'.format(self.hci_dut, ref_address)
+		log_bt_case.info(cmd)
+		return cmd
+
 	@enter_hci_header_footer()
 	def bt_acl_sniff_1dot28s_master(self, dut_address, ref_address):
 		"""
-		BT ACL sniff with 1.28s as interface
+		BT ACL sniff with 1.28s as interface, on the ACL link from bt_acl_create_connection
 		:param dut_address: DUT BD addr
 		:param ref_address: Ref BD addr
 		:return: ACL sniff with 1.28s as interface cmd
@@ -199,9 +212,7 @@ class BT(Init):
 		ref_address = str(ref_address).strip().split(':')
 		ref_address = ':'.join(ref_address)
 
-		cmd = 'hcitool -i {0} cc --role=m {3}\n' \
-		      'sleep 1\n' \
-		      'hcitool -i {0} hcon -t acl {3}\n' \
+		cmd = 'hcitool -i {0} hcon -t acl {3}\n' \
 		      'sleep 1\n' \
 		      'hcitool -i {1} hcon -t acl {2}\n' \
 		      'sleep 2\n' \
@@ -213,7 +224,7 @@ class BT(Init):
 	@enter_hci_header_footer()
 	def bt_acl_sniff_0dot5s_master(self, dut_address, ref_address):
 		"""
-		BT ACL sniff with 0.5s as interface
+		BT ACL sniff with 0.5s as interface, on the ACL link from bt_acl_create_connection
 		:param dut_address: DUT BD addr
 		:param ref_address: Ref BD addr
 		:return: ACL sniff with 0.5s as interface cmd
@@ -225,9 +236,7 @@ class BT(Init):
 		ref_address = str(ref_address).strip().split(':')
 		ref_address = ':'.join(ref_address)
 
-		cmd = 'hcitool -i {0} cc --role=m {3}\n' \
-		      'sleep 1\n' \
-		      'hcitool -i {0} hcon -t acl {3}\n' \
+		cmd = 'hcitool -i {0} hcon -t acl {3}\n' \
 		      'sleep 1\n' \
 		      'hcitool -i {1} hcon -t acl {2}\n' \
 		      'sleep 2\n' \
@@ -289,20 +298,16 @@ class BLE(Init):
 		"""
 		if str(enable) == '1':
 			cmd = 'hcitool -i {0} cmd 08 06 00 08 00 08 03 00 00 BC 9A 78 56 34 12 07 00\n' \
-			      'sleep 1\n' \
 			      'hcitool -i {0} cmd 08 08 1F 00 99 88 77 66 55 44 33 22 11 00 99 88 77 66 55 44 33 22 11 00 ' \
 			      '99 88 77 66 55 44 33 22 11 00\n' \
-			      'sleep 1\n' \
 			      'hcitool -i {0} cmd 0x08 0x0A 0x0{1}' \
 				.format(self.hci_dut, enable)
 			log_bt_case.info(cmd)
 			return cmd
 		elif str(enable) == '0':
 			cmd = 'hcitool -i {0} cmd 08 06 00 08 00 08 03 00 00 BC 9A 78 56 34 12 07 00\n' \
-			      'sleep 1\n' \
 			      'hcitool -i {0} cmd 08 08 1F 00 99 88 77 66 55 44 33 22 11 00 99 88 77 66 55 44 33 22 11 00 ' \
 			      '99 88 77 66 55 44 33 22 11 00\n' \
-			      'sleep 1\n' \
 			      'hcitool -i {0} cmd 0x08 0x0A 0x0{1}' \
 				.format(self.hci_dut, enable)
 			log_bt_case.info(cmd)
@@ -320,9 +325,7 @@ class BLE(Init):
 		if str(enable) == '1':
 			cmd = 'hcitool -i {0} cmd 08 09 1F 00 99 88 77 66 55 44 33 22 11 00 99 88 77 66 55 44 33 22 11 00 ' \
 			      '99 88 77 66 55 44 33 22 11 00\n' \
-			      'sleep 1\n' \
 			      'hcitool -i {0} cmd 08 0B 01 00 08 10 00 00 00\n' \
-			      'sleep 1\n' \
 			      'hcitool -i {0} cmd 08 0C 01 0{1}' \
 				.format(self.hci_dut, enable)
 			log_bt_case.info(cmd)
@@ -330,9 +333,7 @@ class BLE(Init):
 		elif str(enable) == '0':
 			cmd = 'hcitool -i {0} cmd 08 09 1F 00 99 88 77 66 55 44 33 22 11 00 99 88 77 66 55 44 33 22 11 00 ' \
 			      '99 88 77 66 55 44 33 22 11 00\n' \
-			      'sleep 1\n' \
 			      'hcitool -i {0} cmd 08 0B 01 00 08 10 00 00 00\n' \
-			      'sleep 1\n' \
 			      'hcitool -i {0} cmd 08 0C 01 0{1}' \
 				.format(self.hci_dut, enable)
 			log_bt_case.info(cmd)
@@ -350,9 +351,7 @@ class BLE(Init):
 		if str(enable) == '1':
 			cmd = 'hcitool -i {0} cmd 08 09 1F 00 99 88 77 66 55 44 33 22 11 00 99 88 77 66 55 44 33 22 11 00 ' \
 			      '99 88 77 66 55 44 33 22 11 00\n' \
-			      'sleep 1\n' \
 			      'hcitool -i {0} cmd 08 0B 01 40 06 10 00 00 00\n' \
-			      'sleep 1\n' \
 			      'hcitool -i {0} cmd 08 0C 01 0{1}' \
 				.format(self.hci_dut, enable)
 			log_bt_case.info(cmd)
@@ -360,9 +359,7 @@ class BLE(Init):
 		elif str(enable) == '0':
 			cmd = 'hcitool -i {0} cmd 08 09 1F 00 99 88 77 66 55 44 33 22 11 00 99 88 77 66 55 44 33 22 11 00 ' \
 			      '99 88 77 66 55 44 33 22 11 00\n' \
-			      'sleep 1\n' \
 			      'hcitool -i {0} cmd 08 0B 01 40 06 10 00 00 00\n' \
-			      'sleep 1\n' \
 			      'hcitool -i {0} cmd 08 0C 01 0{1}' \
 				.format(self.hci_dut, enable)
 			log_bt_case.info(cmd)
@@ -380,9 +377,7 @@ class BLE(Init):
 		if str(enable) == '1':
 			cmd = 'hcitool -i {0} cmd 08 09 1F 00 99 88 77 66 55 44 33 22 11 00 99 88 77 66 55 44 33 22 11 00 ' \
 			      '99 88 77 66 55 44 33 22 11 00\n' \
-			      'sleep 1\n' \
 			      'hcitool -i {0} cmd 08 0B 01 10 00 10 00 00 00\n' \
-			      'sleep 1\n' \
 			      'hcitool -i {0} cmd 08 0C 01 0{1}' \
 				.format(self.hci_dut, enable)
 			log_bt_case.info(cmd)
@@ -390,9 +385,7 @@ class BLE(Init):
 		elif str(enable) == '0':
 			cmd = 'hcitool -i {0} cmd 08 09 1F 00 99 88 77 66 55 44 33 22 11 00 99 88 77 66 55 44 33 22 11 00 ' \
 			      '99 88 77 66 55 44 33 22 11 00\n' \
-			      'sleep 1\n' \
 			      'hcitool -i {0} cmd 08 0B 01 10 00 10 00 00 00\n' \
-			      'sleep 1\n' \
 			      'hcitool -i {0} cmd 08 0C 01 0{1}' \
 				.format(self.hci_dut, enable)
 			log_bt_case.info(cmd)
@@ -401,35 +394,86 @@ class BLE(Init):
 			log_bt_case.info('Invalid input for BLE Adv setting, pls check config.ini file')
 
 	@enter_hci_header_footer()
-	def ble_connection_1dot28s(self, ref_address):
+	def ble_create_connection(self, ref_address):
 		"""
-		BLE connection 1.28s interval
+		BLE connection to Ref: Ref advertises, DUT scans then creates the connection
 		:param ref_address: Ref BD addr
-		:return: LE connection 1.28s interval cmd
+		:return: LE create connection cmd
 		"""
 		ref_address = str(ref_address).strip().split(':')
 		ref_address.reverse()
 		ref_address = ' '.join(ref_address)
 		# print(ref_address)
 		cmd = 'hcitool -i {1} cmd 08 06 00 08 00 08 00 00 00 BC 9A 78 56 34 12 07 00\n' \
-		      'sleep 1\n' \
 		      'hcitool -i {1} cmd 08 08 1F 00 99 88 77 66 55 44 33 22 11 00 99 88 77 66 55 44 33 22 11 00 ' \
 		      '99 88 77 66 55 44 33 22 11 00\n' \
-		      'sleep 1\n' \
 		      'hcitool -i {1} cmd 0x08 0x0A 0x01\n' \
-		      'sleep 1\n' \
 		      'hcitool -i {0} cmd 08 09 1F 00 99 88 77 66 55 44 33 22 11 00 99 88 77 66 55 44 33 22 11 00 ' \
 		      '99 88 77 66 55 44 33 22 11 00\n' \
-		      'sleep 1\n' \
 		      'hcitool -i {0} cmd 08 0B 01 10 00 10 00 00 00\n' \
-		      'sleep 1\n' \
 		      'hcitool -i {0} cmd 08 0C 01 01\n' \
 		      'sleep 2\n' \
 		      'hcitool -i {0} cmd 08 0C 01 00\n' \
-		      'sleep 2\n' \
-		      'hcitool -i {0} cmd 08 0D 10 00 10 00 00 00 {2} 00 00 04 00 04 00 00 00 08 10 00 10 00\n' \
-		      'sleep 2\n' \
-		      'hcitool -i {0} cmd 08 13 80 00 00 04 00 04 00 00 00 08 10 00 10 00' \
+		      'hcitool -i {0} cmd 08 0D 10 00 10 00 00 00 {2} 00 00 04 00 04 00 00 00 08 10 00 10 00' \
 			.format(self.hci_dut, self.hci_ref, ref_address)
 		log_bt_case.info(cmd)
 		return cmd
+
+	@enter_hci_header_footer()
+	def ble_connection_1dot28s(self):
+		"""
+		BLE connection 1.28s interval, update of the LE connection from ble_create_connection
+		:return: LE connection 1.28s interval cmd
+		"""
+		cmd = 'hcitool -i {0} cmd 08 13 80 00 00 04 00 04 00 00 00 08 10 00 10 00'.format(self.hci_dut)
+		log_bt_case.info(cmd)
+		return cmd
+
+
+class Ready(Init):
+	def __init__(self, chip_version, hci_dut, hci_ref):
+		"""
+		Init ready conditions, shell cmds polled by wait_until after a case step
+		:param chip_version: chip version
+		:param hci_dut: hci DUT
+		:param hci_ref: hci Reference
+		"""
+		Init.__init__(self, chip_version, hci_dut, hci_ref)
+
+	@staticmethod
+	def cmd_complete():
+		"""
+		HCI Command Complete event seen in the step output, test once with step timeout 0 as "$out" does not change
+		:return: ready condition
+		"""
+		return 'echo "$out" | grep -q "HCI Event: 0x0e"'
+
+	@staticmethod
+	def hci_up(hci_interface):
+		"""
+		hci interface back UP RUNNING, e.g. after reset
+		:param hci_interface: hci interface
+		:return: ready condition
+		"""
+		return 'hciconfig {0} | grep -q "UP RUNNING"'.format(hci_interface)
+
+	def scan(self, pscan, iscan):
+		"""
+		DUT page/inquiry scan flags match the setting
+		:param pscan: page scan expected on
+		:param iscan: inquiry scan expected on
+		:return: ready condition
+		"""
+		condition_list = []
+		for flag, enable in (('PSCAN', pscan), ('ISCAN', iscan)):
+			condition_list.append('{0}hciconfig {1} | grep -q {2}'.format('' if enable else '! ', self.hci_dut, flag))
+		return ' && '.join(condition_list)
+
+	def link(self, link_type, address):
+		"""
+		DUT has a link of given type to address, from hcitool con
+		:param link_type: ACL, SCO or LE (SCO matches eSCO too)
+		:param address: remote BD addr
+		:return: ready condition
+		"""
+		return 'hcitool -i {0} con | grep -qi "{1} {2}"'.format(self.hci_dut, link_type, str(address).strip())
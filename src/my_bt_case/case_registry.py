@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+import inspect
+from collections import namedtuple
+import src.my_config.config_basic as config_basic  # Import config
+import src.my_ssh.ssh_send_cmd as ssh_send_cmd  # Import case cmds
+from src.my_misc.my_logging import create_logger  # Import logging
+
+log_registry = create_logger()  # Create logger for this file
+
+# One test case: [Test_Case] key (None: always run), report name, group enable key (None: no group),
+# trigger/sample count type 0: flat; 1: pulse; 2: active, ssh_send_cmd function, power level at chip pin,
+# DUT link state left by the case (None: nothing kept, the next case resets DUT and Ref), see case_scheduler,
+# expected interval (s) of the current events of the case (None: not periodic), see dmm_waveform,
+# current waveform of simulated DMMs (DMM_Backend = SIM) in the case, dmm_sim.WAVEFORM_PRESETS name
+Case = namedtuple('Case', ['key', 'name', 'group', 'count_type', 'func', 'power_level', 'state', 'interval',
+                           'waveform'],
+                  defaults=(None, 'deep_sleep'))
+
+# Test cases in run order, Deep Sleep is always measured as 1st case
+case_table = [
+	Case(None, 'Deep Sleep', None, 0, ssh_send_cmd.cc_bt_init_status, '0', None, None, 'deep_sleep'),
+
+	Case('BT_Idle', 'BT Idle', 'BT_Enable', 0, ssh_send_cmd.cc_bt_idle, '0', None, None, 'idle'),
+	Case('BT_P_Scan', 'BT Page Scan', 'BT_Enable', 1, ssh_send_cmd.cc_bt_pscan, '0', None, 1.28, 'page_scan'),
+	Case('BT_I_Scan', 'BT Inquiry Scan', 'BT_Enable', 1, ssh_send_cmd.cc_bt_iscan, '0', None, 1.28,
+	     'inquiry_scan'),
+	Case('BT_PI_Scan', 'BT Page & Inquiry Scan', 'BT_Enable', 1, ssh_send_cmd.cc_bt_piscan, '0', None, 1.28,
+	     'page_inquiry_scan'),
+	Case('BT_ACL_Sniff_1.28s_Master_0-dBm-pin', 'BT ACL Sniff 1.28s interval Master @ 0dBm at Pin',
+	     'BT_Enable', 1, ssh_send_cmd.cc_bt_acl_sniff_1dot28s_master, '0', 'ACL 1.28s', 1.28, 'sniff_1.28s'),
+	Case('BT_ACL_Sniff_1.28s_Master_4-dBm-pin', 'BT ACL Sniff 1.28s interval Master @ 4dBm at Pin',
+	     'BT_Enable', 1, ssh_send_cmd.cc_bt_acl_sniff_1dot28s_master, '4', 'ACL 1.28s', 1.28, 'sniff_1.28s'),
+	Case('BT_ACL_Sniff_1.28s_Master_Max-dBm-pin', 'BT ACL Sniff 1.28s interval Master @ Max dBm at Pin',
+	     'BT_Enable', 1, ssh_send_cmd.cc_bt_acl_sniff_1dot28s_master, 'Max', 'ACL 1.28s', 1.28, 'sniff_1.28s'),
+	Case('BT_ACL_Sniff_0.5s_Master_0-dBm-pin', 'BT ACL Sniff 0.5s interval Master @ 0 dBm at Pin',
+	     'BT_Enable', 1, ssh_send_cmd.cc_bt_acl_sniff_0dot5s_master, '0', 'ACL 0.5s', 0.5, 'sniff_0.5s'),
+	Case('BT_ACL_Sniff_0.5s_Master_4-dBm-pin', 'BT ACL Sniff 0.5s interval Master @ 4 dBm at Pin',
+	     'BT_Enable', 1, ssh_send_cmd.cc_bt_acl_sniff_0dot5s_master, '4', 'ACL 0.5s', 0.5, 'sniff_0.5s'),
+	Case('BT_ACL_Sniff_0.5s_Master_Max-dBm-pin', 'BT ACL Sniff 0.5s interval Master @ Max dBm at Pin',
+	     'BT_Enable', 1, ssh_send_cmd.cc_bt_acl_sniff_0dot5s_master, 'Max', 'ACL 0.5s', 0.5, 'sniff_0.5s'),
+	Case('BT_SCO_HV3_Master_0-dBm-pin', 'BT SCO HV3 Master @ 0 dBm at Pin',
+	     'BT_Enable', 2, ssh_send_cmd.cc_bt_sco_hv3, '0', 'SCO HV3', 0.00375, 'sco'),
+	Case('BT_SCO_HV3_Master_4-dBm-pin', 'BT SCO HV3 Master @ 4 dBm at Pin',
+	     'BT_Enable', 2, ssh_send_cmd.cc_bt_sco_hv3, '4', 'SCO HV3', 0.00375, 'sco'),
+	Case('BT_SCO_HV3_Master_Max-dBm-pin', 'BT SCO HV3 Master @ Max dBm at Pin',
+	     'BT_Enable', 2, ssh_send_cmd.cc_bt_sco_hv3, 'Max', 'SCO HV3', 0.00375, 'sco'),
+	Case('BT_SCO_EV3_Master_0-dBm-pin', 'BT SCO EV3 Master @ 0 dBm at Pin',
+	     'BT_Enable', 2, ssh_send_cmd.cc_bt_sco_ev3, '0', 'SCO EV3', 0.00375, 'sco'),
+	Case('BT_SCO_EV3_Master_4-dBm-pin', 'BT SCO EV3 Master @ 4 dBm at Pin',
+	     'BT_Enable', 2, ssh_send_cmd.cc_bt_sco_ev3, '4', 'SCO EV3', 0.00375, 'sco'),
+	Case('BT_SCO_EV3_Master_Max-dBm-pin', 'BT SCO EV3 Master @ Max dBm at Pin',
+	     'BT_Enable', 2, ssh_send_cmd.cc_bt_sco_ev3, 'Max', 'SCO EV3', 0.00375, 'sco'),
+
+	Case('BLE_Adv_1.28s_3Channel_0-dBm-pin', 'BLE Adv 1.28s interval 3 channels @ 0 dBm at Pin',
+	     'BLE_Enable', 1, ssh_send_cmd.cc_ble_adv_1dot28s_3channel, '0', 'ADV 1.28s', 1.28,
+	     'ble_adv_1.28s'),
+	Case('BLE_Adv_1.28s_3Channel_4-dBm-pin', 'BLE Adv 1.28s interval 3 channels @ 4 dBm at Pin',
+	     'BLE_Enable', 1, ssh_send_cmd.cc_ble_adv_1dot28s_3channel, '4', 'ADV 1.28s', 1.28,
+	     'ble_adv_1.28s'),
+	Case('BLE_Adv_1.28s_3Channel_Max-dBm-pin', 'BLE Adv 1.28s interval 3 channels @ Max dBm at Pin',
+	     'BLE_Enable', 1, ssh_send_cmd.cc_ble_adv_1dot28s_3channel, 'Max', 'ADV 1.28s', 1.28,
+	     'ble_adv_1.28s'),
+	Case('BLE_Scan_1.28s', 'BLE Scan 1.28s interval', 'BLE_Enable', 1, ssh_send_cmd.cc_ble_scan_1dot28s, '0', None,
+	     1.28, 'ble_scan_1.28s'),
+	Case('BLE_Scan_1s', 'BLE Scan 1s interval', 'BLE_Enable', 1, ssh_send_cmd.cc_ble_scan_1s, '0', None, 1.0,
+	     'ble_scan_1s'),
+	Case('BLE_Scan_10ms', 'BLE Scan 10ms interval', 'BLE_Enable', 1, ssh_send_cmd.cc_ble_scan_10ms, '0', None, 0.01,
+	     'ble_scan_10ms'),
+	Case('BLE_Connection_1.28s_0-dBm-pin', 'BLE Connection 1.28s interval @ 0 dBm at Pin',
+	     'BLE_Enable', 1, ssh_send_cmd.cc_ble_connection_1dot28s, '0', 'LE 1.28s', 1.28,
+	     'ble_connection_1.28s'),
+	Case('BLE_Connection_1.28s_4-dBm-pin', 'BLE Connection 1.28s interval @ 4 dBm at Pin',
+	     'BLE_Enable', 1, ssh_send_cmd.cc_ble_connection_1dot28s, '4', 'LE 1.28s', 1.28,
+	     'ble_connection_1.28s'),
+	Case('BLE_Connection_1.28s_Max-dBm-pin', 'BLE Connection 1.28s interval @ Max dBm at Pin',
+	     'BLE_Enable', 1, ssh_send_cmd.cc_ble_connection_1dot28s, 'Max', 'LE 1.28s', 1.28,
+	     'ble_connection_1.28s'),
+]
+
+
+def get_case(key):
+	"""
+	Get test case by [Test_Case] key or report name
+	:param key: [Test_Case] key or report name
+	:return: Case, None if not registered
+	"""
+	for case in case_table:
+		if key in (case.key, case.name):
+			return case
+	return None
+
+
+def case_kwargs(case, context):
+	"""
+	Bind ssh_send_cmd function arguments by parameter name
+	:param case: Case
+	:param context: dict of run values: hci_dut, hci_ref, dut_addr, ref_addr
+	:return: kwargs dict
+	"""
+	values = dict(context, power_level=case.power_level)
+	return {name: values[name] for name in inspect.signature(case.func).parameters if name in values}
+
+
+def case_plan(table=None):
+	"""
+	Get test cases to run with their enable flag from config.ini [Test_Case]
+	:param table: Case list, default case_table
+	:return: (Case, enable flag) list, cases of a skipped group are left out
+	"""
+	if table is None:
+		table = case_table
+	plan = []
+	group_dict = {}
+	for case in table:
+		if case.group is not None:
+			if case.group not in group_dict:
+				group_dict[case.group] = str(config_basic.config_test_case(case.group))
+				if group_dict[case.group] == '0':
+					log_registry.info('Skip all test cases of [{0}]'.format(case.group))
+				elif group_dict[case.group] != '1':
+					raise ValueError('Invalid "{0}" info, pls check config.ini file'.format(case.group))
+			if group_dict[case.group] != '1':
+				continue
+		enable = 1 if case.key is None else (config_basic.config_test_case(case.key) or '0')
+		plan.append((case, enable))
+	return plan
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+from collections import namedtuple
+import src.my_ssh.ssh_send_cmd as ssh_send_cmd  # Import case cmds
+from src.my_misc.my_logging import create_logger  # Import logging
+
+log_scheduler = create_logger()  # Create logger for this file
+
+# DUT state left by the last case: link state from case table (e.g. 'ACL 1.28s') and power level at chip pin
+DutState = namedtuple('DutState', ['link', 'power_level'])
+
+# hcitool con link type still up in a link state, None: nothing to check but the cmd complete event
+link_type_dict = {'ACL': 'ACL', 'SCO': 'SCO', 'LE': 'LE', 'ADV': None}
+
+
+def schedule(plan):
+	"""
+	Order test cases so cases sharing a DUT link state run back to back, e.g. the 0/4/Max dBm variants of one link.
+	Cases keep their order otherwise, cases without link state stay in place.
+	:param plan: (Case, enable flag) list from case_registry.case_plan
+	:return: (Case, enable flag) list in run order
+	"""
+	first_index = {}
+	for i, (case, enable) in enumerate(plan):
+		if case.state is not None:
+			first_index.setdefault(case.state, i)
+	order = sorted(range(len(plan)), key=lambda i: (first_index.get(plan[i][0].state, i), i))
+	return [plan[i] for i in order]
+
+
+class CaseScheduler(object):
+	def __init__(self):
+		"""
+		Track DUT state between test cases, a case whose link state is already up only changes the power level
+		instead of resetting DUT and Ref and rebuilding the link
+		"""
+		self.state = None  # Unknown, the next case resets DUT and Ref
+		self.reset_count = 0
+		self.reuse_count = 0
+
+	def is_reusable(self, case):
+		"""
+		Check if DUT state can be reused for test case
+		:param case: Case
+		:return: True if DUT already has the link state of the case
+		"""
+		return case.state is not None and self.state is not None and self.state.link == case.state
+
+	def case_func(self, case):
+		"""
+		Get function bringing DUT to test case state, called with case_registry.case_kwargs
+		:param case: Case
+		:return: function
+		"""
+		def run_case(**kwargs):
+			target = DutState(case.state, str(case.power_level))
+			reuse = self.is_reusable(case)
+			self.state = None  # Unknown until the transition is done, a failed case forces a reset
+			if reuse:
+				log_scheduler.info('Keep DUT {0} link, set power level {1} only'.format(case.state, target.power_level))
+				result = ssh_send_cmd.cc_bt_link_power_level(kwargs.get('ref_addr'), target.power_level,
+				                                             link_type_dict.get(case.state.split()[0]))
+				self.reuse_count += 1
+			else:
+				result = case.func(**kwargs)
+				self.reset_count += 1
+			self.state = target
+			return result
+		return run_case
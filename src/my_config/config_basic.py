@@ -2,20 +2,217 @@
 # -*- coding: utf-8 -*-
 # Author: Alex Wang
 
+import os
+import threading
 import configparser
+from types import MappingProxyType  # Read-only dict view
+from collections import namedtuple
 from src.my_misc.my_logging import create_logger
 log = create_logger()
 
+config_file_name = 'config.ini'
+
+# Power index section of each chip version
+power_index_section = {'8977': 'Robin3_8977_Power_Index',
+                       '8997': 'KF2_8997_Power_Index',
+                       '8987': 'CA2_8987_Power_Index'}
+# Power index key of each power level
+power_index_key = {'0': '0_dBm_Pin',
+                   '4': '4_dBm_Pin',
+                   'Max': 'Max_dBm_Pin'}
+# Power index of each chip version and power level, used when the key is missing
+power_index_default = {'8977': {'0': '2A', '4': '32', 'Max': '43'},
+                       '8997': {'0': '29', '4': '31', 'Max': '42'},
+                       '8987': {'0': '29', '4': '31', 'Max': '42'}}
+# Min settle time (s) of each [Case_Settle] <name>_Settle key, used when the key is missing
+case_settle_default = {'ACL_Sniff': 2.0,
+                       'SCO_Sniff': 3.0,
+                       'SCO': 5.0,
+                       'LE_Connection': 10.0}
+
+# Typed, immutable view of config.ini; [0] flat [1] pulse [2] active for the per-mode tuples,
+# test_case keys are lower case as stored by ConfigParser
+ConfigSnapshot = namedtuple('ConfigSnapshot', ['chip_version', 'dut', 'ref', 'worksheet_name_list', 'excel_report_path',
+                                               'raw_export_path', 'raw_export_dtype', 'results_journal_path',
+                                               'visa_address_active_list', 'dmm_timeout',
+                                               'trigger_count', 'sample_count', 'stats_only',
+                                               'dmm_backend', 'dmm_sim_time_scale', 'dmm_concurrent',
+                                               'dmm_data_format', 'dmm_acquisition_mode', 'dmm_stream_chunk',
+                                               'dmm_adaptive_tolerance', 'dmm_adaptive_min_blocks',
+                                               'dmm_adaptive_max_factor', 'dmm_confidence',
+                                               'dmm_raw_spool', 'dmm_raw_spool_dir',
+                                               'current_range', 'trig_src', 'trig_delay',
+                                               'sample_src', 'sample_timer',
+                                               'ssh_server', 'ssh_username', 'ssh_password', 'ssh_backend',
+                                               'ssh_sim_time_scale',
+                                               'case_settle', 'bt_power_index', 'test_case'])
+
+# Parsed config.ini and its snapshot, reloaded only when the file changes on disk
+_cache = {'stamp': None, 'config': None, 'snapshot': None}
+_cache_lock = threading.Lock()
+
+
+def _file_stamp():
+	"""
+	Get config.ini modification stamp
+	:return: (file name, mtime ns, size), None if the file does not exist
+	"""
+	try:
+		stat = os.stat(config_file_name)
+	except OSError:
+		return None
+	return config_file_name, stat.st_mtime_ns, stat.st_size
+
+
+def _refresh():
+	"""
+	Re-parse config.ini if it changed since the last parse
+	:return: None
+	"""
+	stamp = _file_stamp()
+	if _cache['config'] is not None and stamp == _cache['stamp']:
+		return
+	with _cache_lock:
+		if _cache['config'] is not None and stamp == _cache['stamp']:
+			return
+		config = configparser.ConfigParser()
+		config.read(config_file_name)
+		_cache['config'] = config
+		_cache['snapshot'] = None
+		_cache['stamp'] = stamp
+
+
+def _setting(config, section_name, key, convert, fallback):
+	"""
+	Get one typed setting, a missing section or key or a bad value falls back for this setting only, so the other
+	settings still load
+	:param config: ConfigParser instance
+	:param section_name: config section
+	:param key: config key
+	:param convert: type conversion function
+	:param fallback: value of a missing or bad setting, same as shipped in config.ini
+	:return: converted value, or fallback
+	"""
+	value = config.get(section_name, key, fallback=None) if config.has_section(section_name) else None
+	if value is None:
+		log.info('[{0}] {1} not in {2}, use {3}'.format(section_name, key, config_file_name, fallback))
+		return fallback
+	try:
+		return convert(value)
+	except ValueError:
+		log.info('[{0}] {1} = {2} is invalid, use {3}'.format(section_name, key, value, fallback))
+		return fallback
+
+
+def _mode_tuple(config, key_format, convert, fallback):
+	"""
+	Get one [DMM] setting for flat, pulse and active modes
+	:param config: ConfigParser instance
+	:param key_format: key with {0} for the mode name
+	:param convert: type conversion function
+	:param fallback: (flat, pulse, active) values of missing settings
+	:return: (flat, pulse, active)
+	"""
+	return tuple(_setting(config, 'DMM', key_format.format(mode), convert, value)
+	             for mode, value in zip(('Flat', 'Pulse', 'Active'), fallback))
+
+
+def _upper(value):
+	"""
+	Convert setting to upper case string
+	:param value: setting string
+	:return: upper case string
+	"""
+	return str(value).upper()
+
+
+def _lower(value):
+	"""
+	Convert setting to lower case string
+	:param value: setting string
+	:return: lower case string
+	"""
+	return str(value).lower()
+
+
+def _build_snapshot(config):
+	"""
+	Convert parsed config.ini to typed snapshot, every setting falls back on its own to the config.ini default
+	:param config: ConfigParser instance
+	:return: ConfigSnapshot
+	"""
+	visa_address_list_all = [_setting(config, 'DMM', 'VISA_Address_{0}'.format(i), str, '') for i in 'ABCD']
+	dmm_count = _setting(config, 'DMM', 'DMM_Count', int, 2)
+	bt_power_index = {}
+	for chip_version, section_name in power_index_section.items():
+		bt_power_index[chip_version] = MappingProxyType(
+			{level: _setting(config, section_name, key, str, power_index_default[chip_version][level])
+			 for level, key in power_index_key.items()})
+	test_case = dict(config['Test_Case']) if config.has_section('Test_Case') else {}
+	case_settle = {key.lower(): _setting(config, 'Case_Settle', key + '_Settle', float, value)
+	               for key, value in case_settle_default.items()}
+	return ConfigSnapshot(
+		chip_version=_setting(config, 'BASIC', 'Chip_Version', str, '8977'),
+		dut=_setting(config, 'BASIC', 'Dut', str, 'hci0'),
+		ref=_setting(config, 'BASIC', 'Ref', str, 'hci1'),
+		worksheet_name_list=tuple(_setting(config, 'BASIC', 'Excel_Sheet_Name_{0}'.format(i), str, name)
+		                          for i, name in zip('ABCD', ('3_3', '1_8', '1_1', '2_2'))),
+		excel_report_path=_setting(config, 'BASIC', 'Excel_Report_Path', str, r'C:\test.xlsx'),
+		raw_export_path=_setting(config, 'BASIC', 'Raw_Export_Path', str, r'C:\test_raw.h5'),
+		raw_export_dtype=_setting(config, 'BASIC', 'Raw_Export_Dtype', _lower, 'float32'),
+		results_journal_path=_setting(config, 'BASIC', 'Results_Journal_Path', str, r'C:\test_journal.jsonl'),
+		visa_address_active_list=tuple(visa_address_list_all[:dmm_count]),
+		dmm_timeout=_setting(config, 'DMM', 'DMM_Timeout', float, 600000.0),
+		trigger_count=_mode_tuple(config, '{0}_Trigger_Count', float, (1.0, 50.0, 20.0)),
+		sample_count=_mode_tuple(config, '{0}_Sample_Count', float, (100.0, 100.0, 100.0)),
+		stats_only=_mode_tuple(config, '{0}_Stats_Only', int, (0, 0, 0)),
+		dmm_backend=_setting(config, 'DMM', 'DMM_Backend', _upper, 'VISA'),
+		dmm_sim_time_scale=_setting(config, 'DMM', 'DMM_Sim_Time_Scale', float, 1.0),
+		dmm_concurrent=_setting(config, 'DMM', 'DMM_Concurrent', int, 1),
+		dmm_data_format=_setting(config, 'DMM', 'DMM_Data_Format', _upper, 'ASCII'),
+		dmm_acquisition_mode=_setting(config, 'DMM', 'DMM_Acquisition_Mode', _upper, 'READ'),
+		dmm_stream_chunk=_setting(config, 'DMM', 'DMM_Stream_Chunk', int, 10000),
+		dmm_adaptive_tolerance=_setting(config, 'DMM', 'DMM_Adaptive_Tolerance', float, 0.01),
+		dmm_adaptive_min_blocks=_setting(config, 'DMM', 'DMM_Adaptive_Min_Blocks', int, 2),
+		dmm_adaptive_max_factor=_setting(config, 'DMM', 'DMM_Adaptive_Max_Factor', float, 4.0),
+		dmm_confidence=_setting(config, 'DMM', 'DMM_Confidence', float, 0.95),
+		dmm_raw_spool=_setting(config, 'DMM', 'DMM_Raw_Spool', int, 0),
+		dmm_raw_spool_dir=_setting(config, 'DMM', 'DMM_Raw_Spool_Dir', str, ''),
+		current_range=_setting(config, 'DMM', 'Current_Range', float, 3.0),
+		trig_src=_setting(config, 'DMM', 'DMM_Trigger_Source', str, 'IMM'),
+		trig_delay=_setting(config, 'DMM', 'DMM_Trigger_Delay', str, 'MIN'),
+		sample_src=_setting(config, 'DMM', 'DMM_Sample_Source', str, 'TIM'),
+		sample_timer=_setting(config, 'DMM', 'DMM_Sample_Timer', str, 'MIN'),
+		ssh_server=_setting(config, 'SSH', 'SSH_Server', str, ''),
+		ssh_username=_setting(config, 'SSH', 'SSH_Username', str, 'root'),
+		ssh_password=_setting(config, 'SSH', 'SSH_Password', str, ''),
+		ssh_backend=_setting(config, 'SSH', 'SSH_Backend', _upper, 'SSH'),
+		ssh_sim_time_scale=_setting(config, 'SSH', 'SSH_Sim_Time_Scale', float, 1.0),
+		case_settle=MappingProxyType(case_settle),
+		bt_power_index=MappingProxyType(bt_power_index),
+		test_case=MappingProxyType(test_case))
+
 
 def load_config():
 	"""
-	Load config.ini file and return instance
+	Load config.ini file and return instance, parsed once and re-parsed only when the file changes.
+	The instance is shared, read it only.
 	:return: config instance
 	"""
-	config = configparser.ConfigParser()
-	config_file_name = 'config.ini'
-	config.read(config_file_name)
-	return config
+	_refresh()
+	return _cache['config']
+
+
+def config_snapshot():
+	"""
+	Get typed, immutable snapshot of config.ini, rebuilt only when the file changes
+	:return: ConfigSnapshot
+	"""
+	_refresh()
+	with _cache_lock:
+		if _cache['snapshot'] is None:
+			_cache['snapshot'] = _build_snapshot(_cache['config'])
+		return _cache['snapshot']
 
 
 def config_chip_version():
@@ -23,9 +220,7 @@ def config_chip_version():
 	Load chip version from config.ini
 	:return: chip version string
 	"""
-	config = load_config()
-	chip_version = str(config['BASIC'].get('Chip_Version'))
-	return chip_version
+	return config_snapshot().chip_version
 
 
 def config_dut():
@@ -33,9 +228,7 @@ def config_dut():
 	Load DUT hci# from config.ini
 	:return: DUT hci# string
 	"""
-	config = load_config()
-	dut = str(config['BASIC'].get('Dut'))
-	return dut
+	return config_snapshot().dut
 
 
 def config_ref():
@@ -43,9 +236,7 @@ def config_ref():
 	Load REF hci# from config.ini
 	:return: REF hci# string
 	"""
-	config = load_config()
-	ref = str(config['BASIC'].get('Ref'))
-	return ref
+	return config_snapshot().ref
 
 
 def worksheet_name_all_list():
@@ -53,12 +244,39 @@ def worksheet_name_all_list():
 	Load worksheet name list from config.ini, up to 4 sheets
 	:return: worksheet name list
 	"""
-	config = load_config()
-	excel_sheet_name_list = [str(config['BASIC'].get('Excel_Sheet_Name_A')),
-	                         str(config['BASIC'].get('Excel_Sheet_Name_B')),
-	                         str(config['BASIC'].get('Excel_Sheet_Name_C')),
-	                         str(config['BASIC'].get('Excel_Sheet_Name_D'))]
-	return excel_sheet_name_list
+	return list(config_snapshot().worksheet_name_list)
+
+
+def excel_report_path():
+	"""
+	Load Excel report file path from config.ini
+	:return: Excel report file path
+	"""
+	return config_snapshot().excel_report_path
+
+
+def raw_export_path():
+	"""
+	Load raw readings HDF5 file path from config.ini
+	:return: HDF5 file path, empty string if raw export is disabled
+	"""
+	return config_snapshot().raw_export_path
+
+
+def raw_export_dtype():
+	"""
+	Load raw readings stored type from config.ini
+	:return: float32 or float64
+	"""
+	return config_snapshot().raw_export_dtype
+
+
+def results_journal_path():
+	"""
+	Load results journal file path from config.ini
+	:return: journal file path, empty string if journal is disabled
+	"""
+	return config_snapshot().results_journal_path
 
 
 def visa_address_active_list():
@@ -66,20 +284,7 @@ def visa_address_active_list():
 	Get VISA address list based on running instrument number and their addresses from config file
 	:return: VISA address list
 	"""
-	# Init config file
-	config = load_config()
-	# Get config file instrument count (DMM count): how many DMM are connected and measuring data
-	dmm_count = int(str(config['DMM'].get('DMM_Count')))
-	# Get config file DMM VISA address
-	visa_address_list_all = [str(config['DMM'].get('VISA_Address_A')),
-	                         str(config['DMM'].get('VISA_Address_B')),
-	                         str(config['DMM'].get('VISA_Address_C')),
-	                         str(config['DMM'].get('VISA_Address_D'))]
-	# Append VISA address to a list and return
-	visa_address_list = []
-	for i in range(int(dmm_count)):
-		visa_address_list.append(visa_address_list_all[i])
-	return visa_address_list
+	return list(config_snapshot().visa_address_active_list)
 
 
 def dmm_timeout():
@@ -87,9 +292,7 @@ def dmm_timeout():
 	Get DMM max timeout setting from config.ini
 	:return: timeout (ms)
 	"""
-	config = load_config()
-	timeout = float(config['DMM'].get('DMM_Timeout'))
-	return timeout
+	return config_snapshot().dmm_timeout
 
 
 def dmm_trigger_count():
@@ -97,11 +300,7 @@ def dmm_trigger_count():
 	Get DMM trigger count setting for different modes from config.ini
 	:return: trigger count list [0] flat [1] pulse [2] active
 	"""
-	config = load_config()
-	flat = float(config['DMM'].get('Flat_Trigger_Count'))
-	pulse = float(config['DMM'].get('Pulse_Trigger_Count'))
-	active = float(config['DMM'].get('Active_Trigger_Count'))
-	return [flat, pulse, active]
+	return list(config_snapshot().trigger_count)
 
 
 def dmm_sample_count():
@@ -109,11 +308,112 @@ def dmm_sample_count():
 	Get DMM sample count setting for different modes from config.ini
 	:return: sample count list [0] flat [1] pulse [2] active
 	"""
-	config = load_config()
-	flat = float(config['DMM'].get('Flat_Sample_Count'))
-	pulse = float(config['DMM'].get('Pulse_Sample_Count'))
-	active = float(config['DMM'].get('Active_Sample_Count'))
-	return [flat, pulse, active]
+	return list(config_snapshot().sample_count)
+
+
+def dmm_backend():
+	"""
+	Get DMM instrument backend from config.ini
+	:return: VISA: real instruments; SIM: in-process simulated DMMs
+	"""
+	return config_snapshot().dmm_backend
+
+
+def dmm_sim_time_scale():
+	"""
+	Get simulated DMM sample timer latency scale from config.ini
+	:return: 1.0 real latency; 0 no latency
+	"""
+	return config_snapshot().dmm_sim_time_scale
+
+
+def dmm_concurrent():
+	"""
+	Get DMM concurrent acquisition setting from config.ini
+	:return: 1: arm and read all DMMs at the same time; 0: one after another
+	"""
+	return config_snapshot().dmm_concurrent
+
+
+def dmm_data_format():
+	"""
+	Get DMM reading transfer format from config.ini
+	:return: ASCII or REAL (binary REAL,64)
+	"""
+	return config_snapshot().dmm_data_format
+
+
+def dmm_acquisition_mode():
+	"""
+	Get DMM acquisition mode from config.ini
+	:return: READ: single READ? per DMM; STREAM: INIT and chunked DATA:REMove? fetch;
+	         ADAPTIVE: READ? block by block until the mean has converged
+	"""
+	return config_snapshot().dmm_acquisition_mode
+
+
+def dmm_stream_chunk():
+	"""
+	Get DMM max readings per DATA:REMove? query in STREAM mode from config.ini
+	:return: chunk size
+	"""
+	return config_snapshot().dmm_stream_chunk
+
+
+def dmm_adaptive_tolerance():
+	"""
+	Get DMM adaptive acquisition target from config.ini
+	:return: confidence interval half width relative to the mean, e.g. 0.01 for 1%
+	"""
+	return config_snapshot().dmm_adaptive_tolerance
+
+
+def dmm_adaptive_min_blocks():
+	"""
+	Get DMM adaptive acquisition min block count from config.ini
+	:return: min block count
+	"""
+	return config_snapshot().dmm_adaptive_min_blocks
+
+
+def dmm_adaptive_max_factor():
+	"""
+	Get DMM adaptive acquisition budget from config.ini
+	:return: max block count as multiple of the trigger count
+	"""
+	return config_snapshot().dmm_adaptive_max_factor
+
+
+def dmm_confidence():
+	"""
+	Get confidence level of the confidence interval on the mean from config.ini
+	:return: confidence level, e.g. 0.95
+	"""
+	return config_snapshot().dmm_confidence
+
+
+def dmm_raw_spool():
+	"""
+	Get DMM raw readings spool setting from config.ini
+	:return: 1: readings are written to memory-mapped files; 0: readings are kept in memory
+	"""
+	return config_snapshot().dmm_raw_spool
+
+
+def dmm_raw_spool_dir():
+	"""
+	Get DMM raw readings spool directory from config.ini
+	:return: directory, empty string for system temp directory
+	"""
+	return config_snapshot().dmm_raw_spool_dir
+
+
+def dmm_stats_only():
+	"""
+	Get DMM stats only setting for different modes from config.ini
+	:return: stats only flag list [0] flat [1] pulse [2] active, 1: on-instrument statistics without raw readings
+	"""
+	return list(config_snapshot().stats_only)
 
 
 def dmm_current_range():
@@ -121,9 +421,7 @@ def dmm_current_range():
 	Get DMM current max range from config.ini
 	:return: current range (A)
 	"""
-	config = load_config()
-	current_range = float(config['DMM'].get('Current_Range'))
-	return current_range
+	return config_snapshot().current_range
 
 
 def dmm_trig_src():
@@ -131,9 +429,7 @@ def dmm_trig_src():
 	Get DMM trigger source from config.ini
 	:return: trigger source type
 	"""
-	config = load_config()
-	trig_src = str(config['DMM'].get('DMM_Trigger_Source'))
-	return trig_src
+	return config_snapshot().trig_src
 
 
 def dmm_trig_delay():
@@ -141,9 +437,7 @@ def dmm_trig_delay():
 	Get DMM trigger delay from config.ini
 	:return: trigger delay type
 	"""
-	config = load_config()
-	trig_delay = str(config['DMM'].get('DMM_Trigger_Delay'))
-	return trig_delay
+	return config_snapshot().trig_delay
 
 
 def dmm_sample_src():
@@ -151,9 +445,7 @@ def dmm_sample_src():
 	Get DMM sample source from config.ini
 	:return: sample source type
 	"""
-	config = load_config()
-	sample_src = str(config['DMM'].get('DMM_Sample_Source'))
-	return sample_src
+	return config_snapshot().sample_src
 
 
 def dmm_sample_timer():
@@ -161,9 +453,7 @@ def dmm_sample_timer():
 	Get DMM sample timer from config.ini
 	:return: sample source type
 	"""
-	config = load_config()
-	sample_timer = str(config['DMM'].get('DMM_Sample_Timer'))
-	return sample_timer
+	return config_snapshot().sample_timer
 
 
 def config_ssh_server():
@@ -171,9 +461,7 @@ def config_ssh_server():
 	Load SSH server(destination) IP address from config.ini
 	:return: SSH destination IP address string
 	"""
-	config = load_config()
-	ssh_server = str(config['SSH'].get('SSH_Server'))
-	return ssh_server
+	return config_snapshot().ssh_server
 
 
 def config_ssh_username():
@@ -181,9 +469,7 @@ def config_ssh_username():
 	Load SSH server(destination) login username from config.ini
 	:return: SSH destination login username string
 	"""
-	config = load_config()
-	ssh_username = str(config['SSH'].get('SSH_Username'))
-	return ssh_username
+	return config_snapshot().ssh_username
 
 
 def config_ssh_password():
@@ -191,9 +477,41 @@ def config_ssh_password():
 	Load SSH server(destination) login password from config.ini
 	:return: SSH destination login password string
 	"""
-	config = load_config()
-	ssh_password = str(config['SSH'].get('SSH_Password'))
-	return ssh_password
+	return config_snapshot().ssh_password
+
+
+def config_ssh_backend():
+	"""
+	Load DUT host backend from config.ini
+	:return: SSH: paramiko connection to DUT host; SIM: in-process simulated DUT host
+	"""
+	return config_snapshot().ssh_backend
+
+
+def config_ssh_sim_time_scale():
+	"""
+	Load simulated DUT host latency scale from config.ini
+	:return: 1.0: real time settle and round trip; 0: no latency
+	"""
+	return config_snapshot().ssh_sim_time_scale
+
+
+def config_case_settle(settle_key):
+	"""
+	Load min settle time after a case step is ready from config.ini
+	:param settle_key: key in [Case_Settle]: ACL_Sniff, SCO_Sniff, SCO or LE_Connection, case insensitive
+	:return: settle time (s)
+	"""
+	return config_snapshot().case_settle[str(settle_key).lower()]
+
+
+def config_test_case(case_key):
+	"""
+	Load test case enable flag from config.ini
+	:param case_key: key in [Test_Case], case insensitive
+	:return: flag string, None if the case is not in config.ini
+	"""
+	return config_snapshot().test_case.get(str(case_key).lower())
 
 
 def config_bt_power(chip_version, bt_power_level):
@@ -203,42 +521,10 @@ def config_bt_power(chip_version, bt_power_level):
 	:param bt_power_level: BT power level setting
 	:return: BT power level index with given chip version
 	"""
-	config = load_config()
-	if chip_version == '8977':
-		if bt_power_level == '0':
-			bt_power_index = str(config['Robin3_8977_Power_Index'].get('0_dBm_Pin'))
-			return bt_power_index
-		elif bt_power_level == '4':
-			bt_power_index = str(config['Robin3_8977_Power_Index'].get('4_dBm_Pin'))
-			return bt_power_index
-		elif bt_power_level == 'Max':
-			bt_power_index = str(config['Robin3_8977_Power_Index'].get('Max_dBm_Pin'))
-			return bt_power_index
-		else:
-			log.info('Something wrong with BT power level setting')
-	elif chip_version == '8997':
-		if bt_power_level == '0':
-			bt_power_index = str(config['KF2_8997_Power_Index'].get('0_dBm_Pin'))
-			return bt_power_index
-		elif bt_power_level == '4':
-			bt_power_index = str(config['KF2_8997_Power_Index'].get('4_dBm_Pin'))
-			return bt_power_index
-		elif bt_power_level == 'Max':
-			bt_power_index = str(config['KF2_8997_Power_Index'].get('Max_dBm_Pin'))
-			return bt_power_index
-		else:
-			log.info('Something wrong with BT power level setting')
-	elif chip_version == '8987':
-		if bt_power_level == '0':
-			bt_power_index = str(config['CA2_8987_Power_Index'].get('0_dBm_Pin'))
-			return bt_power_index
-		elif bt_power_level == '4':
-			bt_power_index = str(config['CA2_8987_Power_Index'].get('4_dBm_Pin'))
-			return bt_power_index
-		elif bt_power_level == 'Max':
-			bt_power_index = str(config['CA2_8987_Power_Index'].get('Max_dBm_Pin'))
-			return bt_power_index
-		else:
-			log.info('Something wrong with BT power level setting')
-	else:
+	power_index = config_snapshot().bt_power_index
+	if chip_version not in power_index:
 		log.info('Something wrong with chip version select for BT power level')
+	elif bt_power_level not in power_index[chip_version]:
+		log.info('Something wrong with BT power level setting')
+	else:
+		return power_index[chip_version][bt_power_level]
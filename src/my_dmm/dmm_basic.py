@@ -3,14 +3,47 @@
 # Author: Alex Wang
 
 import visa
+import threading  # Align READ? of concurrent DMMs
+import math
+import functools
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor  # Concurrent multi-DMM acquisition
 from pandas import DataFrame
 # config.ini settings
 import src.my_config.config_basic as config_basic
-from src.my_misc.my_logging import create_logger
+# Run-wide DMM session pool
+import src.my_dmm.dmm_pool as dmm_pool
+# Simulated DMM backend
+import src.my_dmm.dmm_sim as dmm_sim
+# Single-pass mergeable reading statistics
+import src.my_dmm.dmm_stats as dmm_stats
+# Memory-mapped raw readings spool
+import src.my_results.raw_spool as raw_spool
+# Report formatting of DMM statistics
+import src.my_results.results_store as results_store
+# Readiness polling
+import src.my_misc.my_time as my_time
+from src.my_misc.my_logging import create_logger, LazyFormat
+import src.my_misc.my_timer as my_timer
+from src.my_misc.my_timer import Span
 # Logger for DMM
 log_dmm = create_logger()
 
+# Reading statistics log record, formatted only when it is emitted
+stats_str = ('Average/Mean: {0:.4f} mA\n'
+             'Max: {1:.4f} mA\n'
+             'Min: {2:.4f} mA\n'
+             'Sdev: {3:.4f} mA\n'
+             'Total reading count: {4}\n'
+             'CI of mean: +/-{5:.4f} mA over {6} readings')
+
+# SAMP:TIM? read back by dmm_init (s) per instrument, actual sample interval when the timer is set to MIN/MAX/DEF
+sample_timer_readback = {}
+
+# dmm_init settings of the run-wide pooled sessions, applied on every (re)connect; a case asking for other settings
+# re-applies them to the pooled sessions
+pool_settings = {}
+
 
 def open_connection_dmm(visa_address_list):
 	"""
@@ -24,7 +57,7 @@ def open_connection_dmm(visa_address_list):
 	# Loop through instrument visa address list
 	inst_list = []
 	for i in visa_address_list:
-		inst_list.append(rm.open_resource(i))
+		inst_list.append(dmm_pool.open_visa_resource(rm, i))
 	return inst_list
 
 
@@ -109,10 +142,11 @@ def text_display(inst_list, text):
 		i.write('DISP:TEXT "{0}"'.format(text))
 
 
+@Span('dmm_init')
 def dmm_init(inst_list, timeout, current_range,
              trigger_source, trigger_delay,
              sample_source, sample_timer,
-             enable_logging):
+             enable_logging, data_format='ASCII'):
 	"""
 	Init DMM
 	:param inst_list: Instrument list
@@ -123,6 +157,7 @@ def dmm_init(inst_list, timeout, current_range,
 	:param sample_source: IMM or TIM
 	:param sample_timer: MIN  to ~3600 seconds (~20 µs steps)
 	:param enable_logging: 1 to enable logging
+	:param data_format: reading transfer format: ASCII or REAL (binary REAL,64 block)
 	:return:
 	"""
 	for i in inst_list:
@@ -172,65 +207,323 @@ def dmm_init(inst_list, timeout, current_range,
 		i.write('SAMP:TIM {0}'.format(sample_timer))
 		i.write('SAMP:TIM?')
 		i_samp_timer = str(i.read()).strip()
+		try:
+			sample_timer_readback[str(i)] = float(i_samp_timer)
+		except ValueError:
+			pass
 		if enable_logging == 1:
 			my_str = 'Sample timer: <{0}> for instrument <{1}>'.format(i_samp_timer, i)
 			log_dmm.info(my_str)
 		else:
 			pass
+		# Reading transfer format, REAL,64 is sent as IEEE 488.2 binary block in NORMal (big-endian) byte order
+		if str(data_format).upper() == 'REAL':
+			i.write('FORM:DATA REAL,64')
+			i.write('FORM:BORD NORM')
+		else:
+			i.write('FORM:DATA ASC')
 
 		# i.write('INIT')
 
 
-def measure_single_dmm(inst, trigger_count, sample_count, enable_logging):
+def barrier_timeout(inst_list):
+	"""
+	Max time a DMM waits at the barrier for the others, their VISA timeout
+	:param inst_list: Instrument list
+	:return: timeout (s), None for no timeout
+	"""
+	timeout = max(float(inst.timeout or 0) for inst in inst_list) / 1000
+	return timeout if 0 < timeout < math.inf else None
+
+
+def run_synchronized(func_list, inst_list):
+	"""
+	Run one measure function per DMM on its own thread, the functions wait on a shared barrier once armed.
+	A DMM that fails aborts the barrier, so the other DMMs stop waiting instead of hanging the run.
+	:param func_list: function per instrument, called as func(inst, barrier=barrier)
+	:param inst_list: Instrument list
+	:return: results in instrument order
+	"""
+	barrier = threading.Barrier(len(inst_list), timeout=barrier_timeout(inst_list))
+
+	def run(func, inst):
+		try:
+			return func(inst, barrier=barrier)
+		except BaseException:
+			barrier.abort()
+			raise
+
+	with ThreadPoolExecutor(max_workers=len(inst_list)) as executor:
+		future_list = [executor.submit(run, func, inst) for func, inst in zip(func_list, inst_list)]
+	# Every worker has finished here; report the failing DMM rather than the others' broken barrier
+	error_list = [future.exception() for future in future_list if future.exception() is not None]
+	for error in error_list:
+		if not isinstance(error, threading.BrokenBarrierError):
+			raise error
+	if error_list:
+		raise error_list[0]
+	return [future.result() for future in future_list]
+
+
+def read_readings(inst, data_format='ASCII', out=None):
+	"""
+	Send READ? and get readings of the armed trigger/sample count
+	:param inst: Instrument
+	:param data_format: reading transfer format set in dmm_init: ASCII or REAL
+	:param out: preallocated float64 array (e.g. raw spool memmap) the readings are converted into, None for a new array
+	:return: float64 readings array (mA), out if given
+	"""
+	if str(data_format).upper() == 'REAL':
+		# Get readings as binary block, the decoded buffer is converted to mA straight into out without another copy.
+		# pyvisa decodes with np.frombuffer only for container np.array, any other container unpacks Python floats
+		values = inst.query_binary_values('READ?', datatype='d', is_big_endian=True, container=np.array)
+	else:
+		inst.write('READ?')  # Get readings
+		values = np.fromstring(str(inst.read()).strip(), dtype=np.float64, sep=',')
+	if out is not None and len(values) != len(out):
+		raise ValueError('Got {0} readings, expected {1}'.format(len(values), len(out)))
+
+	# convert unit to mA, default is A
+	out = np.multiply(values, 1000, out=out)
+	if str(data_format).upper() != 'REAL':
+		np.round(out, 6, out=out)  # Rounded to 6 decimals as ASCII readings were formatted before
+	return out
+
+
+@Span('dmm_rail_measure')  # Per rail, summed over concurrent rails; phase wall time is dmm_measure
+def measure_single_dmm(inst, trigger_count, sample_count, enable_logging, barrier=None, data_format='ASCII',
+                       out=None, confidence=0.95):
 	"""
 	Get DMM readings and statistics
 	:param inst: Instrument list
 	:param trigger_count: trigger count
 	:param sample_count: sample count
 	:param enable_logging: enable logging
-	:return: raw data list, mean list, max list, min list, std list, count list
+	:param barrier: threading.Barrier shared by concurrent DMMs, READ? is sent once all DMMs are armed
+	:param data_format: reading transfer format set in dmm_init: ASCII or REAL
+	:param out: preallocated float64 array (e.g. raw spool memmap) receiving the readings, None to return a new array
+	:param confidence: confidence level of the confidence interval on the mean
+	:return: raw data array, mean, max, min, std, count, CI half width, reading count
 	"""
 	inst.write('CALC:AVER:CLE')  # Clear statistics
 	inst.write('TRIG:COUN {0}'.format(trigger_count))  # Sets the trigger count to X
 	inst.write('SAMP:COUN {0}'.format(sample_count))  # Sets X readings per trigger
 	inst.write('CALC:STAT ON')  # Turn on Stat calculations for future readings
 
-	inst.write('READ?')  # Get readings
+	if barrier is not None:
+		barrier.wait()  # Wait until all DMMs are armed, so rails are measured in the same time window
 
-	reading = str(inst.read()).strip().split(',')
-	readings = []
-	for i_reading in reading:
-		readings.append(float(format(float(i_reading) * 1000, 'f')))  # convert unit to mA, default is A
+	readings = read_readings(inst, data_format, out)
 
+	return reading_stats(readings, enable_logging, confidence)
+
+
+def reading_stats(readings, enable_logging, confidence=0.95, stats=None):
+	"""
+	Get statistics of readings, computed in one pass for logging and return
+	:param readings: readings array (mA)
+	:param enable_logging: enable logging
+	:param confidence: confidence level of the confidence interval on the mean
+	:param stats: dmm_stats.ReadingStats already holding the readings, e.g. updated block by block while they were
+	              acquired; None to compute from readings
+	:return: raw data array, mean, max, min, std, count, CI half width, reading count
+	"""
+	if stats is None:
+		stats = dmm_stats.reading_stats(readings)
+	stats = stats.summary(confidence)
 	if enable_logging == 1:
-		str_avg = 'Average/Mean: {0:.4f} mA'.format(np.mean(readings))
-		str_max = 'Max: {0:.4f} mA'.format(np.max(readings))
-		str_min = 'Min: {0:.4f} mA'.format(np.min(readings))
-		str_sdev = 'Sdev: {0:.4f} mA'.format(np.std(readings))
-		str_count = 'Total reading count: {0}'.format(np.count_nonzero(readings))
-		log_dmm.info(str_avg)
-		log_dmm.info(str_max)
-		log_dmm.info(str_min)
-		log_dmm.info(str_sdev)
-		log_dmm.info(str_count)
+		log_dmm.info(LazyFormat(stats_str, *stats))
 	else:
 		pass
+	return (readings,) + stats
+
+
+def stream_single_dmm(inst, trigger_count, sample_count, enable_logging, data_format='ASCII',
+                      chunk_size=10000, poll_interval=0.2):
+	"""
+	Start DMM acquisition with INIT and drain reading memory in chunks with DATA:REMove?
+	:param inst: Instrument
+	:param trigger_count: trigger count
+	:param sample_count: sample count
+	:param enable_logging: enable logging
+	:param data_format: reading transfer format set in dmm_init: ASCII or REAL
+	:param chunk_size: max readings removed per DATA:REMove? query
+	:param poll_interval: time (s) between DATA:POINts? polls while reading memory is empty
+	:return: generator of reading blocks as float64 array (mA)
+	"""
+	inst.write('CALC:AVER:CLE')  # Clear statistics
+	inst.write('TRIG:COUN {0}'.format(trigger_count))  # Sets the trigger count to X
+	inst.write('SAMP:COUN {0}'.format(sample_count))  # Sets X readings per trigger
+	inst.write('CALC:STAT ON')  # Turn on Stat calculations for future readings
+	inst.write('INIT')  # Start acquisition, readings are stored in reading memory
+
+	total_count = int(float(trigger_count)) * int(float(sample_count))
+	received_count = 0
+	while received_count < total_count:
+		# Readings waiting in memory, give up when nothing new arrives within the VISA timeout
+		points = my_time.wait_until(lambda: int(float(str(inst.query('DATA:POIN?')).strip())),
+		                            inst.timeout / 1000, poll_interval)
+		if points == 0:
+			raise IOError('No new reading from instrument <{0}> within {1}ms'.format(inst, inst.timeout))
+		remove_count = min(points, int(chunk_size), total_count - received_count)
+		if str(data_format).upper() == 'REAL':
+			block = inst.query_binary_values('DATA:REM? {0}'.format(remove_count), datatype='d',
+			                                 is_big_endian=True, container=np.array)
+		else:
+			block = np.array(str(inst.query('DATA:REM? {0}'.format(remove_count))).strip().split(','), dtype=float)
+		block = block * 1000  # convert unit to mA, default is A
+		received_count += len(block)
+		if enable_logging == 1:
+			log_dmm.info(LazyFormat('Stream readings: {0}/{1} for instrument <{2}>', received_count, total_count, inst))
+		yield block
 
-	return readings, np.mean(readings), np.max(readings), np.min(readings), np.std(readings), np.count_nonzero(readings)
+
+@Span('dmm_rail_measure')
+def measure_stream_dmm(inst, trigger_count, sample_count, enable_logging, barrier=None, data_format='ASCII',
+                       chunk_size=10000, out=None, confidence=0.95):
+	"""
+	Get DMM readings and statistics with chunked streaming fetch, same return as measure_single_dmm
+	:param inst: Instrument
+	:param trigger_count: trigger count
+	:param sample_count: sample count
+	:param enable_logging: enable logging
+	:param barrier: threading.Barrier shared by concurrent DMMs, INIT is sent once all DMMs are armed
+	:param data_format: reading transfer format set in dmm_init: ASCII or REAL
+	:param chunk_size: max readings removed per DATA:REMove? query
+	:param out: preallocated float64 array (e.g. raw spool memmap) receiving the readings, None to return a new array
+	:param confidence: confidence level of the confidence interval on the mean
+	:return: raw data array, mean, max, min, std, count, CI half width, reading count
+	"""
+	if barrier is not None:
+		barrier.wait()  # Wait until all DMMs are ready, so rails are measured in the same time window
+	readings = out if out is not None else np.empty(int(float(trigger_count)) * int(float(sample_count)))
+	received_count = 0
+	stats = dmm_stats.ReadingStats()
+	# Every block is copied straight to its place and added to statistics while it is in cache,
+	# only one block is held besides the output array
+	for block in stream_single_dmm(inst, trigger_count, sample_count, enable_logging, data_format, chunk_size):
+		readings[received_count:received_count + len(block)] = block
+		received_count += len(block)
+		stats.update(block)
+
+	return reading_stats(readings, enable_logging, confidence, stats)
+
+
+@Span('dmm_rail_measure')
+def measure_stats_dmm(inst, trigger_count, sample_count, enable_logging, barrier=None, confidence=0.95):
+	"""
+	Get DMM on-instrument statistics only, raw readings are not transferred
+	:param inst: Instrument
+	:param trigger_count: trigger count
+	:param sample_count: sample count
+	:param enable_logging: enable logging
+	:param barrier: threading.Barrier shared by concurrent DMMs, INIT is sent once all DMMs are armed
+	:param confidence: confidence level of the confidence interval on the mean
+	:return: empty raw data array, mean, max, min, std, count, CI half width, reading count
+	         (same layout as measure_single_dmm)
+	"""
+	inst.write('CALC:AVER:CLE')  # Clear statistics
+	inst.write('TRIG:COUN {0}'.format(trigger_count))  # Sets the trigger count to X
+	inst.write('SAMP:COUN {0}'.format(sample_count))  # Sets X readings per trigger
+	inst.write('CALC:STAT ON')  # Turn on Stat calculations for future readings
+
+	if barrier is not None:
+		barrier.wait()  # Wait until all DMMs are armed, so rails are measured in the same time window
+
+	inst.write('INIT')  # Start acquisition, statistics are calculated on instrument
+	inst.query('*OPC?')  # Block until all readings are done
+
+	# CALC:AVER:ALL? returns average, standard deviation, minimum, maximum (A)
+	stats = np.array(str(inst.query('CALC:AVER:ALL?')).strip().split(','), dtype=float) * 1000  # convert unit to mA
+	count = int(float(str(inst.query('CALC:AVER:COUN?')).strip()))
+	stat_avg, stat_sdev, stat_min, stat_max = stats[0], stats[1], stats[2], stats[3]
+	stat_ci = dmm_stats.ci_half_width(stat_sdev, count, confidence)
+
+	if enable_logging == 1:
+		log_dmm.info(LazyFormat(stats_str, stat_avg, stat_max, stat_min, stat_sdev, count, stat_ci, count))
+	else:
+		pass
+
+	return np.array([], dtype=float), stat_avg, stat_max, stat_min, stat_sdev, count, stat_ci, count
+
+
+@Span('dmm_measure')
+def measure_adaptive_dmm(inst_list, sample_count, max_block_count, tolerance, enable_logging, concurrent=1,
+                         data_format='ASCII', confidence=0.95, min_block_count=2, out_list=None):
+	"""
+	Get DMM readings block by block, one trigger of sample count readings per READ?, until the confidence interval on
+	the mean of every rail is within tolerance or the block budget is used up. Rails are read in the same blocks,
+	so concurrent DMMs keep sharing the measurement window.
+	:param inst_list: Instrument list
+	:param sample_count: readings per block
+	:param max_block_count: max block count
+	:param tolerance: CI half width relative to the mean, e.g. 0.01
+	:param enable_logging: enable logging
+	:param concurrent: 1 to arm and read all DMMs at the same time; others one after another
+	:param data_format: reading transfer format set in dmm_init: ASCII or REAL
+	:param confidence: confidence level of the confidence interval on the mean
+	:param min_block_count: min block count before convergence is checked
+	:param out_list: preallocated float64 array per rail of max block count x sample count readings (e.g. raw spool
+	                 memmap), the acquired readings are its leading part; None to return new arrays
+	:return: reading list, one per instrument: raw data array, mean, max, min, std, count, CI half width, reading count
+	"""
+	sample_count = int(float(sample_count))
+	max_block_count = max(1, int(max_block_count))
+	for inst in inst_list:
+		inst.write('CALC:AVER:CLE')  # Clear statistics
+		inst.write('TRIG:COUN 1')  # One trigger per block
+		inst.write('SAMP:COUN {0}'.format(sample_count))  # Sets X readings per block
+		inst.write('CALC:STAT ON')  # Turn on Stat calculations for future readings
+	block_list_list = [[] for _ in inst_list]  # Kept only without out_list, otherwise blocks go straight into it
+	stats_list = [dmm_stats.ReadingStats() for _ in inst_list]
+	concurrent = int(concurrent) == 1 and len(inst_list) > 1
+
+	def read_block(inst, barrier=None, out=None):
+		if barrier is not None:
+			barrier.wait()  # Wait until all DMMs are ready, so rails are measured in the same time window
+		return read_readings(inst, data_format, out)
+
+	block_count = 0
+	while block_count < max_block_count:
+		if out_list is not None:
+			out_block_list = [i[block_count * sample_count:(block_count + 1) * sample_count] for i in out_list]
+		else:
+			out_block_list = [None] * len(inst_list)
+		if concurrent:
+			block_list = run_synchronized([functools.partial(read_block, out=i) for i in out_block_list], inst_list)
+		else:
+			block_list = [read_block(inst, out=out) for inst, out in zip(inst_list, out_block_list)]
+		block_count += 1
+		for rail, block in enumerate(block_list):
+			if out_list is None:
+				block_list_list[rail].append(block)
+			stats_list[rail].update(block)
+		if block_count >= min_block_count and all(i.is_converged(tolerance, confidence) for i in stats_list):
+			break
+	if enable_logging == 1:
+		log_dmm.info(LazyFormat('Adaptive acquisition: {0}/{1} blocks of {2} readings', block_count,
+		                        max_block_count, sample_count))
+
+	reading_list = []
+	for rail, block_list in enumerate(block_list_list):
+		if out_list is not None:
+			readings = out_list[rail][:block_count * sample_count]
+		else:
+			readings = np.concatenate(block_list)
+		reading_list.append(reading_stats(readings, enable_logging, confidence, stats_list[rail]))
+	return reading_list
 
 
 def dmm_reading_format(reading):
 	"""
 	Format DMM return data
-	:param reading: DMM raw data
+	:param reading: measure_*_dmm return, or dmm_stats.ReadingStats of readings that were not kept
 	:return: formatted DMM data
 	"""
-	return [float(format(reading[1], '.3f')),
-	        float(format(reading[2], '.3f')),
-	        float(format(reading[3], '.3f')),
-	        float(format(reading[4], '.3f')),
-	        float(format(reading[5], '.0f')),
-	        ','.join(map(str, reading[0])), ]
+	if isinstance(reading, dmm_stats.ReadingStats):
+		reading = (np.array([], dtype=float),) + reading.summary()
+	# Same formatting as the report columns of results_store
+	return results_store.format_summary(reading[1:6]) + [results_store.format_raw(reading[0])]
 
 
 def join_dataframe(case_name, reading):
@@ -241,7 +534,7 @@ def join_dataframe(case_name, reading):
 	:return: DataFrame
 	"""
 	data_framed = DataFrame(reading,
-	                        index=['1.Average', '2.Max', '3.Min', '4.Sdev', '5.Count', '6.Raw'],
+	                        index=results_store.summary_name_list + [results_store.raw_name],
 	                        columns=[str(case_name)])
 	return data_framed
 
@@ -250,7 +543,9 @@ def dmm_flow_wrapper(visa_address,
                      timeout, current_range, trigger_source, trigger_delay,
                      sample_source, sample_timer,
                      trigger_count, sample_count,
-                     case_name, enable_logging):
+                     case_name, enable_logging, concurrent=1, data_format='ASCII',
+                     acquisition_mode='READ', stream_chunk=10000, spool=None, confidence=0.95,
+                     adaptive_tolerance=0.01, adaptive_min_blocks=2, adaptive_max_factor=4):
 	"""
 	Create DataFrame list based on all active DMM readings
 	:param visa_address: Instrument VISA address
@@ -264,29 +559,163 @@ def dmm_flow_wrapper(visa_address,
 	:param sample_count: Sample count
 	:param case_name: test case name
 	:param enable_logging: enable logging
-	:return: DataFrame list
+	:param concurrent: 1 to arm and read all DMMs at the same time; others one after another
+	:param data_format: reading transfer format: ASCII or REAL
+	:param acquisition_mode: READ: single READ? per DMM; STREAM: INIT and chunked DATA:REMove? fetch;
+	                         STATS: on-instrument statistics only, no raw readings;
+	                         ADAPTIVE: READ? one trigger per block until the mean has converged
+	:param stream_chunk: max readings per DATA:REMove? in STREAM mode
+	:param spool: raw_spool.RawSpool receiving raw readings in place, rail index is the VISA address order
+	:param confidence: confidence level of the confidence interval on the mean
+	:param adaptive_tolerance: CI half width relative to the mean ending ADAPTIVE acquisition
+	:param adaptive_min_blocks: min block count in ADAPTIVE mode
+	:param adaptive_max_factor: max block count in ADAPTIVE mode as multiple of the trigger count
+	:return: reading list, one measure_*_dmm return per instrument: raw data array, mean, max, min, std, count,
+	         CI half width, reading count
 	"""
-	my_inst_list = open_connection_dmm(visa_address)
+	settings = dict(timeout=timeout, current_range=current_range, trigger_source=trigger_source,
+	                trigger_delay=trigger_delay, sample_source=sample_source, sample_timer=sample_timer,
+	                data_format=data_format)
+	pool = dmm_pool.get_pool()
+	if pool is not None:
+		# Sessions are opened and initialized once per run, only health checked here
+		my_inst_list = pool.get_inst_list(visa_address)
+	else:
+		my_inst_list = open_connection_dmm(visa_address)
 	# query_error(my_inst_list, enable_logging)
 	# check_opc(my_inst_list, enable_logging)
 	# get_idn(my_inst_list, enable_logging)
 	text_display(my_inst_list, 'Running...')
-	dmm_init(my_inst_list, timeout, current_range, trigger_source, trigger_delay,
-	         sample_source, sample_timer, enable_logging)
-	data_frame_list = []
-	for i in my_inst_list:
-		reading = measure_single_dmm(i, trigger_count, sample_count, enable_logging)
-		reading_formatted = dmm_reading_format(reading)
-		data_frame = join_dataframe(case_name, reading_formatted)
-		data_frame_list.append(data_frame)
-
-	# log_dmm.info(data_frame_list)
-
-	# Close connection
+	if pool is None:
+		dmm_init(my_inst_list, enable_logging=enable_logging, **settings)
+	else:
+		changed = {key: value for key, value in settings.items() if str(value) != str(pool_settings.get(key))}
+		if changed:
+			# Pooled sessions were initialized with other settings, re-apply instead of measuring with them
+			log_dmm.warning('[{0}] DMM settings differ from pooled sessions, re-init with {1}'.format(case_name,
+			                                                                                           changed))
+			dmm_init(my_inst_list, enable_logging=enable_logging, **settings)
+			pool_settings.update(settings)
+	if str(acquisition_mode).upper() == 'ADAPTIVE':
+		max_block_count = max(1, int(round(float(trigger_count) * float(adaptive_max_factor))))
+		if spool is not None:
+			# Budget is reserved in the spool, the acquired readings fill its leading part
+			out_list = [spool.allocate(i, max_block_count * int(float(sample_count)))
+			            for i in range(len(my_inst_list))]
+		else:
+			out_list = None
+		reading_list = measure_adaptive_dmm(my_inst_list, sample_count, max_block_count, adaptive_tolerance,
+		                                    enable_logging, concurrent, data_format, confidence,
+		                                    adaptive_min_blocks, out_list)
+	else:
+		reading_list = measure_dmm_list(my_inst_list, trigger_count, sample_count, enable_logging, concurrent,
+		                                data_format, acquisition_mode, stream_chunk, spool, confidence)
+	if enable_logging == 1:
+		log_dmm.info('Measured [{0}] on {1} instrument(s)'.format(case_name, len(reading_list)))
+
+	# Close connection, pooled sessions stay open until the end of the run
 	text_display(my_inst_list, 'Waiting...')
-	close_connection(my_inst_list)
+	if pool is None:
+		close_connection(my_inst_list)
 
-	return data_frame_list
+	return reading_list
+
+
+@Span('dmm_measure')  # Wall time of all rails, timed once however many DMMs are read concurrently
+def measure_dmm_list(inst_list, trigger_count, sample_count, enable_logging, concurrent=1, data_format='ASCII',
+                     acquisition_mode='READ', stream_chunk=10000, spool=None, confidence=0.95):
+	"""
+	Measure every DMM once with fixed trigger/sample count
+	:param inst_list: Instrument list
+	:param trigger_count: Trigger count
+	:param sample_count: Sample count
+	:param enable_logging: enable logging
+	:param concurrent: 1 to arm and read all DMMs at the same time; others one after another
+	:param data_format: reading transfer format: ASCII or REAL
+	:param acquisition_mode: READ, STREAM or STATS, see dmm_flow_wrapper
+	:param stream_chunk: max readings per DATA:REMove? in STREAM mode
+	:param spool: raw_spool.RawSpool receiving raw readings in place, rail index is the instrument order
+	:param confidence: confidence level of the confidence interval on the mean
+	:return: reading list, one measure_*_dmm return per instrument
+	"""
+	if str(acquisition_mode).upper() == 'STATS':
+		measure_func = functools.partial(measure_stats_dmm,
+		                                 trigger_count=trigger_count,
+		                                 sample_count=sample_count,
+		                                 enable_logging=enable_logging,
+		                                 confidence=confidence)
+	elif str(acquisition_mode).upper() == 'STREAM':
+		measure_func = functools.partial(measure_stream_dmm,
+		                                 trigger_count=trigger_count,
+		                                 sample_count=sample_count,
+		                                 enable_logging=enable_logging,
+		                                 data_format=data_format,
+		                                 chunk_size=stream_chunk,
+		                                 confidence=confidence)
+	else:
+		measure_func = functools.partial(measure_single_dmm,
+		                                 trigger_count=trigger_count,
+		                                 sample_count=sample_count,
+		                                 enable_logging=enable_logging,
+		                                 data_format=data_format,
+		                                 confidence=confidence)
+	if spool is not None and str(acquisition_mode).upper() != 'STATS':
+		# Readings are written straight into the memory-mapped spool, one region per rail
+		total_count = int(float(trigger_count)) * int(float(sample_count))
+		measure_func_list = [functools.partial(measure_func, out=spool.allocate(i, total_count))
+		                     for i in range(len(inst_list))]
+	else:
+		measure_func_list = [measure_func] * len(inst_list)
+	if int(concurrent) == 1 and len(inst_list) > 1:
+		# Blocking READ? calls overlap, results keep instrument order
+		return run_synchronized(measure_func_list, inst_list)
+	return [func(inst) for func, inst in zip(measure_func_list, inst_list)]
+
+
+def open_dmm_session(enable_logging):
+	"""
+	Open run-wide DMM sessions for all active instruments, init them once with config.ini settings
+	:param enable_logging: enable logging
+	:return: DMM pool
+	"""
+	pool_settings.clear()
+	pool_settings.update(timeout=config_basic.dmm_timeout(),
+	                     current_range=config_basic.dmm_current_range(),
+	                     trigger_source=config_basic.dmm_trig_src(),
+	                     trigger_delay=config_basic.dmm_trig_delay(),
+	                     sample_source=config_basic.dmm_sample_src(),
+	                     sample_timer=config_basic.dmm_sample_timer(),
+	                     data_format=config_basic.dmm_data_format())
+
+	def init_func(inst_list):
+		dmm_init(inst_list, enable_logging=enable_logging, **pool_settings)
+	# Instrument backend, SIM runs against in-process simulated DMMs
+	if config_basic.dmm_backend() == 'SIM':
+		rm = dmm_sim.SimResourceManager(time_scale=config_basic.dmm_sim_time_scale())
+	else:
+		rm = None
+	return dmm_pool.open_pool(config_basic.visa_address_active_list(), init_func, enable_logging, rm)
+
+
+def set_sim_waveform(waveform):
+	"""
+	Set current waveform the simulated DUT draws from the pooled DMMs, no-op unless DMM_Backend = SIM
+	:param waveform: dmm_sim.WAVEFORM_PRESETS name, None for deep sleep
+	:return: None
+	"""
+	pool = dmm_pool.get_pool()
+	if config_basic.dmm_backend() != 'SIM' or pool is None:
+		return
+	for inst in pool.sessions.values():
+		inst.set_waveform(waveform or 'deep_sleep')
+
+
+def close_dmm_session():
+	"""
+	Close run-wide DMM sessions
+	:return: None
+	"""
+	dmm_pool.close_pool()
 
 
 def sample_flow():
@@ -320,15 +749,83 @@ def sample_flow():
 # sample_flow()
 
 
-def test_case_init_wrapper(case_name, case_count_type, case_func, *args, **kwargs):
+def dmm_flow_config_wrapper(case_name, case_count_type):
+	"""
+	Run dmm_flow_wrapper for all active DMMs with config.ini settings
+	:param case_name: Test case name
+	:param case_count_type: trigger/sample count type 0: flat; 1: pulse; 2: active
+	:return: reading list, one per active DMM
+	"""
+	# Stats only cases skip raw reading transfer
+	if config_basic.dmm_stats_only()[case_count_type] == 1:
+		acquisition_mode = 'STATS'
+	else:
+		acquisition_mode = config_basic.dmm_acquisition_mode()
+	return dmm_flow_wrapper(config_basic.visa_address_active_list(),
+	                        config_basic.dmm_timeout(),
+	                        config_basic.dmm_current_range(),
+	                        config_basic.dmm_trig_src(),
+	                        config_basic.dmm_trig_delay(),
+	                        config_basic.dmm_sample_src(),
+	                        config_basic.dmm_sample_timer(),
+	                        config_basic.dmm_trigger_count()[case_count_type],
+	                        config_basic.dmm_sample_count()[case_count_type], case_name, 0,
+	                        config_basic.dmm_concurrent(),
+	                        config_basic.dmm_data_format(),
+	                        acquisition_mode,
+	                        config_basic.dmm_stream_chunk(),
+	                        raw_spool.get_spool(),
+	                        config_basic.dmm_confidence(),
+	                        config_basic.dmm_adaptive_tolerance(),
+	                        config_basic.dmm_adaptive_min_blocks(),
+	                        config_basic.dmm_adaptive_max_factor())
+
+
+def sample_interval(sample_timer):
+	"""
+	Time between readings
+	:param sample_timer: sample timer setting, seconds or MIN/MAX/DEF
+	:return: sample interval (s), from the dmm_init read back for MIN/MAX/DEF; NaN if not known
+	"""
+	try:
+		return float(sample_timer)
+	except ValueError:
+		return next(iter(sample_timer_readback.values()), float('nan'))
+
+
+def dmm_case_attrs(case_count_type, event_interval=None):
+	"""
+	Raw readings metadata of one case with config.ini settings
+	:param case_count_type: trigger/sample count type 0: flat; 1: pulse; 2: active
+	:param event_interval: expected current event interval of the case (s), None if not periodic
+	:return: metadata dict, sample interval and event interval are used by the waveform analysis
+	"""
+	attrs = {'current_range': config_basic.dmm_current_range(),
+	         'trigger_source': config_basic.dmm_trig_src(),
+	         'trigger_delay': config_basic.dmm_trig_delay(),
+	         'sample_source': config_basic.dmm_sample_src(),
+	         'sample_timer': config_basic.dmm_sample_timer(),
+	         'trigger_count': config_basic.dmm_trigger_count()[case_count_type],
+	         'sample_count': config_basic.dmm_sample_count()[case_count_type],
+	         'sample_interval': sample_interval(config_basic.dmm_sample_timer())}
+	if event_interval is not None:
+		attrs['event_interval'] = float(event_interval)
+	return attrs
+
+
+def test_case_init_wrapper(case_name, results, case_count_type, case_func, *args, event_interval=None,
+                           sim_waveform=None, **kwargs):
 	"""
 	Set DUT to deep sleep mode and measure. Deep sleep mode is always measured as 1st data
 	:param case_name: Test case name
+	:param results: ResultsStore or CasePipeline
 	:param case_count_type: trigger/sample count type 0: flat; 1: pulse; 2: active
 	:param case_func: Test case function
 	:param args: Test case function args
+	:param event_interval: expected current event interval of the case (s), None if not periodic
+	:param sim_waveform: current waveform of simulated DMMs in the case, dmm_sim.WAVEFORM_PRESETS name
 	:param kwargs: Test case function kwargs
-	:return: Measurement results DataFrame list
+	:return: results
 	"""
 	case_count_type = int(case_count_type)
 	start_str = '''
@@ -343,34 +840,31 @@ def test_case_init_wrapper(case_name, case_count_type, case_func, *args, **kwarg
 	****************************************************************
 	================================================================
 	'''
-	final_start_str = (start_str.format(case_name))
-	final_end_str = (end_str.format(case_name))
-	log_dmm.info(final_start_str)
-	case_func(*args, **kwargs)
-	data_frame_list = dmm_flow_wrapper(config_basic.visa_address_active_list(),
-	                                   config_basic.dmm_timeout(),
-	                                   config_basic.dmm_current_range(),
-	                                   config_basic.dmm_trig_src(),
-	                                   config_basic.dmm_trig_delay(),
-	                                   config_basic.dmm_sample_src(),
-	                                   config_basic.dmm_sample_timer(),
-	                                   config_basic.dmm_trigger_count()[case_count_type],
-	                                   config_basic.dmm_sample_count()[case_count_type], case_name, 0)
-	log_dmm.info(final_end_str)
-	return data_frame_list
-
-
-def test_case_wrapper(case_name, joined_df_list, enable, case_count_type, case_func, *args, **kwargs):
+	log_dmm.info(LazyFormat(start_str, case_name))
+	with my_timer.case(case_name):
+		with Span('dut_setup'):
+			case_func(*args, **kwargs)
+		set_sim_waveform(sim_waveform)
+		results.append(case_name, dmm_flow_config_wrapper(case_name, case_count_type),
+		               dmm_case_attrs(case_count_type, event_interval))
+	log_dmm.info(LazyFormat(end_str, case_name))
+	return results
+
+
+def test_case_wrapper(case_name, results, enable, case_count_type, case_func, *args, event_interval=None,
+                      sim_waveform=None, **kwargs):
 	"""
 	Test case wrapper for details test cases components
 	:param case_name: Test case name
-	:param joined_df_list: Joined DataFrame list
+	:param results: ResultsStore or CasePipeline
 	:param enable: enable flag
 	:param case_count_type: trigger/sample count type 0: flat; 1: pulse; 2: active
 	:param case_func: Test case function
 	:param args: Test case function args
+	:param event_interval: expected current event interval of the case (s), None if not periodic
+	:param sim_waveform: current waveform of simulated DMMs in the case, dmm_sim.WAVEFORM_PRESETS name
 	:param kwargs: Test case function kwargs
-	:return: Joined measurement results DataFrame list
+	:return: results
 	"""
 	enable = int(str(enable))
 	if enable == 1:
@@ -387,30 +881,21 @@ def test_case_wrapper(case_name, joined_df_list, enable, case_count_type, case_f
 		****************************************************************
 		================================================================
 		'''
-		final_start_str = start_str.format(case_name)
-		final_end_str = end_str.format(case_name)
-		log_dmm.info(final_start_str)
+		log_dmm.info(LazyFormat(start_str, case_name))
 		print('Measuring {0}......'.format(case_name))
-		case_func(*args, **kwargs)
-		data_frame_list = dmm_flow_wrapper(config_basic.visa_address_active_list(),
-		                                   config_basic.dmm_timeout(),
-		                                   config_basic.dmm_current_range(),
-		                                   config_basic.dmm_trig_src(),
-		                                   config_basic.dmm_trig_delay(),
-		                                   config_basic.dmm_sample_src(),
-		                                   config_basic.dmm_sample_timer(),
-		                                   config_basic.dmm_trigger_count()[case_count_type],
-		                                   config_basic.dmm_sample_count()[case_count_type], case_name, 0)
-		for i in range(len(config_basic.visa_address_active_list())):
-			joined_df_list[i] = joined_df_list[i].join(data_frame_list[i])
-		log_dmm.info(final_end_str)
-		return joined_df_list
+		with my_timer.case(case_name):
+			with Span('dut_setup'):
+				case_func(*args, **kwargs)
+			set_sim_waveform(sim_waveform)
+			results.append(case_name, dmm_flow_config_wrapper(case_name, case_count_type),
+			               dmm_case_attrs(case_count_type, event_interval))
+		log_dmm.info(LazyFormat(end_str, case_name))
+		return results
 	else:
 		skip_str = '''
 		****************************************************************
 		>>>> Skip [{0}]
 		****************************************************************
 		'''
-		final_skip_str = skip_str.format(case_name)
-		log_dmm.info(final_skip_str)
-		return joined_df_list
\ No newline at end of file
+		log_dmm.info(LazyFormat(skip_str, case_name))
+		return results
\ No newline at end of file
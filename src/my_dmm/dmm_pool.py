@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+import visa
+from collections import OrderedDict  # Keep sessions in VISA address order
+from src.my_misc.my_logging import create_logger
+# Logger for DMM session pool
+log_pool = create_logger()
+
+# Run-wide DMM session pool, opened by main_flow and closed at the end of the run
+_active_pool = None
+
+
+def open_visa_resource(rm, visa_address):
+	"""
+	Open instrument resource, raw SCPI socket resources need explicit newline termination
+	:param rm: resource manager
+	:param visa_address: instrument VISA address
+	:return: instrument
+	"""
+	inst = rm.open_resource(visa_address)
+	if str(visa_address).upper().endswith('::SOCKET'):
+		inst.read_termination = '\n'
+		inst.write_termination = '\n'
+	return inst
+
+
+class DMMPool(object):
+	def __init__(self, init_func=None, reconnect_retry=2, enable_logging=0, rm=None):
+		"""
+		Long-lived DMM sessions keyed by VISA address
+		:param init_func: function called with an instrument list after every (re)connect, e.g. dmm_init
+		:param reconnect_retry: reconnect attempts before giving up on an instrument
+		:param enable_logging: =1 logging message; =others not logging message
+		:param rm: resource manager backend, default visa.ResourceManager()
+		"""
+		self.init_func = init_func
+		self.reconnect_retry = int(reconnect_retry)
+		self.enable_logging = enable_logging
+		self.rm = rm if rm is not None else visa.ResourceManager()
+		self.sessions = OrderedDict()
+
+	def _connect(self, visa_address):
+		"""
+		Open and init one instrument session
+		:param visa_address: instrument VISA address
+		:return: instrument
+		"""
+		inst = open_visa_resource(self.rm, visa_address)
+		if self.init_func is not None:
+			self.init_func([inst])
+		self.sessions[visa_address] = inst
+		if self.enable_logging == 1:
+			log_pool.info('Open DMM session <{0}>'.format(visa_address))
+		return inst
+
+	def _disconnect(self, visa_address):
+		"""
+		Close one instrument session, ignore errors of an already dead link
+		:param visa_address: instrument VISA address
+		:return: None
+		"""
+		inst = self.sessions.pop(visa_address, None)
+		if inst is not None:
+			try:
+				inst.close()
+			except (visa.Error, IOError):
+				pass
+
+	def open(self, visa_address_list):
+		"""
+		Open sessions for all given instruments
+		:param visa_address_list: instrument VISA address list
+		:return: instrument list
+		"""
+		return [self._connect(i) for i in visa_address_list]
+
+	def is_alive(self, visa_address):
+		"""
+		Health check of an open session with *OPC? round trip
+		:param visa_address: instrument VISA address
+		:return: True if instrument answers
+		"""
+		inst = self.sessions.get(visa_address)
+		if inst is None:
+			return False
+		try:
+			return str(inst.query('*OPC?')).strip() == '1'
+		except (visa.Error, IOError):
+			return False
+
+	def get(self, visa_address):
+		"""
+		Get a healthy session for an instrument, reconnect when the health check fails
+		:param visa_address: instrument VISA address
+		:return: instrument
+		"""
+		if self.is_alive(visa_address):
+			return self.sessions[visa_address]
+		for i_retry in range(self.reconnect_retry):
+			log_pool.info('DMM session <{0}> lost, reconnect ({1}/{2})'.format(visa_address,
+			                                                                  i_retry + 1,
+			                                                                  self.reconnect_retry))
+			self._disconnect(visa_address)
+			try:
+				return self._connect(visa_address)
+			except (visa.Error, IOError) as err:
+				log_pool.info('Reconnect DMM <{0}> failed: {1}'.format(visa_address, err))
+		raise IOError('DMM <{0}> not reachable after {1} retries'.format(visa_address, self.reconnect_retry))
+
+	def get_inst_list(self, visa_address_list):
+		"""
+		Get healthy sessions for an instrument address list
+		:param visa_address_list: instrument VISA address list
+		:return: instrument list, same order as address list
+		"""
+		return [self.get(i) for i in visa_address_list]
+
+	def close(self):
+		"""
+		Close all sessions and the resource manager
+		:return: None
+		"""
+		for i in list(self.sessions.keys()):
+			self._disconnect(i)
+		self.rm.close()
+
+
+def open_pool(visa_address_list, init_func=None, enable_logging=0, rm=None):
+	"""
+	Open run-wide DMM session pool
+	:param visa_address_list: instrument VISA address list
+	:param init_func: function called with an instrument list after every (re)connect
+	:param enable_logging: =1 logging message; =others not logging message
+	:param rm: resource manager backend, default visa.ResourceManager()
+	:return: DMM pool
+	"""
+	global _active_pool
+	close_pool()
+	_active_pool = DMMPool(init_func, enable_logging=enable_logging, rm=rm)
+	_active_pool.open(visa_address_list)
+	return _active_pool
+
+
+def get_pool():
+	"""
+	Get run-wide DMM session pool
+	:return: DMM pool, None when no pool is opened
+	"""
+	return _active_pool
+
+
+def close_pool():
+	"""
+	Close run-wide DMM session pool
+	:return: None
+	"""
+	global _active_pool
+	if _active_pool is not None:
+		_active_pool.close()
+		_active_pool = None
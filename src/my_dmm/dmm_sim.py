@@ -0,0 +1,594 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+import sys
+import time
+import argparse
+import threading
+import socketserver
+import numpy as np
+from src.my_misc.my_logging import create_logger
+# Logger for simulated DMM
+log_sim = create_logger()
+
+# Min sample timer (s), config.ini notes 100 samples take about 3.5 sec with SAMP:TIM MIN
+SAMPLE_TIMER_MIN = 0.035
+# Reading memory size, 34410A: 50,000; 34411A: 1,000,000
+READING_MEMORY = {'34410A': 50000, '34411A': 1000000}
+
+# Current waveform presets (A)
+# floor: deep sleep floor; pulse_*: periodic sniff/adv/scan events; burst_*: periodic SCO slots
+WAVEFORM_PRESETS = {
+	'deep_sleep': dict(floor=50e-6),
+	'idle': dict(floor=1.2e-3),
+	'page_scan': dict(floor=60e-6, pulse_period=1.28, pulse_width=0.0113, pulse_amplitude=18e-3),
+	'inquiry_scan': dict(floor=60e-6, pulse_period=1.28, pulse_width=0.0113, pulse_amplitude=20e-3),
+	'page_inquiry_scan': dict(floor=60e-6, pulse_period=1.28, pulse_width=0.0226, pulse_amplitude=19e-3),
+	'sniff_1.28s': dict(floor=60e-6, pulse_period=1.28, pulse_width=0.0025, pulse_amplitude=20e-3),
+	'sniff_0.5s': dict(floor=60e-6, pulse_period=0.5, pulse_width=0.0025, pulse_amplitude=20e-3),
+	'sco': dict(floor=60e-6, pulse_period=1.28, pulse_width=0.0025, pulse_amplitude=20e-3,
+	            burst_period=0.00375, burst_width=0.000625, burst_amplitude=25e-3),
+	'ble_adv_1.28s': dict(floor=55e-6, pulse_period=1.28, pulse_width=0.004, pulse_amplitude=12e-3),
+	'ble_scan_1.28s': dict(floor=55e-6, pulse_period=1.28, pulse_width=0.01125, pulse_amplitude=10e-3),
+	'ble_scan_1s': dict(floor=55e-6, pulse_period=1.0, pulse_width=0.01125, pulse_amplitude=10e-3),
+	'ble_scan_10ms': dict(floor=55e-6, pulse_period=0.01, pulse_width=0.01, pulse_amplitude=10e-3),
+	'ble_connection_1.28s': dict(floor=55e-6, pulse_period=1.28, pulse_width=0.003, pulse_amplitude=12e-3),
+}
+
+
+class SimWaveform(object):
+	def __init__(self, floor=50e-6, pulse_period=0, pulse_width=0, pulse_amplitude=0,
+	             burst_period=0, burst_width=0, burst_amplitude=0, noise=1e-6, seed=0):
+		"""
+		Simulated DUT supply current waveform
+		:param floor: floor current (A)
+		:param pulse_period: pulse (sniff/adv/scan event) period (s), 0 to disable
+		:param pulse_width: pulse width (s)
+		:param pulse_amplitude: pulse current on top of floor (A)
+		:param burst_period: burst (SCO slot) period (s), 0 to disable
+		:param burst_width: burst width (s)
+		:param burst_amplitude: burst current on top of floor (A)
+		:param noise: gaussian noise sigma (A)
+		:param seed: random seed
+		"""
+		self.floor = float(floor)
+		self.pulse_period = float(pulse_period)
+		self.pulse_width = float(pulse_width)
+		self.pulse_amplitude = float(pulse_amplitude)
+		self.burst_period = float(burst_period)
+		self.burst_width = float(burst_width)
+		self.burst_amplitude = float(burst_amplitude)
+		self.noise = float(noise)
+		self.random = np.random.RandomState(seed)
+
+	def sample(self, t, aperture=0.0):
+		"""
+		Sample waveform at given times, each reading is averaged over its integration aperture
+		:param t: sample time array (s)
+		:param aperture: integration time per reading (s), 0 for point sample
+		:return: current array (A)
+		"""
+		t = np.asarray(t, dtype=float)
+		current = np.full(t.shape, self.floor)
+		current += self._duty(t, aperture, self.pulse_period, self.pulse_width) * self.pulse_amplitude
+		current += self._duty(t, aperture, self.burst_period, self.burst_width) * self.burst_amplitude
+		if self.noise > 0:
+			current += self.random.normal(0, self.noise, t.shape)
+		return current
+
+	@staticmethod
+	def _duty(t, aperture, period, width):
+		"""
+		Fraction of [t, t + aperture) a periodic pulse is high
+		:param t: sample time array (s)
+		:param aperture: integration time (s)
+		:param period: pulse period (s)
+		:param width: pulse width (s)
+		:return: duty array, 0 to 1
+		"""
+		if period <= 0 or width <= 0:
+			return np.zeros(t.shape)
+		if aperture <= 0:
+			return (np.mod(t, period) < width).astype(float)
+
+		def high_time(x):
+			# Pulse high time accumulated from 0 to x, remainder taken from the same period count as the floor
+			count = np.floor(x / period)
+			return count * width + np.clip(x - count * period, 0, width)
+		return (high_time(t + aperture) - high_time(t)) / aperture
+
+
+class SimDMM(object):
+	def __init__(self, model='34411A', serial='SIM0001', waveform=None, time_scale=1.0):
+		"""
+		Simulated 34410A/34411A speaking the SCPI subset used by dmm_basic
+		:param model: 34410A or 34411A
+		:param serial: serial number reported by *IDN?
+		:param waveform: SimWaveform, default deep sleep floor
+		:param time_scale: 1.0 real sample timer latency; 0.1 ten times faster; 0 no latency
+		"""
+		self.model = model
+		self.serial = serial
+		self.waveform = waveform if waveform is not None else SimWaveform(**WAVEFORM_PRESETS['deep_sleep'])
+		self.time_scale = float(time_scale)
+		self.timeout = 2000  # pyvisa resource compatible attribute (ms)
+		self.lock = threading.RLock()
+		self.response = []
+		self.error_queue = []
+		self.text = ''
+		self.reset()
+
+	def reset(self):
+		"""
+		*RST state
+		:return: None
+		"""
+		self.current_range = 3.0
+		self.trigger_source = 'IMM'
+		self.trigger_delay = 0.0
+		self.trigger_count = 1
+		self.sample_source = 'IMM'
+		self.sample_timer = SAMPLE_TIMER_MIN
+		self.sample_count = 1
+		self.data_format = 'ASC'
+		self.byte_order = 'NORM'
+		self.stat_enable = False
+		self.readings = np.array([], dtype=float)  # readings of current acquisition
+		self.removed = 0  # readings already removed from memory
+		self.init_time = None
+		self.stat_readings = np.array([], dtype=float)  # readings of earlier acquisitions since CALC:AVER:CLE
+		self.stat_start = None  # first reading of current acquisition in statistics, None if not counted
+		self.waveform_time = 0.0  # waveform time (s) of next acquisition, keeps pulse phase across acquisitions
+
+	def set_waveform(self, waveform):
+		"""
+		Change simulated DUT current waveform, e.g. from a preset name
+		:param waveform: SimWaveform or preset name in WAVEFORM_PRESETS
+		:return: None
+		"""
+		if isinstance(waveform, str):
+			waveform = SimWaveform(**WAVEFORM_PRESETS[waveform])
+		with self.lock:
+			self.waveform = waveform
+
+	# pyvisa resource compatible API
+
+	def write(self, command):
+		"""
+		Write SCPI command, responses of queries are queued for read()
+		:param command: SCPI command string, ';' separated commands allowed
+		:return: None
+		"""
+		with self.lock:
+			for i_command in str(command).strip().split(';'):
+				if i_command.strip():
+					response = self.handle(i_command.strip())
+					if response is not None:
+						self.response.append(response)
+
+	def read_raw(self):
+		"""
+		Read next response as bytes
+		:return: response bytes
+		"""
+		with self.lock:
+			if not self.response:
+				self.error_queue.append('-420,"Query UNTERMINATED"')
+				return b'\n'
+			return self.response.pop(0) + b'\n'
+
+	def read(self):
+		"""
+		Read next response as string
+		:return: response string
+		"""
+		return self.read_raw().decode('latin-1').rstrip('\n')
+
+	def query(self, command):
+		"""
+		Write query and read response
+		:param command: SCPI query
+		:return: response string
+		"""
+		self.write(command)
+		return self.read()
+
+	def query_binary_values(self, command, datatype='f', is_big_endian=False, container=list):
+		"""
+		Write query and decode IEEE 488.2 definite length block response
+		:param command: SCPI query
+		:param datatype: struct data type
+		:param is_big_endian: byte order of the block
+		:param container: return container type
+		:return: decoded values
+		"""
+		self.write(command)
+		block = self.read_raw()
+		header_len = int(block[1:2])
+		data_len = int(block[2:2 + header_len])
+		data = block[2 + header_len:2 + header_len + data_len]
+		dtype = np.dtype(datatype).newbyteorder('>' if is_big_endian else '<')
+		return container(np.frombuffer(data, dtype=dtype).astype(dtype.newbyteorder('=')))
+
+	def close(self):
+		"""
+		Close session, device state is kept
+		:return: None
+		"""
+		pass
+
+	# SCPI engine
+
+	def handle(self, command):
+		"""
+		Execute one SCPI command
+		:param command: SCPI command string
+		:return: response bytes for queries, None for commands
+		"""
+		header, _, argument = command.partition(' ')
+		header = self._short(header)
+		argument = argument.strip()
+		handler = self.COMMANDS.get(header)
+		if handler is None:
+			self.error_queue.append('-113,"Undefined header"')
+			log_sim.info('Simulated DMM <{0}> undefined header: {1}'.format(self.serial, command))
+			return None
+		response = handler(self, argument)
+		if response is None:
+			return None
+		return response if isinstance(response, bytes) else str(response).encode('latin-1')
+
+	@staticmethod
+	def _short(header):
+		"""
+		Reduce SCPI header to upper case short form, e.g. 'SAMPle:COUNt?' to 'SAMP:COUN?'
+		:param header: SCPI header
+		:return: short form header
+		"""
+		query = header.endswith('?')
+		nodes = []
+		for node in header.rstrip('?').lstrip(':').split(':'):
+			if node.startswith('*'):
+				nodes.append(node.upper())
+			else:
+				short = ''.join(c for c in node if not c.islower())
+				nodes.append(short.upper() if short else node[:4].upper())
+		return ':'.join(nodes) + ('?' if query else '')
+
+	@staticmethod
+	def _number(argument, minimum, maximum):
+		"""
+		Parse SCPI numeric argument with MIN/MAX/DEF
+		:param argument: argument string
+		:param minimum: value of MIN
+		:param maximum: value of MAX
+		:return: float value
+		"""
+		argument = argument.split(',')[0].strip().upper()
+		if argument.startswith('MIN') or argument.startswith('DEF'):
+			return minimum
+		if argument.startswith('MAX'):
+			return maximum
+		if argument.startswith('INF'):
+			return float(READING_MEMORY['34411A'])
+		return float(argument)
+
+	def _acquire(self):
+		"""
+		Start a new acquisition, readings are revealed over time by the sample timer
+		:return: None
+		"""
+		if self.stat_start is not None:
+			# Statistics accumulate over acquisitions until CALC:AVER:CLE
+			self.stat_readings = np.concatenate([self.stat_readings, self.readings[self.stat_start:self._done_count()]])
+		total = int(self.trigger_count) * int(self.sample_count)
+		index = np.arange(total)
+		trigger_period = self.trigger_delay + self.sample_count * self.sample_timer
+		t = (index // self.sample_count) * trigger_period + (index % self.sample_count) * self.sample_timer
+		self.readings = self.waveform.sample(t + self.waveform_time, self.sample_timer)
+		self.waveform_time += self.trigger_count * trigger_period
+		self.removed = 0
+		self.init_time = time.time()
+		self.stat_start = 0 if self.stat_enable else None
+
+	def _done_count(self):
+		"""
+		Readings finished so far for current acquisition
+		:return: reading count
+		"""
+		total = len(self.readings)
+		if self.init_time is None or self.time_scale <= 0:
+			return total
+		elapsed = (time.time() - self.init_time) / self.time_scale
+		trigger_period = self.trigger_delay + self.sample_count * self.sample_timer
+		done_trigger = int(elapsed // trigger_period)
+		done_sample = int(min(self.sample_count, max(0.0, elapsed % trigger_period - self.trigger_delay)
+		                      // self.sample_timer))
+		return min(total, done_trigger * int(self.sample_count) + done_sample)
+
+	def _wait_done(self, count=None):
+		"""
+		Block until given reading count (default all) is finished, models sample timer latency
+		:param count: reading count to wait for
+		:return: None
+		"""
+		count = len(self.readings) if count is None else count
+		while self._done_count() < count:
+			time.sleep(min(0.01, self.sample_timer * self.time_scale))
+
+	def _format(self, values):
+		"""
+		Format readings with current FORM:DATA setting
+		:param values: reading array (A)
+		:return: response bytes
+		"""
+		if self.data_format == 'REAL':
+			data = np.asarray(values, dtype='>f8' if self.byte_order == 'NORM' else '<f8').tobytes()
+			length = str(len(data))
+			return '#{0}{1}'.format(len(length), length).encode('latin-1') + data
+		return ','.join('{0:+.8E}'.format(i) for i in values)
+
+	def _fetch(self, count=None):
+		"""
+		Wait for and remove readings from memory
+		:param count: reading count, default all remaining
+		:return: reading array
+		"""
+		count = len(self.readings) - self.removed if count is None else int(count)
+		self._wait_done(self.removed + count)
+		values = self.readings[self.removed:self.removed + count]
+		self.removed += count
+		return values
+
+	def _stats(self):
+		"""
+		Statistics of readings taken since CALC:AVER:CLE
+		:return: average, sdev, min, max, count
+		"""
+		values = self.stat_readings
+		if self.stat_start is not None:
+			values = np.concatenate([values, self.readings[self.stat_start:self._done_count()]])
+		if len(values) == 0:
+			return 0.0, 0.0, 0.0, 0.0, 0
+		sdev = float(np.std(values, ddof=1)) if len(values) > 1 else 0.0
+		return float(np.mean(values)), sdev, float(np.min(values)), float(np.max(values)), len(values)
+
+	def _set(self, name, value):
+		setattr(self, name, value)
+		return None
+
+	def _cmd_read(self, argument):
+		self._acquire()
+		return self._format(self._fetch())
+
+	def _cmd_fetc(self, argument):
+		self._wait_done()
+		return self._format(self.readings)
+
+	def _cmd_data_rem(self, argument):
+		count = argument.split(',')[0].strip()
+		if not count:
+			count = self._done_count() - self.removed
+		return self._format(self._fetch(count))
+
+	def _cmd_opc(self, argument):
+		self._wait_done()
+		return '1'
+
+	def _cmd_cls(self, argument):
+		self.error_queue = []
+		return None
+
+	def _cmd_conf(self, argument):
+		if argument:
+			self.current_range = self._number(argument, 1e-4, 3.0)
+		return None
+
+	def _cmd_calc_aver_cle(self, argument):
+		self.stat_readings = np.array([], dtype=float)
+		if self.stat_start is not None:
+			self.stat_start = self._done_count()  # Readings of current acquisition from now on
+		return None
+
+	def _cmd_calc_stat(self, argument):
+		self.stat_enable = argument.upper() in ('ON', '1')
+		return None
+
+	def _cmd_disp_text(self, argument):
+		self.text = argument.strip('"\'')
+		return None
+
+	def _cmd_form_data(self, argument):
+		self.data_format = 'REAL' if argument.upper().startswith('REAL') else 'ASC'
+		return None
+
+	COMMANDS = {
+		'*IDN?': lambda self, a: 'Agilent Technologies,{0},{1},2.05-2.05-0.09-46-09'.format(self.model, self.serial),
+		'*OPC?': _cmd_opc,
+		'*CLS': _cmd_cls,
+		'*RST': lambda self, a: self.reset(),
+		'SYST:ERR?': lambda self, a: self.error_queue.pop(0) if self.error_queue else '+0,"No error"',
+		'CONF:CURR:DC': _cmd_conf,
+		'CONF?': lambda self, a: '"CURR {0:+.8E},{1:+.8E}"'.format(self.current_range, self.current_range * 1e-6),
+		'TRIG:SOUR': lambda self, a: self._set('trigger_source', a.upper()[:3]),
+		'TRIG:SOUR?': lambda self, a: self.trigger_source,
+		'TRIG:DEL': lambda self, a: self._set('trigger_delay', self._number(a, 0.0, 3600.0)),
+		'TRIG:DEL?': lambda self, a: '{0:+.8E}'.format(self.trigger_delay),
+		'TRIG:COUN': lambda self, a: self._set('trigger_count', int(self._number(a, 1, 1000000))),
+		'TRIG:COUN?': lambda self, a: '{0:+.8E}'.format(self.trigger_count),
+		'SAMP:SOUR': lambda self, a: self._set('sample_source', a.upper()[:3]),
+		'SAMP:SOUR?': lambda self, a: self.sample_source,
+		'SAMP:TIM': lambda self, a: self._set('sample_timer', self._number(a, SAMPLE_TIMER_MIN, 3600.0)),
+		'SAMP:TIM?': lambda self, a: '{0:+.8E}'.format(self.sample_timer),
+		'SAMP:COUN': lambda self, a: self._set('sample_count', int(self._number(a, 1, 1000000))),
+		'SAMP:COUN?': lambda self, a: '{0:+.8E}'.format(self.sample_count),
+		'FORM:DATA': _cmd_form_data,
+		'FORM:DATA?': lambda self, a: 'REAL,64' if self.data_format == 'REAL' else 'ASC,9',
+		'FORM:BORD': lambda self, a: self._set('byte_order', 'SWAP' if a.upper().startswith('SWAP') else 'NORM'),
+		'CALC:STAT': _cmd_calc_stat,
+		'CALC:AVER:CLE': _cmd_calc_aver_cle,
+		'CALC:AVER:ALL?': lambda self, a: '{0:+.8E},{1:+.8E},{2:+.8E},{3:+.8E}'.format(*self._stats()[:4]),
+		'CALC:AVER:AVER?': lambda self, a: '{0:+.8E}'.format(self._stats()[0]),
+		'CALC:AVER:SDEV?': lambda self, a: '{0:+.8E}'.format(self._stats()[1]),
+		'CALC:AVER:MIN?': lambda self, a: '{0:+.8E}'.format(self._stats()[2]),
+		'CALC:AVER:MAX?': lambda self, a: '{0:+.8E}'.format(self._stats()[3]),
+		'CALC:AVER:COUN?': lambda self, a: '{0:+.8E}'.format(self._stats()[4]),
+		'INIT': lambda self, a: self._acquire(),
+		'READ?': _cmd_read,
+		'FETC?': _cmd_fetc,
+		'DATA:POIN?': lambda self, a: '{0:+d}'.format(self._done_count() - self.removed),
+		'DATA:REM?': _cmd_data_rem,
+		'DISP:TEXT': _cmd_disp_text,
+		'DISP:TEXT:CLE': lambda self, a: self._set('text', ''),
+	}
+
+
+class SimResourceManager(object):
+	def __init__(self, model='34411A', waveform=None, time_scale=1.0):
+		"""
+		In-process stand-in for visa.ResourceManager, one simulated DMM per VISA address
+		:param model: 34410A or 34411A
+		:param waveform: SimWaveform for new instruments
+		:param time_scale: sample timer latency scale
+		"""
+		self.model = model
+		self.waveform = waveform
+		self.time_scale = time_scale
+		self.inst_dict = {}
+
+	def open_resource(self, visa_address):
+		"""
+		Open simulated instrument, instrument state survives close/reopen like a real device
+		:param visa_address: VISA address
+		:return: SimDMM
+		"""
+		if visa_address not in self.inst_dict:
+			self.inst_dict[visa_address] = SimDMM(self.model, 'SIM{0:04d}'.format(len(self.inst_dict) + 1),
+			                                      self.waveform, self.time_scale)
+		return self.inst_dict[visa_address]
+
+	def list_resources(self):
+		"""
+		List opened simulated instruments
+		:return: VISA address tuple
+		"""
+		return tuple(self.inst_dict.keys())
+
+	def close(self):
+		"""
+		Close resource manager
+		:return: None
+		"""
+		pass
+
+
+class SimDMMHandler(socketserver.StreamRequestHandler):
+	def handle(self):
+		"""
+		Serve newline terminated SCPI commands of one TCP client
+		:return: None
+		"""
+		inst = self.server.inst
+		for line in self.rfile:
+			command = line.decode('latin-1').strip()
+			if not command:
+				continue
+			with inst.lock:
+				inst.write(command)
+				response_list = inst.response
+				inst.response = []
+			for response in response_list:
+				self.wfile.write(response + b'\n')
+			self.wfile.flush()
+
+
+class SimDMMServer(socketserver.ThreadingTCPServer):
+	daemon_threads = True
+	allow_reuse_address = True
+
+	def __init__(self, inst, host='127.0.0.1', port=5025):
+		"""
+		Raw SCPI socket server for a simulated DMM, VISA address TCPIP0::<host>::<port>::SOCKET
+		:param inst: SimDMM
+		:param host: listen address
+		:param port: listen port, 0 for any free port
+		"""
+		socketserver.ThreadingTCPServer.__init__(self, (host, port), SimDMMHandler)
+		self.inst = inst
+
+	@property
+	def visa_address(self):
+		"""
+		VISA address of this server
+		:return: VISA address string
+		"""
+		host, port = self.server_address[:2]
+		return 'TCPIP0::{0}::{1}::SOCKET'.format(host, port)
+
+	def start(self):
+		"""
+		Serve in a background thread
+		:return: self
+		"""
+		thread = threading.Thread(target=self.serve_forever, daemon=True)
+		thread.start()
+		return self
+
+	def stop(self):
+		"""
+		Stop serving and close socket
+		:return: None
+		"""
+		self.shutdown()
+		self.server_close()
+
+
+def start_sim_servers(count, host='127.0.0.1', base_port=5025, model='34411A', waveform=None, time_scale=1.0):
+	"""
+	Start simulated DMM socket servers
+	:param count: DMM count
+	:param host: listen address
+	:param base_port: first port, following DMMs use next ports; 0 for any free ports
+	:param model: 34410A or 34411A
+	:param waveform: SimWaveform or preset name
+	:param time_scale: sample timer latency scale
+	:return: server list
+	"""
+	server_list = []
+	for i in range(int(count)):
+		inst = SimDMM(model, 'SIM{0:04d}'.format(i + 1), time_scale=time_scale)
+		if waveform is not None:
+			inst.set_waveform(waveform)
+		port = base_port + i if base_port else 0
+		server_list.append(SimDMMServer(inst, host, port).start())
+	return server_list
+
+
+def main(argv=None):
+	"""
+	Run simulated DMMs until Ctrl+C, set VISA_Address_X in config.ini to the printed addresses
+	:param argv: command line args
+	:return: None
+	"""
+	parser = argparse.ArgumentParser(description='Simulated 34410A/34411A SCPI socket servers')
+	parser.add_argument('--count', type=int, default=4, help='DMM count')
+	parser.add_argument('--host', default='127.0.0.1', help='listen address')
+	parser.add_argument('--port', type=int, default=5025, help='first port')
+	parser.add_argument('--model', default='34411A', choices=sorted(READING_MEMORY.keys()))
+	parser.add_argument('--waveform', default='deep_sleep', choices=sorted(WAVEFORM_PRESETS.keys()))
+	parser.add_argument('--time-scale', type=float, default=1.0, help='sample timer latency scale, 0 for none')
+	args = parser.parse_args(argv)
+	server_list = start_sim_servers(args.count, args.host, args.port, args.model, args.waveform, args.time_scale)
+	for i in server_list:
+		log_sim.info('Simulated DMM <{0}> on {1}'.format(i.inst.serial, i.visa_address))
+	try:
+		while True:
+			time.sleep(1)
+	except KeyboardInterrupt:
+		for i in server_list:
+			i.stop()
+
+
+if __name__ == '__main__':
+	main(sys.argv[1:])
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+import statistics  # Normal quantile of the confidence level
+import numpy as np
+
+# Readings per pass over a block, small enough to stay in CPU cache while mean, deviations, min/max and count are taken
+chunk_size = 65536
+
+
+def ci_half_width(std, count, confidence=0.95):
+	"""
+	Half width of the normal confidence interval on the mean
+	:param std: standard deviation of readings (mA)
+	:param count: reading count
+	:param confidence: confidence level, e.g. 0.95
+	:return: half width (mA), NaN without readings
+	"""
+	if count < 1:
+		return float('nan')
+	return statistics.NormalDist().inv_cdf(0.5 + float(confidence) / 2) * float(std) / np.sqrt(count)
+
+
+class ReadingStats(object):
+	def __init__(self):
+		"""
+		Running statistics of DMM readings: count, mean and sum of squared deviations (Welford), min and max.
+		Blocks are consumed in one pass each and accumulators of chunks, blocks or rails can be merged.
+		"""
+		self.count = 0
+		self.mean = 0.0
+		self.m2 = 0.0
+		self.min = float('inf')
+		self.max = float('-inf')
+
+	def update(self, block):
+		"""
+		Add a block of readings
+		:param block: readings array (mA)
+		:return: self
+		"""
+		block = np.asarray(block, dtype=np.float64).ravel()
+		for start in range(0, len(block), chunk_size):
+			chunk = block[start:start + chunk_size]
+			chunk_mean = float(np.mean(chunk))
+			deviation = chunk - chunk_mean
+			self._merge(len(chunk), chunk_mean, float(np.dot(deviation, deviation)), float(np.min(chunk)),
+			            float(np.max(chunk)))
+		return self
+
+	def merge(self, other):
+		"""
+		Add readings of another accumulator, e.g. of another chunk or rail
+		:param other: ReadingStats
+		:return: self
+		"""
+		self._merge(other.count, other.mean, other.m2, other.min, other.max)
+		return self
+
+	def _merge(self, count, mean, m2, min_value, max_value):
+		"""
+		Combine with the statistics of another group of readings (Chan et al. parallel update)
+		:return: None
+		"""
+		if count == 0:
+			return
+		total = self.count + count
+		delta = mean - self.mean
+		self.mean += delta * count / total
+		self.m2 += m2 + delta * delta * self.count * count / total
+		self.count = total
+		self.min = min(self.min, min_value)
+		self.max = max(self.max, max_value)
+
+	@property
+	def std(self):
+		"""
+		Sample standard deviation (ddof=1), same as CALC:AVER:SDEV? of the instrument in stats only mode
+		:return: standard deviation (mA), 0 for one reading, NaN without readings
+		"""
+		if self.count < 2:
+			return 0.0 if self.count else float('nan')
+		return float(np.sqrt(self.m2 / (self.count - 1)))
+
+	def ci(self, confidence=0.95):
+		"""
+		Half width of the confidence interval on the mean
+		:param confidence: confidence level
+		:return: half width (mA)
+		"""
+		return ci_half_width(self.std, self.count, confidence)
+
+	def is_converged(self, tolerance, confidence=0.95):
+		"""
+		Check the confidence interval on the mean is within tolerance of the mean
+		:param tolerance: CI half width relative to the mean, e.g. 0.01
+		:param confidence: confidence level
+		:return: True if converged
+		"""
+		return self.count > 0 and self.ci(confidence) <= float(tolerance) * abs(self.mean)
+
+	def summary(self, confidence=0.95):
+		"""
+		Statistics in measure_*_dmm return order after raw readings
+		:param confidence: confidence level
+		:return: mean, max, min, std, count, CI half width, reading count; count is all readings, same as
+		         CALC:AVER:COUN? in stats only mode
+		"""
+		if self.count == 0:
+			return float('nan'), float('nan'), float('nan'), float('nan'), 0, float('nan'), 0
+		return self.mean, self.max, self.min, self.std, self.count, self.ci(confidence), self.count
+
+
+def reading_stats(readings):
+	"""
+	Statistics of one readings array
+	:param readings: readings array (mA)
+	:return: ReadingStats
+	"""
+	return ReadingStats().update(readings)
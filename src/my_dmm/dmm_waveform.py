@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+import numpy as np
+from collections import namedtuple
+
+# Event analytics of one rail: complete event count, mean event charge above floor (uC), mean event width (ms),
+# fraction of time in events, floor current (mA), detected and expected event interval (s)
+WaveformStats = namedtuple('WaveformStats', ['events', 'charge', 'width', 'duty_cycle', 'floor', 'interval',
+                                             'expected'])
+
+# Edge thresholds as fraction of peak above floor: an event starts at high and ends below low (hysteresis)
+high_fraction = 0.5
+low_fraction = 0.2
+# Min peak above floor taken as events, in noise sigma (from MAD) and in mA
+noise_factor = 8.0
+min_rise = 0.01
+# Percentile of readings taken as floor before events are found
+floor_percentile = 10
+
+
+def event_mask(readings, high, low):
+	"""
+	Hysteresis threshold, vectorized: a reading is in an event if the last reading at or above high came after the
+	last reading at or below low
+	:param readings: readings array (mA)
+	:param high: event start threshold (mA)
+	:param low: event end threshold (mA), below high
+	:return: bool array, True in events
+	"""
+	mark = np.zeros(len(readings), dtype=np.int8)
+	mark[readings >= high] = 1
+	mark[readings <= low] = -1
+	# Index of the last mark up to each reading, 0 before the first one
+	last_mark = np.maximum.accumulate(np.where(mark != 0, np.arange(len(readings)), 0))
+	return mark[last_mark] == 1
+
+
+def event_edges(mask):
+	"""
+	Start and end index of every event
+	:param mask: bool array from event_mask
+	:return: start index array, end index array (exclusive)
+	"""
+	edge = np.diff(mask.astype(np.int8))
+	start = np.flatnonzero(edge == 1) + 1
+	end = np.flatnonzero(edge == -1) + 1
+	if len(mask) and mask[0]:
+		start = np.concatenate(([0], start))
+	if len(mask) and mask[-1]:
+		end = np.concatenate((end, [len(mask)]))
+	return start, end
+
+
+def segment_events(readings, sample_interval):
+	"""
+	Events of one contiguous segment of readings, e.g. the readings of one trigger
+	:param readings: readings array (mA)
+	:param sample_interval: time between readings (s)
+	:return: charge array (uC) and width array (ms) of complete events, event mask, floor (mA),
+	         rising edge index array
+	"""
+	empty = np.empty(0)
+	floor = float(np.percentile(readings, floor_percentile))
+	rise = float(np.max(readings)) - floor
+	noise = 1.4826 * float(np.median(np.abs(readings - np.median(readings))))
+	if rise <= max(noise_factor * noise, min_rise):
+		return empty, empty, np.zeros(len(readings), dtype=bool), float(np.median(readings)), empty
+	mask = event_mask(readings, floor + high_fraction * rise, floor + low_fraction * rise)
+	if not mask.all():
+		floor = float(np.median(readings[~mask]))
+	start, end = event_edges(mask)
+	complete = (start > 0) & (end < len(readings))
+	# Charge of every event from one cumulative sum of current above floor
+	excess_sum = np.concatenate(([0.0], np.cumsum(readings - floor)))
+	charge = (excess_sum[end[complete]] - excess_sum[start[complete]]) * sample_interval * 1000  # mA*s to uC
+	width = (end[complete] - start[complete]) * sample_interval * 1000  # ms
+	return charge, width, mask, floor, start[start > 0]
+
+
+def analyze(readings, sample_interval, expected_interval=None, segment_length=None):
+	"""
+	Event analytics of one rail. Readings are taken as evenly spaced by sample interval within a segment, e.g. one
+	trigger of sample count readings; the gap between segments is unknown, so events are found per segment and events
+	cut by the start or end of a segment count in duty cycle only.
+	:param readings: readings array (mA)
+	:param sample_interval: time between readings (s)
+	:param expected_interval: event interval of the case (s), e.g. sniff 1.28s, None if not periodic
+	:param segment_length: readings per contiguous segment, reading count a multiple of it; None for one segment
+	:return: WaveformStats, NaN for values without enough readings or events
+	"""
+	nan = float('nan')
+	expected = float(expected_interval) if expected_interval is not None else nan
+	readings = np.asarray(readings, dtype=np.float64)
+	if len(readings) == 0 or not sample_interval > 0:
+		return WaveformStats(nan, nan, nan, nan, nan, nan, expected)
+	segment_length = int(segment_length) if segment_length else len(readings)
+	charge_list, width_list, duty_cycle_list, floor_list = [], [], [], []
+	rising_span, rising_gap_count = 0, 0
+	for segment in readings.reshape(-1, segment_length):
+		charge, width, mask, floor, rising = segment_events(segment, sample_interval)
+		charge_list.append(charge)
+		width_list.append(width)
+		duty_cycle_list.append(float(np.mean(mask)))
+		floor_list.append(floor)
+		if len(rising) > 1:
+			rising_span += int(rising[-1] - rising[0])
+			rising_gap_count += len(rising) - 1
+	charge = np.concatenate(charge_list)
+	width = np.concatenate(width_list)
+	# Mean interval over the span of rising edges, not quantized to the sample interval like a single gap
+	interval = float(rising_span) / rising_gap_count * sample_interval if rising_gap_count else nan
+	return WaveformStats(len(charge),
+	                     float(np.mean(charge)) if len(charge) else nan,
+	                     float(np.mean(width)) if len(width) else nan,
+	                     float(np.mean(duty_cycle_list)),
+	                     float(np.median(floor_list)),
+	                     interval,
+	                     expected)
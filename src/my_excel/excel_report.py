@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+import xlsxwriter
+import src.my_excel.excel_format as excel_format
+from src.my_misc.my_timer import Span
+
+# Sheet layout: title at row 2, index at column B, content from column C (zero based below)
+title_row = 1
+index_col = 1
+content_col = 2
+
+
+def open_report(excel_name):
+	"""
+	Create XlsxWriter workbook in constant memory mode, every row is flushed to disk once the next row is written,
+	so rows must be written top down
+	:param excel_name: excel name
+	:return: workbook object
+	"""
+	return xlsxwriter.Workbook(excel_name, {'constant_memory': True, 'nan_inf_to_errors': True})
+
+
+def write_version_sheet(workbook, sheet_name, version_info, formats):
+	"""
+	Write version information sheet, one row per item
+	:param workbook: workbook object
+	:param sheet_name: sheet name
+	:param version_info: ordered dict of item name and value
+	:param formats: dict of format objects from excel_format
+	:return: worksheet object
+	"""
+	worksheet = workbook.add_worksheet(sheet_name)
+	excel_format.set_column_width(worksheet, 'B', 'B', 18)
+	excel_format.set_column_width(worksheet, 'C', 'C', 88)
+	worksheet.merge_range(title_row, index_col, title_row, content_col, 'Information', formats['title_one'])
+	for row, (name, value) in enumerate(version_info.items(), title_row + 1):
+		worksheet.write(row, index_col, name, formats['index_one'])
+		worksheet.write(row, content_col, value, formats['content_one'])
+	return worksheet
+
+
+def write_data_sheet(workbook, sheet_name, rail_df, formats):
+	"""
+	Write one rail data sheet: test cases as rows, reading statistics as columns
+	:param workbook: workbook object
+	:param sheet_name: sheet name
+	:param rail_df: joined DataFrame of one rail, reading statistics as index and test cases as columns
+	:param formats: dict of format objects from excel_format
+	:return: worksheet object
+	"""
+	worksheet = workbook.add_worksheet(sheet_name)
+	excel_format.set_column_width(worksheet, 'B', 'B', 18)
+	excel_format.set_column_width(worksheet, 'C', 'H', 14)
+	case_df = rail_df.T  # Transpose once, one row per test case
+	worksheet.write_row(title_row, content_col, [str(i) for i in case_df.columns], formats['title_two'])
+	for row, (case_name, *values) in enumerate(case_df.itertuples(name=None), title_row + 1):
+		worksheet.write(row, index_col, str(case_name), formats['index_one'])
+		worksheet.write_row(row, content_col, values, formats['content_two'])
+	return worksheet
+
+
+def write_report(excel_name, version_info, sheet_name_list, joined_df_list, timing_func=None):
+	"""
+	Write version sheet and one data sheet per rail to excel, timed as phase 'excel_report'
+	:param excel_name: excel name
+	:param version_info: ordered dict of item name and value for the version sheet
+	:param sheet_name_list: data sheet name list, same order as joined DataFrame list
+	:param joined_df_list: joined DataFrame list, one per rail
+	:param timing_func: returns phase durations (s) DataFrame, e.g. my_timer.to_dataframe, phases as index and test
+	                    cases as columns; called once the report sheets are written, so its 'Timing' sheet includes
+	                    them; only the final file close ('excel_close') is left to the timing JSON. None to skip
+	:return: None
+	"""
+	with Span('excel_report'):
+		workbook = open_report(excel_name)
+		formats = {'title_one': excel_format.format_title_one(workbook),
+		           'title_two': excel_format.format_title_two(workbook),
+		           'index_one': excel_format.format_index_one(workbook),
+		           'content_one': excel_format.format_content_one(workbook),
+		           'content_two': excel_format.format_content_two(workbook)}
+		write_version_sheet(workbook, 'Version', version_info, formats)
+		for sheet_name, rail_df in zip(sheet_name_list, joined_df_list):
+			write_data_sheet(workbook, sheet_name, rail_df, formats)
+	if timing_func is not None:
+		write_data_sheet(workbook, 'Timing', timing_func(), formats)
+	with Span('excel_close'):
+		workbook.close()
@@ -4,13 +4,89 @@
 
 import sys
 import logging
+import logging.handlers
 import os
+import queue
+import atexit
+import threading
+
+# Queued logging: callers only put records on _queue, one listener thread writes them to file and console
+_queue = queue.Queue(-1)
+_listener = None
+_listener_lock = threading.Lock()
+_handler_dict = {}  # logger name -> its file and console handlers, run by the listener thread
+
+
+class LazyFormat(object):
+	def __init__(self, fmt, *args, **kwargs):
+		"""
+		Log message formatted with str.format only when the record is emitted, e.g. banners and statistics
+		:param fmt: format string
+		:param args: format args
+		:param kwargs: format kwargs
+		"""
+		self.fmt = fmt
+		self.args = args
+		self.kwargs = kwargs
+
+	def __str__(self):
+		return self.fmt.format(*self.args, **self.kwargs)
+
+
+class _Dispatcher(object):
+	"""
+	Listener side handler, passes a record to the handlers of the logger that created it, so every logger keeps
+	its own format
+	"""
+	level = logging.NOTSET
+
+	@staticmethod
+	def handle(record):
+		for handler in _handler_dict.get(record.name, ()):
+			if record.levelno >= handler.level:
+				handler.handle(record)
+
+
+def _start_listener():
+	"""
+	Start the queue listener thread once, stopped and flushed at exit
+	:return: None
+	"""
+	global _listener
+	with _listener_lock:
+		if _listener is None:
+			_listener = logging.handlers.QueueListener(_queue, _Dispatcher())
+			_listener.start()
+			atexit.register(stop_logging)
+
+
+def stop_logging():
+	"""
+	Write all queued records and flush file and console, e.g. at exit; later records are written directly
+	:return: None
+	"""
+	global _listener
+	with _listener_lock:
+		for logger_name, handler_list in _handler_dict.items():
+			logger = logging.getLogger(logger_name)
+			for handler in list(logger.handlers):
+				if isinstance(handler, logging.handlers.QueueHandler):
+					logger.removeHandler(handler)
+					for i in handler_list:
+						logger.addHandler(i)
+		if _listener is not None:
+			_listener.stop()  # Returns once the queue is drained
+			_listener = None
+		for handler_list in _handler_dict.values():
+			for handler in handler_list:
+				handler.flush()
+		_handler_dict.clear()
 
 
 def create_logger(logger_name=__name__, log_file='log_this.txt', log_level='DEBUG',
                   fmt='[%(asctime)s] %(levelname)s --- \n%(message)s',
                   fmt_date='%Y-%m-%d %H:%M:%S',
-                  file_mode='a'):
+                  file_mode='a', queued=True):
 	"""
 	My logging
 	:param logger_name: logger name
@@ -19,6 +95,8 @@ def create_logger(logger_name=__name__, log_file='log_this.txt', log_level='DEBU
 	:param fmt: format string
 	:param fmt_date: format date
 	:param file_mode: file mode
+	:param queued: True: records are written by the background listener, the caller never waits for disk or
+	console; False: handlers write in the caller thread
 	:return: logger
 	"""
 	logger = logging.getLogger(logger_name)
@@ -48,9 +126,16 @@ def create_logger(logger_name=__name__, log_file='log_this.txt', log_level='DEBU
 		fh.setFormatter(formatter)
 		ch.setFormatter(formatter)
 
-		# add the handlers to the logger
-		logger.addHandler(ch)
-		logger.addHandler(fh)
+		# add the handlers to the logger, or to the listener with a queue handler in front
+		if queued:
+			_handler_dict[logger.name] = [ch, fh]
+			qh = logging.handlers.QueueHandler(_queue)
+			qh.setLevel(log_level)
+			logger.addHandler(qh)
+			_start_listener()
+		else:
+			logger.addHandler(ch)
+			logger.addHandler(fh)
 
 		if logger.name == 'root':
 			logger.warning('Running: %s %s',
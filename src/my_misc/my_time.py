@@ -44,6 +44,22 @@ def sleep(t):
 	return t
 
 
+def wait_until(condition, timeout, interval=0.1):
+	"""
+	Poll condition until it returns a true value or timeout expires
+	:param condition: function without argument
+	:param timeout: max wait time in second
+	:param interval: time between polls in second
+	:return: last condition value, false value if timeout expired
+	"""
+	end_time = time.monotonic() + timeout
+	value = condition()
+	while not value and time.monotonic() < end_time:
+		time.sleep(interval)
+		value = condition()
+	return value
+
+
 def strfdelta(t_delta, fmt):
 	d = {"days": t_delta.days}
 	d["hours"], rem = divmod(t_delta.seconds, 3600)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+import json
+import time
+import threading
+import contextlib
+from collections import OrderedDict
+from pandas import DataFrame
+
+# Phase durations outside any test case, e.g. SSH handshake, DMM session and report writing
+run_case_name = 'Run'
+
+_lock = threading.Lock()
+_current_case = [run_case_name]  # Case being set up and measured, shared by its DMM threads
+_timing = OrderedDict()  # case name -> OrderedDict(phase -> [count, total seconds])
+
+
+class Span(contextlib.ContextDecorator):
+	def __init__(self, phase, case_name=None):
+		"""
+		Time one phase, as context manager or decorator; duration is added to the current or given test case
+		:param phase: phase name, e.g. ssh_command, dmm_measure
+		:param case_name: test case name, None for the current case, e.g. set by a post-processing worker
+		"""
+		self.phase = phase
+		self.case_name = case_name
+		self.start = None
+
+	def _recreate_cm(self):
+		return Span(self.phase, self.case_name)  # New start time per call, decorated functions run in threads
+
+	def __enter__(self):
+		self.start = time.perf_counter()
+		return self
+
+	def __exit__(self, *exc):
+		record(self.phase, time.perf_counter() - self.start, self.case_name)
+		return False
+
+
+def record(phase, seconds, case_name=None):
+	"""
+	Add one phase duration
+	:param phase: phase name
+	:param seconds: duration in second
+	:param case_name: test case name, None for the current case
+	:return: None
+	"""
+	with _lock:
+		case_name = str(case_name) if case_name is not None else _current_case[0]
+		total = _timing.setdefault(case_name, OrderedDict()).setdefault(phase, [0, 0.0])
+		total[0] += 1
+		total[1] += seconds
+
+
+@contextlib.contextmanager
+def case(case_name):
+	"""
+	Attribute phases timed inside to one test case, case wall time is recorded as phase 'case'
+	:param case_name: test case name
+	:return: context manager
+	"""
+	with _lock:
+		_current_case[0] = str(case_name)
+	try:
+		with Span('case', case_name):
+			yield
+	finally:
+		with _lock:
+			_current_case[0] = run_case_name
+
+
+def reset():
+	"""
+	Clear recorded durations, e.g. at start of a run
+	:return: None
+	"""
+	with _lock:
+		_timing.clear()
+		_current_case[0] = run_case_name
+
+
+def summary():
+	"""
+	Get recorded durations
+	:return: {case name: {phase: {'count': count, 'seconds': total seconds}}} in first record order
+	"""
+	with _lock:
+		return OrderedDict((case_name, OrderedDict((phase, {'count': count, 'seconds': round(seconds, 6)})
+		                                           for phase, (count, seconds) in phase_dict.items()))
+		                   for case_name, phase_dict in _timing.items())
+
+
+def to_dataframe():
+	"""
+	Get recorded durations as DataFrame, phases as index and test cases as columns, total seconds per phase
+	:return: DataFrame
+	"""
+	data = OrderedDict((case_name, OrderedDict((phase, value['seconds']) for phase, value in phase_dict.items()))
+	                   for case_name, phase_dict in summary().items())
+	return DataFrame(data, columns=list(data.keys())).fillna(0.0)
+
+
+def write_json(file_name):
+	"""
+	Write recorded durations to JSON file
+	:param file_name: JSON file name
+	:return: None
+	"""
+	with open(file_name, 'w') as f:
+		json.dump(summary(), f, indent=1)
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+import json
+import src.my_bench.bench_flow as bench_flow
+import src.my_misc.my_timer as my_timer
+
+
+def test_bench_flow(tmp_path, monkeypatch):
+	timing_df_list = []
+	to_dataframe = my_timer.to_dataframe
+	monkeypatch.setattr(my_timer, 'to_dataframe', lambda: timing_df_list.append(to_dataframe()) or timing_df_list[-1])
+	output = str(tmp_path / 'bench.json')
+	bench_flow.main(['--dmm-count', '2', '--trigger-count', '2', '--sample-count', '50', '--case-count', '3',
+	                 '--work-dir', str(tmp_path), '--output', output])
+	with open(output) as f:
+		run = json.load(f)['runs'][0]
+	assert (run['dmm_count'], run['case_count']) == (2, 3)
+	assert list(run['case_timing'].keys())[1:] == ['Deep Sleep', 'BT Idle', 'BT Page Scan', 'BT Inquiry Scan']
+	# Concurrent DMMs: phase wall time once per case, per rail measure times apart
+	assert run['case_timing']['BT Idle']['dmm_measure']['count'] == 1
+	assert run['case_timing']['BT Idle']['dmm_rail_measure']['count'] == 2
+	assert run['case_timing']['BT Idle']['dmm_measure']['seconds'] <= run['case_timing']['BT Idle']['case']['seconds']
+	assert run['phase_seconds']['excel_report'] > 0 and run['phase_seconds']['excel_close'] > 0
+	assert timing_df_list[0].loc['excel_report', 'Run'] > 0  # Timing sheet includes the report write
+	assert run['peak_memory_bytes'] > 0
+	# Simulated DMMs draw the case waveform, page scan events every 1.28s are found
+	with open(str(tmp_path / 'dmm2_trig2_samp50_case3' / 'bench_journal.jsonl')) as f:
+		record = [json.loads(line) for line in f if '"BT Page Scan"' in line][0]
+	assert record['summary'][0][7] > 0 and abs(record['summary'][0][12] - 1.28) < 0.05
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+import inspect
+import src.my_bt_case.case_registry as case_registry
+
+my_context = {'hci_dut': 'hci0', 'hci_ref': 'hci1', 'dut_addr': '11:22:33:44:55:66', 'ref_addr': '66:55:44:33:22:11'}
+
+
+def test_case_kwargs_bind():
+	for case in case_registry.case_table:
+		kwargs = case_registry.case_kwargs(case, my_context)
+		inspect.signature(case.func).bind(**kwargs)  # Raises TypeError if a required argument is missing
+		assert kwargs['power_level'] == case.power_level
+
+
+def test_case_plan():
+	plan = case_registry.case_plan()
+	assert plan[0][0].name == 'Deep Sleep'
+	assert [case.key for case, enable in plan] == [case.key for case in case_registry.case_table]
+	assert case_registry.get_case('BT_Idle').count_type == 0
+	assert len(set(case.name for case in case_registry.case_table)) == len(case_registry.case_table)
+	import src.my_dmm.dmm_sim as dmm_sim
+	assert all(case.waveform in dmm_sim.WAVEFORM_PRESETS for case in case_registry.case_table)
+
+
+def test_case_scheduler(monkeypatch):
+	import src.my_bt_case.case_scheduler as case_scheduler
+	call_list = []
+	monkeypatch.setattr(case_scheduler.ssh_send_cmd, 'cc_bt_link_power_level',
+	                    lambda ref_addr, power_level, link_type: call_list.append(('power', power_level, link_type)))
+	table = [case_registry.get_case(key) for key in
+	         ('BT_SCO_HV3_Master_0-dBm-pin', 'BT_Idle', 'BT_SCO_HV3_Master_4-dBm-pin', 'BT_SCO_EV3_Master_0-dBm-pin')]
+	table = [case._replace(func=lambda name=case.name, **kwargs: call_list.append(('full', name))) for case in table]
+	plan = case_scheduler.schedule([(case, 1) for case in table])
+	assert [case.name for case, enable in plan] == [table[i].name for i in (0, 2, 1, 3)]
+	scheduler = case_scheduler.CaseScheduler()
+	for case, enable in plan:
+		scheduler.case_func(case)(**case_registry.case_kwargs(case, my_context))
+	assert call_list == [('full', table[0].name), ('power', '4', 'SCO'), ('full', table[1].name), ('full', table[3].name)]
+	assert (scheduler.reset_count, scheduler.reuse_count) == (3, 1)
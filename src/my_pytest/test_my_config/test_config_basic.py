@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+import os
+import shutil
+import src.my_config.config_basic as config_basic
+
+import pytest
+
+
+def use_config_copy(tmp_path, monkeypatch):
+	config_file = str(tmp_path / 'config.ini')
+	shutil.copy('config.ini', config_file)
+	monkeypatch.setattr(config_basic, 'config_file_name', config_file)
+	return config_file
+
+
+def test_snapshot_cached(tmp_path, monkeypatch):
+	use_config_copy(tmp_path, monkeypatch)
+	snapshot = config_basic.config_snapshot()
+	assert config_basic.config_snapshot() is snapshot
+	assert config_basic.load_config() is config_basic.load_config()
+	assert config_basic.dmm_trigger_count() == list(snapshot.trigger_count)
+	assert config_basic.config_bt_power('8977', 'Max') == '43'
+	assert config_basic.config_test_case('BT_Enable') == '1'
+	assert config_basic.config_case_settle('SCO') == 5.0
+	with pytest.raises(AttributeError):
+		snapshot.dut = 'hci9'
+
+
+def test_snapshot_reload_on_change(tmp_path, monkeypatch):
+	config_file = use_config_copy(tmp_path, monkeypatch)
+	snapshot = config_basic.config_snapshot()
+	with open(config_file) as f:
+		text = f.read().replace('Dut = hci0', 'Dut = hci2')
+	with open(config_file, 'w') as f:
+		f.write(text)
+	stat = os.stat(config_file)
+	os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+	assert config_basic.config_dut() == 'hci2'
+	assert config_basic.config_snapshot() is not snapshot
+
+
+def test_snapshot_fallback_per_setting(tmp_path, monkeypatch):
+	config_file = use_config_copy(tmp_path, monkeypatch)
+	with open(config_file) as f:
+		text = f.read().replace('DMM_Timeout = 600000', '').replace('Current_Range = 3', 'Current_Range = high')
+	with open(config_file, 'w') as f:
+		f.write(text.replace('[Case_Settle]', '[Case_Settle_Old]'))
+	assert config_basic.dmm_timeout() == 600000.0
+	assert config_basic.dmm_current_range() == 3.0
+	assert config_basic.config_case_settle('LE_Connection') == 10.0
+	assert config_basic.config_dut() == 'hci0'  # Other settings still load
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+import src.my_dmm.dmm_basic as dmm_basic
+import src.my_dmm.dmm_sim as dmm_sim
+
+import numpy as np
+
+
+def sim_dmm_list(waveform, count=2):
+	inst_list = [dmm_sim.SimDMM(time_scale=0) for _ in range(count)]
+	for inst in inst_list:
+		inst.set_waveform(waveform)
+	return inst_list
+
+
+def test_adaptive_converged():
+	# Stable floor converges at min block count
+	reading_list = dmm_basic.measure_adaptive_dmm(sim_dmm_list('deep_sleep'), 100, 8, 0.05, 0, min_block_count=2)
+	for reading in reading_list:
+		assert len(reading[0]) == reading[7] == 200
+		assert reading[6] <= 0.05 * reading[1]
+
+
+def test_adaptive_budget():
+	out_list = [np.full(400, -1.0) for _ in range(2)]
+	reading_list = dmm_basic.measure_adaptive_dmm(sim_dmm_list('sniff_0.5s'), 100, 4, 1e-6, 0, out_list=out_list)
+	assert [reading[7] for reading in reading_list] == [400, 400]
+	assert np.shares_memory(reading_list[0][0], out_list[0])
+	assert reading_list[1][6] > 1e-6 * reading_list[1][1]
+
+
+class ContainerDMM(dmm_sim.SimDMM):
+	def query_binary_values(self, command, datatype='f', is_big_endian=False, container=list):
+		self.container = container
+		return super().query_binary_values(command, datatype, is_big_endian, container)
+
+
+def test_read_readings_real():
+	inst = ContainerDMM(time_scale=0)
+	inst.write('TRIG:COUN 1')
+	inst.write('SAMP:COUN 50')
+	inst.write('FORM:DATA REAL,64')
+	out = np.empty(50)
+	readings = dmm_basic.read_readings(inst, 'REAL', out)
+	assert inst.container is np.array  # numpy decoding in pyvisa, no Python float per reading
+	assert readings is out and np.all(out > 0)
+
+
+class FailingDMM(dmm_sim.SimDMM):
+	def write(self, command):
+		if command.startswith('TRIG:COUN'):
+			raise IOError('VISA write failed')
+		return super().write(command)
+
+
+def test_concurrent_arm_error():
+	inst_list = sim_dmm_list('deep_sleep', 3)
+	inst_list[1] = FailingDMM(time_scale=0)
+	for inst in inst_list:
+		inst.timeout = 600000  # Other DMMs are released by barrier abort, not by timeout
+	try:
+		dmm_basic.measure_dmm_list(inst_list, 1, 10, 0)
+	except IOError as err:
+		assert str(err) == 'VISA write failed'
+	else:
+		assert False
+
+
+def test_pool_settings(monkeypatch):
+	monkeypatch.setattr(dmm_basic, 'pool_settings', {})
+	monkeypatch.setattr(dmm_basic.config_basic, 'dmm_backend', lambda: 'SIM')
+	monkeypatch.setattr(dmm_basic.config_basic, 'dmm_sim_time_scale', lambda: 0)
+	pool = dmm_basic.open_dmm_session(0)
+	try:
+		visa_address = list(pool.sessions)
+		settings = dict(dmm_basic.pool_settings)
+		args = [settings[i] for i in ('timeout', 'current_range', 'trigger_source', 'trigger_delay', 'sample_source')]
+		dmm_basic.dmm_flow_wrapper(visa_address, *args, settings['sample_timer'], 1, 10, 'Pooled', 0,
+		                           data_format=settings['data_format'])
+		assert dmm_basic.pool_settings == settings
+		# Other range is applied to the pooled sessions instead of being ignored
+		args[1] = 0.1
+		dmm_basic.dmm_flow_wrapper(visa_address, *args, settings['sample_timer'], 1, 10, 'Range', 0,
+		                           data_format=settings['data_format'])
+		assert [pool.sessions[i].current_range for i in visa_address] == [0.1] * len(visa_address)
+		assert dmm_basic.pool_settings['current_range'] == 0.1
+	finally:
+		dmm_basic.close_dmm_session()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+import src.my_dmm.dmm_sim as dmm_sim
+
+import numpy as np
+
+
+def sim_dmm(waveform='deep_sleep'):
+	inst = dmm_sim.SimDMM(time_scale=0)
+	inst.set_waveform(waveform)
+	inst.write('CONF:CURR:DC 3')
+	inst.write('TRIG:COUN 2.0')
+	inst.write('SAMP:COUN 50.0')
+	return inst
+
+
+def test_idn():
+	assert sim_dmm().query('*IDN?').split(',')[1] == '34411A'
+	assert sim_dmm().query('SYST:ERR?') == '+0,"No error"'
+
+
+def test_read_ascii():
+	inst = sim_dmm()
+	inst.write('READ?')
+	readings = np.array(inst.read().split(','), dtype=float)
+	assert len(readings) == 100
+	assert abs(np.mean(readings) - 50e-6) < 5e-6
+
+
+def test_read_real():
+	inst = sim_dmm()
+	inst.write('FORM:DATA REAL,64')
+	readings = inst.query_binary_values('READ?', datatype='d', is_big_endian=True, container=np.array)
+	assert len(readings) == 100
+	assert readings.dtype == np.float64
+
+
+def test_stream_and_stats():
+	inst = sim_dmm('sniff_0.5s')
+	inst.write('CALC:AVER:CLE')
+	inst.write('CALC:STAT ON')
+	inst.write('INIT')
+	assert inst.query('DATA:POIN?') == '+100'
+	first = np.array(inst.query('DATA:REM? 60').split(','), dtype=float)
+	second = np.array(inst.query('DATA:REM? 40').split(','), dtype=float)
+	assert inst.query('DATA:POIN?') == '+0'
+	readings = np.concatenate([first, second])
+	stats = np.array(inst.query('CALC:AVER:ALL?').split(','), dtype=float)
+	assert abs(stats[0] - np.mean(readings)) < 1e-9
+	assert abs(stats[2] - np.min(readings)) < 1e-9
+	assert abs(stats[3] - np.max(readings)) < 1e-9
+	assert int(float(inst.query('CALC:AVER:COUN?'))) == 100
+
+
+def test_stats_accumulate():
+	inst = sim_dmm('idle')
+	inst.write('CALC:AVER:CLE')
+	inst.write('CALC:STAT ON')
+	readings = np.concatenate([np.array(inst.query('READ?').split(','), dtype=float) for _ in range(3)])
+	stats = np.array(inst.query('CALC:AVER:ALL?').split(','), dtype=float)
+	assert int(float(inst.query('CALC:AVER:COUN?'))) == 300
+	assert abs(stats[0] - np.mean(readings)) < 1e-9 and abs(stats[1] - np.std(readings, ddof=1)) < 1e-9
+	inst.write('CALC:AVER:CLE')
+	assert int(float(inst.query('CALC:AVER:COUN?'))) == 0
+
+
+def test_waveform_average():
+	# 2.5ms pulse of 20mA every 0.5s on top of 60uA floor
+	waveform = dmm_sim.SimWaveform(**dict(dmm_sim.WAVEFORM_PRESETS['sniff_0.5s'], noise=0))
+	current = waveform.sample(np.arange(0, 5, 0.001), 0.001)
+	assert abs(np.mean(current) - (60e-6 + 20e-3 * 0.0025 / 0.5)) < 1e-6
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+import src.my_dmm.dmm_stats as dmm_stats
+import src.my_dmm.dmm_basic as dmm_basic
+import src.my_dmm.dmm_sim as dmm_sim
+
+import numpy as np
+
+
+def test_blocks_and_merge(monkeypatch):
+	monkeypatch.setattr(dmm_stats, 'chunk_size', 64)
+	readings = np.random.default_rng(1).normal(5.0, 2.0, 1000)
+	readings[::10] = 0
+	stats = dmm_stats.ReadingStats()
+	for block in np.array_split(readings[:600], 7):
+		stats.update(block)
+	stats.merge(dmm_stats.reading_stats(readings[600:])).merge(dmm_stats.ReadingStats())
+	mean, max_value, min_value, std, summary_count, ci, count = stats.summary()
+	assert count == summary_count == 1000  # Zero readings are counted
+	assert abs(mean - np.mean(readings)) < 1e-9 and abs(std - np.std(readings, ddof=1)) < 1e-9
+	assert max_value == np.max(readings) and min_value == np.min(readings)
+	assert abs(ci - 1.959964 * std / np.sqrt(1000)) < 1e-6
+
+
+def test_reading_format():
+	reading = dmm_basic.reading_stats(np.array([1.0, 2.0, 3.0]), 0)
+	assert dmm_basic.dmm_reading_format(reading) == [2.0, 3.0, 1.0, 1.0, 3.0, '1.0,2.0,3.0']
+	assert dmm_basic.dmm_reading_format(dmm_stats.reading_stats([1.0, 2.0, 3.0]))[:5] == [2.0, 3.0, 1.0, 1.0, 3.0]
+	assert np.isnan(dmm_stats.ReadingStats().summary()[0])
+
+
+def test_read_and_stats_mode():
+	inst_list = [dmm_sim.SimDMM(time_scale=0) for _ in range(2)]
+	for inst in inst_list:
+		inst.set_waveform(dmm_sim.SimWaveform(floor=0, noise=1e-3, seed=3))  # Same readings on both
+	read = dmm_basic.measure_single_dmm(inst_list[0], 2, 50, 0)
+	stats = dmm_basic.measure_stats_dmm(inst_list[1], 2, 50, 0)
+	assert np.allclose(read[1:5], stats[1:5]) and read[5] == stats[5] == 100  # Same 4.Sdev and 5.Count meaning
+	assert abs(read[4] - np.std(read[0], ddof=1)) < 1e-9
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+import src.my_dmm.dmm_sim as dmm_sim
+import src.my_dmm.dmm_waveform as dmm_waveform
+
+import numpy as np
+
+
+def test_hysteresis():
+	readings = np.array([0, 10, 4, 10, 1, 0, 6, 0, 10, 10])
+	mask = dmm_waveform.event_mask(readings, 5, 2)
+	assert mask.tolist() == [False, True, True, True, False, False, True, False, True, True]
+	start, end = dmm_waveform.event_edges(mask)
+	assert start.tolist() == [1, 6, 8] and end.tolist() == [4, 7, 10]
+
+
+def test_sniff():
+	# 2.5ms pulse of 20mA every 0.5s on top of 60uA floor, 50uC per event
+	waveform = dmm_sim.SimWaveform(**dmm_sim.WAVEFORM_PRESETS['sniff_0.5s'])
+	for sample_interval in (0.0005, 0.035):
+		readings = waveform.sample(np.arange(0, 10, sample_interval), sample_interval) * 1000
+		stats = dmm_waveform.analyze(readings, sample_interval, 0.5)
+		assert stats.events == 19
+		assert abs(stats.charge - 50) < 0.1
+		assert abs(stats.floor - 0.06) < 0.001
+		assert abs(stats.interval - 0.5) < sample_interval and stats.expected == 0.5
+	assert abs(stats.width - 35) < 1e-9  # Pulse is shorter than one reading
+
+
+def test_flat():
+	readings = dmm_sim.SimWaveform(**dmm_sim.WAVEFORM_PRESETS['idle']).sample(np.arange(1000) * 0.001) * 1000
+	stats = dmm_waveform.analyze(readings, 0.001)
+	assert stats.events == 0 and stats.duty_cycle == 0 and abs(stats.floor - 1.2) < 0.001
+	assert np.isnan(dmm_waveform.analyze([], 0.001).floor)
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+import src.my_misc.my_logging as my_logging
+
+
+class CountFormat(my_logging.LazyFormat):
+	count = 0
+
+	def __str__(self):
+		CountFormat.count += 1
+		return my_logging.LazyFormat.__str__(self)
+
+
+def test_queued_logger(tmp_path):
+	log_file = str(tmp_path / 'log.txt')
+	logger = my_logging.create_logger('test_queued_logger', log_file, log_level='INFO', fmt='%(message)s')
+	logger.propagate = False  # Keep pytest log capture out of the format count
+	logger.debug(CountFormat('Debug {0}', 1))  # Level disabled, never formatted
+	logger.info(CountFormat('Measured [{0}]', 'BT Idle'))
+	my_logging.stop_logging()
+	with open(log_file) as f:
+		assert f.read() == 'Measured [BT Idle]\n'
+	assert CountFormat.count == 1
+	logger.info('After stop')  # Written directly once the listener is stopped
+	with open(log_file) as f:
+		assert f.read().endswith('After stop\n')
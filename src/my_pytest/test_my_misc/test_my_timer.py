@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+import json
+import threading
+import src.my_misc.my_timer as my_timer
+
+
+@my_timer.Span('dmm_measure')
+def measure():
+	my_timer.record('dmm_transfer', 0.5)
+
+
+def test_span(tmp_path):
+	my_timer.reset()
+	with my_timer.Span('ssh_connect'):
+		pass
+	with my_timer.case('BT Idle'):
+		thread_list = [threading.Thread(target=measure) for i in range(2)]
+		for i in thread_list:
+			i.start()
+		for i in thread_list:
+			i.join()
+	with my_timer.Span('post_process', 'BT Idle'):
+		pass
+	result = my_timer.summary()
+	assert list(result.keys()) == ['Run', 'BT Idle']
+	assert result['BT Idle']['dmm_measure']['count'] == 2
+	assert result['BT Idle']['dmm_transfer']['seconds'] == 1.0
+	assert list(result['BT Idle'].keys()) == ['dmm_transfer', 'dmm_measure', 'case', 'post_process']
+	timing_df = my_timer.to_dataframe()
+	assert timing_df.loc['ssh_connect', 'BT Idle'] == 0.0
+	my_timer.write_json(str(tmp_path / 'timing.json'))
+	with open(str(tmp_path / 'timing.json')) as f:
+		assert json.load(f) == json.loads(json.dumps(result))
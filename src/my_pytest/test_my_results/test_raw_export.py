@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+import json
+import importlib.util
+import numpy as np
+
+import src.my_results.raw_export as raw_export
+import src.my_results.results_store as results_store
+
+
+def test_npz_export(tmp_path, monkeypatch):
+	real_find_spec = importlib.util.find_spec
+	monkeypatch.setattr(importlib.util, 'find_spec', lambda name: None if name == 'h5py' else real_find_spec(name))
+	export = raw_export.open_raw_export(str(tmp_path / 'test_raw.h5'), ['3_3', '1_8'], ['A', 'B'])
+	assert isinstance(export, raw_export.NpzExport) and export.file_name.endswith('test_raw.npz')
+	store = results_store.ResultsStore(2, raw_export=export)
+	readings = np.arange(20000) * 0.001  # Comma joined, far over the 32767 character Excel cell limit
+	store.append('BT Idle', [(readings, 1, 1, 1, 1, 20000), (readings[:3], 1, 1, 1, 1, 3)], {'sample_count': 100})
+	assert store.to_dataframe(0)['BT Idle']['6.Raw'] == 'test_raw.npz:/3_3/BT Idle'
+	store.close()
+	# Resumed run keeps the cases written before
+	export = raw_export.open_raw_export(str(tmp_path / 'test_raw.h5'), ['3_3', '1_8'], ['A', 'B'], mode='a')
+	export.write('BT ACL Sniff/1.28s', 1, readings[:5])
+	export.close()
+	with np.load(str(tmp_path / 'test_raw.npz')) as raw:
+		assert np.allclose(raw['3_3/BT Idle'], readings) and raw['3_3/BT Idle'].dtype == np.float32
+		assert len(raw['1_8/BT ACL Sniff_1.28s']) == 5
+		assert json.loads(raw['3_3/BT Idle.json'])['sample_count'] == 100
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+import os
+import src.my_results.raw_spool as raw_spool
+
+import numpy as np
+
+
+def test_allocate_and_roll_over(tmp_path):
+	spool = raw_spool.RawSpool(str(tmp_path), 2, capacity=10)
+	first = spool.allocate(0, 8)
+	first[:] = np.arange(8)
+	second = spool.allocate(0, 8)  # Over capacity, next segment, mapped file is not resized
+	second[:] = -1
+	third = spool.allocate(0, 25)  # Larger than a segment
+	assert len(spool.segment_list[0]) == 3 and len(spool.segment_list[1]) == 1
+	assert list(first) == list(range(8))
+	assert [os.path.getsize(i) for i in spool.segment_list[0]] == [80, 80, 200]
+	assert len(spool.allocate(1, 0)) == 0
+	del first, second, third
+	spool.close()
+	assert os.listdir(str(tmp_path)) == []
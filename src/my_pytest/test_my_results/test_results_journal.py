@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+import numpy as np
+import src.my_config.config_basic as config_basic
+import src.my_results.results_journal as results_journal
+from src.my_results.results_store import ResultsStore
+
+
+def test_fingerprint():
+	snapshot = config_basic.config_snapshot()
+	setup = results_journal.fingerprint(snapshot, '11:22:33:44:55:66', '66:55:44:33:22:11')
+	assert setup == results_journal.fingerprint(snapshot, '11:22:33:44:55:66', '66:55:44:33:22:11')
+	assert setup != results_journal.fingerprint(snapshot._replace(dut='hci2'), '11:22:33:44:55:66', '66:55:44:33:22:11')
+	assert setup != results_journal.fingerprint(snapshot, '11:22:33:44:55:77', '66:55:44:33:22:11')
+	for name, value in (('dmm_acquisition_mode', 'STREAM'), ('dmm_data_format', 'REAL')):
+		assert setup != results_journal.fingerprint(snapshot._replace(**{name: value}), '11:22:33:44:55:66',
+		                                            '66:55:44:33:22:11')
+
+
+def test_journal_resume(tmp_path):
+	file_name = str(tmp_path / 'journal.jsonl')
+	store = ResultsStore(2, journal=results_journal.ResultsJournal(file_name, 'setup'))
+	for case_name in ('Deep Sleep', 'BT Idle'):
+		store.append(case_name, [(np.ones(3), 1.0, 1.0, 1.0, 0.0, 3.0)] * 2)
+	store.close()
+	with open(file_name, 'a') as f:
+		f.write('{"run": "cut')  # Aborted in the middle of a line
+	other = results_journal.ResultsJournal(file_name, 'other', resume=True)
+	other.close()
+	assert other.record_list == []
+
+	journal = results_journal.ResultsJournal(file_name, 'setup', resume=True)
+	assert journal.case_name_list == ['Deep Sleep', 'BT Idle']
+	resumed = ResultsStore(2, capacity=1, journal=journal)
+	for record in journal.record_list:
+		resumed.restore(record['case'], record['summary'], record['raw'])
+	resumed.append('BT Page Scan', [(np.ones(3), 2.0, 2.0, 2.0, 0.0, 3.0)] * 2)
+	resumed.close()
+	assert resumed.to_dataframe(1).loc['1.Average'].tolist() == [1.0, 1.0, 2.0]
+	assert len(results_journal.read_journal(file_name)) == 3
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+import src.my_results.results_store as results_store
+import src.my_results.case_pipeline as case_pipeline
+
+import numpy as np
+
+
+def reading(value, count):
+	readings = np.full(count, float(value))
+	return readings, np.mean(readings), np.max(readings), np.min(readings), np.std(readings), count
+
+
+def test_append_and_grow():
+	store = results_store.ResultsStore(2, capacity=1)
+	for i in range(5):
+		store.append('case {0}'.format(i), [reading(i, 10), reading(i * 2, 20)])
+	assert len(store) == 5
+	assert store.summary.shape[0] >= 5
+	assert len(store.raw_readings('case 3', 1)) == 20
+	assert store.raw_readings('case 3', 1).dtype == np.float64
+
+
+def test_to_dataframe():
+	store = results_store.ResultsStore(2)
+	store.append('Deep Sleep', [reading(0.05, 3), reading(1.5, 3)])
+	store.append('BT Idle', [reading(0.25, 3), reading(2.0, 3)])
+	df = store.to_dataframe(1)
+	assert list(df.columns) == ['Deep Sleep', 'BT Idle']
+	assert list(df.index) == (['1.Average', '2.Max', '3.Min', '4.Sdev', '5.Count', '6.Raw', '7.CI', '8.Samples'] +
+	                          results_store.waveform_name_list)
+	assert df['BT Idle']['1.Average'] == 2.0
+	assert df['BT Idle']['6.Raw'] == ''  # Not exported, readings are never written to a report cell
+	assert list(store.to_dataframe(0, include_raw=False).index) == (results_store.summary_name_list +
+	                                                                results_store.precision_name_list +
+	                                                                results_store.waveform_name_list)
+
+
+def test_duplicate_case_name():
+	store = results_store.ResultsStore(1)
+	store.restore('BT Idle', [[0.25, 0.25, 0.25, 0, 3]], [''])
+	store.append('BT Idle', [reading(0.5, 3)])
+	store.append('BT Idle', [reading(0.75, 3)])
+	df = store.to_dataframe(0)
+	assert list(df.columns) == ['BT Idle', 'BT Idle (2)', 'BT Idle (3)']
+	assert df['BT Idle (3)']['1.Average'] == 0.75 and len(store.raw_readings('BT Idle (2)', 0)) == 3
+
+
+def test_precision():
+	store = results_store.ResultsStore(1)
+	store.append('BT Idle', [reading(0.25, 3) + (0.012, 300)])
+	store.restore('Deep Sleep', [[0.05, 0.06, 0.04, 0.01, 100]], [''])
+	df = store.to_dataframe(0)
+	assert df['BT Idle']['7.CI'] == 0.012 and df['BT Idle']['8.Samples'] == 300
+	assert np.isnan(df['Deep Sleep']['7.CI'])
+
+
+def test_waveform():
+	readings = np.full(1000, 0.06)
+	readings[100::250] = 20.06  # 1 reading of 20mA above floor every 0.25s at 1ms sample interval
+	store = results_store.ResultsStore(1)
+	store.append('BT Idle', [reading(1.2, 10)])
+	store.append('BT ACL Sniff', [(readings,) + reading(0, 1)[1:]], {'sample_interval': 0.001, 'event_interval': 0.25})
+	df = store.to_dataframe(0)
+	assert np.isnan(df['BT Idle']['9.Events'])
+	assert df['BT ACL Sniff']['9.Events'] == 4 and df['BT ACL Sniff']['10.Charge (uC)'] == 20.0
+	assert df['BT ACL Sniff']['14.Interval (s)'] == 0.25 and df['BT ACL Sniff']['15.Expected (s)'] == 0.25
+
+
+def test_waveform_per_trigger():
+	readings = np.full(1000, 0.06)
+	readings[[10, 30, 510, 530]] = 20.06  # 2 triggers of 500 readings, 20 readings between pulses in each
+	store = results_store.ResultsStore(1)
+	for name, sample_count in (('Trigger', 500), ('Trigger 300', 300)):
+		store.append(name, [(readings,) + reading(0, 1)[1:]], {'sample_interval': 0.001, 'sample_count': sample_count})
+	df = store.to_dataframe(0)
+	# Gap between triggers is not taken as event interval
+	assert df['Trigger']['9.Events'] == 4 and df['Trigger']['14.Interval (s)'] == 0.02
+	assert np.isnan(df['Trigger 300']['9.Events'])
+
+
+class FakeExport(object):
+	def __init__(self):
+		self.written = []
+
+	def write(self, case_name, rail, readings, attrs=None):
+		self.written.append((case_name, rail, len(readings), attrs))
+		return 'raw.h5:/{0}/{1}'.format(rail, case_name)
+
+
+def test_raw_reference():
+	export = FakeExport()
+	store = results_store.ResultsStore(2, raw_export=export)
+	store.append('BT Idle', [reading(0.25, 3), reading(2.0, 4)], {'sample_timer': 'MIN'})
+	assert export.written[1] == ('BT Idle', 1, 4, {'sample_timer': 'MIN'})
+	assert store.to_dataframe(1)['BT Idle']['6.Raw'] == 'raw.h5:/1/BT Idle'
+
+
+def test_case_pipeline():
+	store = results_store.ResultsStore(1)
+	pipeline = case_pipeline.CasePipeline(store)
+	for i in range(3):
+		pipeline.append('case {0}'.format(i), [reading(i, 5)])
+	pipeline.close()
+	assert store.case_name_list == ['case 0', 'case 1', 'case 2']
+	assert store.to_dataframe(0, include_raw=False)['case 2']['1.Average'] == 2.0
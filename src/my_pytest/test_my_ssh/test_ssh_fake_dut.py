@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+import src.my_ssh.ssh_basic as ssh_basic
+import src.my_ssh.ssh_fake_dut as ssh_fake_dut
+import src.my_ssh.ssh_send_cmd as ssh_send_cmd
+from src.my_ssh.ssh_script import Step
+
+import pytest
+
+dut_addr = '00:11:22:33:44:55'
+ref_addr = '00:11:22:33:44:66'
+
+
+def test_fake_dut_state():
+	dut = ssh_fake_dut.FakeDUT({'hci0': dut_addr, 'hci1': ref_addr}, sleep_scale=0)
+	assert dut.run_command_list('hciconfig hci0 piscan')[1] == 0
+	assert dut.condition('hciconfig hci0 | grep -q PSCAN && hciconfig hci0 | grep -q ISCAN')
+	assert dut.run_command_list('hcitool -i hci0 sniff {0} 0x0800 0x0800 0x01 0x00'.format(ref_addr))[1] == 1
+	dut.run_command_list('hcitool -i hci0 cc --role=m {0}\nhcitool -i hci0 scc {0} 1F40 1F40 0007 60 00 03C4'
+	                     .format(ref_addr))
+	assert dut.condition('hcitool -i hci1 con | grep -qi "SCO {0}"'.format(dut_addr.lower()))
+	output, exit_code = dut.run_command_list('hcitool -i hci0 cmd 3F 64 B1 01 01 2A 00 00 00 00 00 00')
+	assert output[2] == '> HCI Event: 0x0e plen 4' and dut.controller_dict['hci0'].power_index == 0x2A
+	dut.run_command_list('hcitool -i hci0 cmd 08 0D 10 00 10 00 00 00 66 44 33 22 11 00 00 04 00 04 00 00 00 08 10 00')
+	assert dut.condition('hcitool -i hci0 con | grep -qi "LE {0}"'.format(ref_addr))
+	dut.run_command_list('hciconfig hci1 reset')
+	assert not dut.condition('hcitool -i hci0 con | grep -qi ACL') and dut.controller_dict['hci0'].pscan
+	assert dut.run_command_list('hcitool -i hci9 con') == (['Device is not available: No such device'], 1)
+
+
+def test_fake_dut_server():
+	server = ssh_fake_dut.FakeDUTServer(dut=ssh_fake_dut.FakeDUT({'hci0': dut_addr, 'hci1': ref_addr},
+	                                                             sleep_scale=0)).start()
+	connection = ssh_basic.SSH(server.address, 'root', 'wireless')
+	try:
+		assert connection.send_command('hciconfig')[0][1].strip().startswith('BD Address: ' + dut_addr)
+		step_list = [Step('reset_dut', 'hciconfig hci0 reset', ready='hciconfig hci0 | grep -q "UP RUNNING"'),
+		             Step('acl', 'hcitool -i hci0 cc --role=m {0}'.format(ref_addr),
+		                  ready='hcitool -i hci0 con | grep -qi "ACL {0}"'.format(ref_addr)),
+		             Step('sniff', 'hcitool -i hci0 sniff {0} 0x0800 0x0800 0x01 0x00'.format(ref_addr)),
+		             Step('power', 'hcitool -i hci0 cmd 3F 64 B1 01 01 43 00 00 00 00 00 00',
+		                  ready='echo "$out" | grep -q "HCI Event: 0x0e"'),
+		             Step('sco', 'hcitool -i hci0 scc 11:11:11:11:11:11 1F40 1F40 0007 60 00 03C8')]
+		result = connection.send_script(step_list)
+		assert [i.exit_code for i in result] == [0, 0, 0, 0, 1]
+		assert result[4].output == ['Not connected.']
+		assert server.dut.controller_dict['hci0'].link_dict[('ACL', ref_addr)] == 0x0800
+	finally:
+		connection.close()
+		server.stop()
+
+
+def test_run_steps_failed(monkeypatch):
+	server = ssh_fake_dut.FakeDUTServer(dut=ssh_fake_dut.FakeDUT({'hci0': dut_addr, 'hci1': ref_addr},
+	                                                             sleep_scale=0)).start()
+	connection = ssh_basic.SSH(server.address, 'root', 'wireless')
+	monkeypatch.setattr(ssh_basic, 'open_connection_ssh', lambda: connection)
+	try:
+		assert ssh_send_cmd.run_steps([Step('noscan', 'hciconfig hci0 noscan')])[0].exit_code == 0
+		with pytest.raises(IOError, match=r'\[sco\].*Not connected'):
+			ssh_send_cmd.run_steps([Step('sco', 'hcitool -i hci0 scc {0} 1F40 1F40 0007 60 00 03C8\nhciconfig hci0 noscan'
+			                             .format(ref_addr)),
+			                        Step('piscan', 'hciconfig hci0 piscan')])
+		assert connection.send_script([Step('piscan', 'hcitool -i hci9 cmd 3F 23 02'),
+		                               Step('piscan', 'hciconfig hci0 piscan')])[1].exit_code is None
+		assert 'PSCAN' not in ''.join(connection.send_command('hciconfig hci0')[0])  # Later steps did not run
+	finally:
+		connection.close()
+		server.stop()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+import time
+import subprocess
+import src.my_ssh.ssh_script as ssh_script
+
+from src.my_ssh.ssh_script import Step
+
+my_steps = [Step('reset_dut', 'hciconfig hci0 reset', 1),
+            Step('acl', 'hcitool -i hci0 cc --role=m 11:22:33:44:55:66\nhcitool -i hci0 hcon -t acl', 0),
+            Step('bad', 'hcitool -i hci9 cmd 3F 23 02', 0)]
+my_output = ['@@CC_STEP_BEGIN 0',
+             '@@CC_STEP_END 0 0',
+             '@@CC_STEP_BEGIN 1',
+             'line one',
+             '',
+             'line two',
+             '@@CC_STEP_END 1 0',
+             '@@CC_STEP_BEGIN 2',
+             'Device is not available: No such device',
+             '@@CC_STEP_END 2 1']
+
+
+def test_build_script():
+	script = ssh_script.build_script(my_steps)
+	assert script.count('@@CC_STEP_BEGIN') == 3
+	assert script.count('sleep 1') == 1
+	assert 'hcitool -i hci0 cc --role=m 11:22:33:44:55:66\nhcitool -i hci0 hcon -t acl' in script
+
+
+def test_parse_script_output():
+	result = ssh_script.parse_script_output(my_steps, my_output)
+	assert [i.name for i in result] == ['reset_dut', 'acl', 'bad']
+	assert [i.exit_code for i in result] == [0, 0, 1]
+	assert result[1].output == ['line one', 'line two']
+	assert result[2].output == ['Device is not available: No such device']
+
+
+def test_parse_script_output_aborted():
+	result = ssh_script.parse_script_output(my_steps, my_output[:4])
+	assert result[1].exit_code is None
+	assert result[2].exit_code is None
+	assert result[2].output == []
+
+
+def test_ready_condition():
+	step_list = [Step('ready', 'echo "HCI Event: 0x0e plen 4"', ready='echo "$out" | grep -q "0x0e"'),
+	             Step('not_ready', 'true', ready='false', timeout=1)]
+	output = subprocess.run(['sh', '-s'], input=ssh_script.build_script(step_list), stdout=subprocess.PIPE,
+	                        universal_newlines=True).stdout
+	result = ssh_script.parse_script_output(step_list, output.splitlines())
+	assert result[0].exit_code == 0
+	assert result[0].output == ['HCI Event: 0x0e plen 4']
+	assert result[1].exit_code == ssh_script.READY_TIMEOUT
+
+
+def test_ready_condition_once():
+	step_list = [Step('no_event', 'echo "HCI Event: 0x0f plen 4"', ready='echo "$out" | grep -q "0x0e"', timeout=0)]
+	start = time.monotonic()
+	output = subprocess.run(['sh', '-s'], input=ssh_script.build_script(step_list), stdout=subprocess.PIPE,
+	                        universal_newlines=True).stdout
+	assert time.monotonic() - start < 1
+	assert ssh_script.parse_script_output(step_list, output.splitlines())[0].exit_code == ssh_script.READY_TIMEOUT
+
+
+def test_first_failed_step():
+	step_list = [Step('multi_line', 'false\necho "after false"'),
+	             Step('next', 'echo "next step"')]
+	process = subprocess.run(['sh', '-s'], input=ssh_script.build_script(step_list), stdout=subprocess.PIPE,
+	                         universal_newlines=True)
+	result = ssh_script.parse_script_output(step_list, process.stdout.splitlines())
+	assert process.returncode == 1
+	assert result[0].exit_code == 1 and result[0].output == []  # Failing line is not masked by the last one
+	assert result[1].exit_code is None and result[1].output == []
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+from concurrent.futures import ThreadPoolExecutor  # Post-processing worker
+
+
+class CasePipeline(object):
+	def __init__(self, results):
+		"""
+		Pipelined case results: post-processing of case N (summary, raw export) runs on one worker thread while
+		case N+1 is set up on the DUT. DUT setup and measurement stay in the caller thread, one after another,
+		so the measurement window is never shared.
+		:param results: ResultsStore
+		"""
+		self.results = results
+		self.executor = ThreadPoolExecutor(max_workers=1)  # One worker keeps case order
+		self.future = None
+
+	def wait(self):
+		"""
+		Wait for the pending case post-processing, re-raise its error
+		:return: case row of the pending case, None if nothing is pending
+		"""
+		if self.future is None:
+			return None
+		future, self.future = self.future, None
+		return future.result()
+
+	def append(self, case_name, reading_list, attrs=None):
+		"""
+		Queue one measured case for post-processing, same arguments as ResultsStore.append.
+		At most one case is pending, so readings held in memory stay bounded.
+		:param case_name: test case name
+		:param reading_list: one measure_*_dmm return per rail
+		:param attrs: raw readings metadata for export
+		:return: None
+		"""
+		self.wait()
+		self.future = self.executor.submit(self.results.append, case_name, reading_list, attrs)
+
+	def close(self):
+		"""
+		Finish pending post-processing, stop the worker and close results
+		:return: None
+		"""
+		try:
+			self.wait()
+		finally:
+			self.executor.shutdown()
+			self.results.close()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+import os
+import json
+import zipfile
+import importlib.util
+import numpy as np
+from src.my_misc.my_logging import create_logger
+log_raw = create_logger()
+
+
+def dataset_name(case_name):
+	"""
+	Convert test case name to HDF5 dataset name, '/' is the HDF5 group separator
+	:param case_name: test case name
+	:return: dataset name
+	"""
+	return str(case_name).replace('/', '_')
+
+
+class RawExport(object):
+	def __init__(self, file_name, rail_name_list, visa_address_list, dtype='float32', mode='w'):
+		"""
+		HDF5 sidecar of raw readings, one group per rail and one compressed dataset per case
+		:param file_name: HDF5 file name
+		:param rail_name_list: rail (worksheet) name list, same order as VISA address list
+		:param visa_address_list: instrument VISA address list
+		:param dtype: stored reading type: float32 or float64
+		:param mode: 'w': new file; 'a': keep datasets of a resumed run
+		"""
+		import h5py  # Optional dependency, NpzExport is used when it is not installed
+		self.file_name = file_name
+		self.rail_name_list = [str(i) for i in rail_name_list]
+		self.dtype = np.dtype(dtype)
+		self.file = h5py.File(file_name, mode)
+		self.file.attrs['unit'] = 'mA'
+		for rail_name, visa_address in zip(self.rail_name_list, visa_address_list):
+			self.file.require_group(rail_name).attrs['visa_address'] = str(visa_address)
+
+	def reference(self, case_name, rail):
+		"""
+		Reference of one case raw readings, written to the Excel raw row
+		:param case_name: test case name
+		:param rail: rail index
+		:return: '<file name>:/<rail name>/<case name>'
+		"""
+		return '{0}:/{1}/{2}'.format(os.path.basename(self.file_name), self.rail_name_list[rail],
+		                             dataset_name(case_name))
+
+	def write(self, case_name, rail, readings, attrs=None):
+		"""
+		Write raw readings of one case on one rail and flush, so a finished case survives an aborted run
+		:param case_name: test case name
+		:param rail: rail index
+		:param readings: readings array (mA)
+		:param attrs: dataset metadata, e.g. sample timer, trigger and sample count
+		:return: reference string, empty if there is no reading (stats only)
+		"""
+		if len(readings) == 0:
+			return ''
+		group = self.file[self.rail_name_list[rail]]
+		name = dataset_name(case_name)
+		if name in group:
+			del group[name]  # Re-measured case replaces the previous one
+		dataset = group.create_dataset(name, data=np.asarray(readings, dtype=self.dtype),
+		                               compression='gzip', shuffle=True)
+		dataset.attrs['case_name'] = str(case_name)
+		for key, value in (attrs or {}).items():
+			dataset.attrs[key] = value
+		self.file.flush()
+		return self.reference(case_name, rail)
+
+	def close(self):
+		"""
+		Close HDF5 file
+		:return: None
+		"""
+		if self.file:
+			self.file.close()
+			log_raw.info('Raw readings saved to {0}'.format(self.file_name))
+
+
+class NpzExport(RawExport):
+	def __init__(self, file_name, rail_name_list, visa_address_list, dtype='float32', mode='w'):
+		"""
+		NumPy .npz sidecar of raw readings when h5py is not installed, one compressed '<rail name>/<case name>.npy'
+		member per case, metadata in '<rail name>/<case name>.json'; np.load(file_name)['3_3/BT Idle'] reads a case
+		:param file_name: .npz file name
+		:param rail_name_list: rail (worksheet) name list, same order as VISA address list
+		:param visa_address_list: instrument VISA address list
+		:param dtype: stored reading type: float32 or float64
+		:param mode: 'w': new file; 'a': keep members of a resumed run
+		"""
+		self.file_name = file_name
+		self.rail_name_list = [str(i) for i in rail_name_list]
+		self.dtype = np.dtype(dtype)
+		self.file = True  # No handle kept open, every write appends to the archive and closes it
+		if mode == 'w' or not os.path.exists(file_name):
+			with zipfile.ZipFile(file_name, 'w') as archive:
+				archive.writestr('visa_address.json', json.dumps(dict(zip(self.rail_name_list,
+				                                                          map(str, visa_address_list)))))
+
+	def write(self, case_name, rail, readings, attrs=None):
+		"""
+		Append raw readings of one case on one rail, the archive is closed after each case so it survives an aborted run
+		:param case_name: test case name
+		:param rail: rail index
+		:param readings: readings array (mA)
+		:param attrs: metadata, e.g. sample timer, trigger and sample count
+		:return: reference string, empty if there is no reading (stats only)
+		"""
+		if len(readings) == 0:
+			return ''
+		name = '{0}/{1}'.format(self.rail_name_list[rail], dataset_name(case_name))
+		metadata = {'case_name': str(case_name), 'unit': 'mA'}
+		metadata.update({key: value.item() if isinstance(value, np.generic) else value
+		                 for key, value in (attrs or {}).items()})
+		with zipfile.ZipFile(self.file_name, 'a', compression=zipfile.ZIP_DEFLATED) as archive:
+			with archive.open(name + '.npy', 'w', force_zip64=True) as f:
+				np.lib.format.write_array(f, np.asarray(readings, dtype=self.dtype), allow_pickle=False)
+			archive.writestr(name + '.json', json.dumps(metadata, default=str))
+		return self.reference(case_name, rail)
+
+	def close(self):
+		"""
+		Nothing kept open, log the file name once
+		:return: None
+		"""
+		if self.file:
+			self.file = None
+			log_raw.info('Raw readings saved to {0}'.format(self.file_name))
+
+
+def open_raw_export(file_name, rail_name_list, visa_address_list, dtype='float32', mode='w'):
+	"""
+	Open raw readings sidecar, HDF5 with h5py, otherwise .npz next to it
+	:param file_name: HDF5 file name, empty to disable raw export
+	:param rail_name_list: rail (worksheet) name list
+	:param visa_address_list: instrument VISA address list
+	:param dtype: stored reading type: float32 or float64
+	:param mode: 'w': new file; 'a': keep datasets of a resumed run
+	:return: RawExport or NpzExport, None if disabled
+	"""
+	if not str(file_name).strip():
+		return None
+	if importlib.util.find_spec('h5py') is None and os.path.splitext(file_name)[1].lower() != '.npz':
+		file_name = os.path.splitext(file_name)[0] + '.npz'
+		log_raw.warning('h5py not installed, raw readings are saved to {0}, pls pip install h5py for HDF5'
+		                .format(file_name))
+	if os.path.splitext(file_name)[1].lower() == '.npz':
+		return NpzExport(file_name, rail_name_list, visa_address_list, dtype, mode)
+	return RawExport(file_name, rail_name_list, visa_address_list, dtype, mode)
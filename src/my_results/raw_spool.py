@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+import os
+import tempfile
+import threading
+import numpy as np
+from src.my_misc.my_logging import create_logger
+log_spool = create_logger()
+
+# Run-wide raw readings spool, opened by main_flow and closed at the end of the run
+_active_spool = None
+
+
+class RawSpool(object):
+	def __init__(self, directory, rail_count, capacity=1000000):
+		"""
+		Memory-mapped raw readings spool, float64 segment files per rail, every case gets its own region.
+		A segment is sized once when created and never resized, as a file with mapped views cannot be extended on
+		Windows; a case that does not fit in the current segment rolls over to a new one.
+		:param directory: spool file directory, empty for system temp directory
+		:param rail_count: rail (active DMM) count
+		:param capacity: readings capacity per segment, larger for a case of more readings
+		"""
+		self.directory = directory if str(directory).strip() else tempfile.gettempdir()
+		os.makedirs(self.directory, exist_ok=True)
+		self.dtype = np.dtype(np.float64)
+		self.capacity = int(capacity)
+		self.segment_list = [[] for _ in range(int(rail_count))]  # Segment file paths per rail, last one in use
+		self.size_list = [0] * int(rail_count)  # Readings used in the current segment
+		self.capacity_list = [0] * int(rail_count)  # Readings capacity of the current segment
+		self.lock = threading.Lock()  # Rails are allocated from concurrent DMM threads
+		for rail in range(int(rail_count)):
+			self._new_segment(rail, self.capacity)
+
+	def _new_segment(self, rail, capacity):
+		"""
+		Create the next segment file of one rail
+		:param rail: rail index
+		:param capacity: readings capacity
+		:return: None
+		"""
+		path = os.path.join(self.directory, 'raw_spool_{0}_{1}_{2}.bin'.format(os.getpid(), rail,
+		                                                                       len(self.segment_list[rail])))
+		with open(path, 'wb') as f:
+			f.truncate(capacity * self.dtype.itemsize)  # Sparse file, disk is used only when written
+		self.segment_list[rail].append(path)
+		self.size_list[rail] = 0
+		self.capacity_list[rail] = capacity
+
+	def allocate(self, rail, count):
+		"""
+		Reserve a region for one case on one rail
+		:param rail: rail index, same order as VISA address list
+		:param count: reading count
+		:return: float64 memmap of count readings, written in place by the acquisition
+		"""
+		count = int(count)
+		if count == 0:
+			return np.empty(0, dtype=self.dtype)
+		with self.lock:
+			if self.size_list[rail] + count > self.capacity_list[rail]:
+				self._new_segment(rail, max(self.capacity, count))
+			path = self.segment_list[rail][-1]
+			offset = self.size_list[rail]
+			self.size_list[rail] = offset + count
+		return np.memmap(path, dtype=self.dtype, mode='r+', offset=offset * self.dtype.itemsize, shape=(count,))
+
+	def close(self):
+		"""
+		Remove spool files, raw readings kept are the ones exported to HDF5. Views still mapped keep their file on
+		Windows, it is left in the spool directory and logged.
+		:return: None
+		"""
+		for path_list in self.segment_list:
+			for path in path_list:
+				try:
+					os.remove(path)
+				except OSError as err:
+					log_spool.info('Spool file {0} not removed: {1}'.format(path, err))
+
+
+def open_spool(directory, rail_count, capacity=1000000):
+	"""
+	Open run-wide raw readings spool
+	:param directory: spool file directory, empty for system temp directory
+	:param rail_count: rail (active DMM) count
+	:param capacity: readings capacity per segment file
+	:return: RawSpool
+	"""
+	global _active_spool
+	close_spool()
+	_active_spool = RawSpool(directory, rail_count, capacity)
+	return _active_spool
+
+
+def get_spool():
+	"""
+	Get run-wide raw readings spool
+	:return: RawSpool, None when no spool is opened
+	"""
+	return _active_spool
+
+
+def close_spool():
+	"""
+	Close run-wide raw readings spool
+	:return: None
+	"""
+	global _active_spool
+	if _active_spool is not None:
+		_active_spool.close()
+		_active_spool = None
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+import os
+import json
+import hashlib
+from datetime import datetime
+from src.my_misc.my_logging import create_logger
+log_journal = create_logger()
+
+# ConfigSnapshot fields a measurement depends on, a resumed run must match all of them
+fingerprint_field_list = ['chip_version', 'dut', 'ref', 'visa_address_active_list', 'dmm_backend',
+                          'trigger_count', 'sample_count', 'stats_only', 'current_range',
+                          'trig_src', 'trig_delay', 'sample_src', 'sample_timer', 'bt_power_index',
+                          'dmm_acquisition_mode', 'dmm_data_format']
+
+
+def fingerprint(snapshot, dut_bd_addr, ref_bd_addr):
+	"""
+	Fingerprint of measurement setup: config.ini measurement settings, DUT and Ref BD addr
+	:param snapshot: config_basic.ConfigSnapshot
+	:param dut_bd_addr: DUT BD addr
+	:param ref_bd_addr: Ref BD addr
+	:return: sha1 hex string
+	"""
+	setup = {name: getattr(snapshot, name) for name in fingerprint_field_list}
+	setup['bt_power_index'] = {key: dict(value) for key, value in snapshot.bt_power_index.items()}
+	setup['dut_bd_addr'] = str(dut_bd_addr)
+	setup['ref_bd_addr'] = str(ref_bd_addr)
+	return hashlib.sha1(json.dumps(setup, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def read_journal(file_name):
+	"""
+	Read journal records, a line cut by an aborted run is skipped
+	:param file_name: journal file name
+	:return: record dict list in file order
+	"""
+	record_list = []
+	if not os.path.exists(file_name):
+		return record_list
+	with open(file_name, encoding='utf-8') as f:
+		for line_number, line in enumerate(f, 1):
+			if not line.strip():
+				continue
+			try:
+				record_list.append(json.loads(line))
+			except ValueError:
+				log_journal.info('Journal {0} line {1} is incomplete, skipped'.format(file_name, line_number))
+	return record_list
+
+
+class ResultsJournal(object):
+	def __init__(self, file_name, setup_fingerprint, resume=False):
+		"""
+		Append-only results journal, one JSON line per measured case, written and synced as soon as the case is done.
+		Records of all runs stay in the file, each record carries its run id and setup fingerprint.
+		:param file_name: journal file name
+		:param setup_fingerprint: fingerprint of measurement setup
+		:param resume: continue the last run with the same fingerprint, new run if there is none
+		"""
+		self.file_name = file_name
+		self.fingerprint = setup_fingerprint
+		self.run = None
+		self.record_list = []  # Records of the resumed run, last measurement of a case wins
+		if resume:
+			record_list = [i for i in read_journal(file_name) if i.get('fingerprint') == setup_fingerprint]
+			if record_list:
+				self.run = record_list[-1]['run']
+				record_dict = {}
+				for record in record_list:
+					if record['run'] == self.run:
+						record_dict.pop(record['case'], None)
+						record_dict[record['case']] = record
+				self.record_list = list(record_dict.values())
+				log_journal.info('Resume run {0}, {1} cases already measured'.format(self.run, len(self.record_list)))
+			else:
+				log_journal.info('No run to resume in {0} for this setup, start a new run'.format(file_name))
+		if self.run is None:
+			self.run = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+		directory = os.path.dirname(os.path.abspath(file_name))
+		os.makedirs(directory, exist_ok=True)
+		self.file = open(file_name, 'a', encoding='utf-8')
+		if self.file.tell() > 0:
+			with open(file_name, 'rb') as f:
+				f.seek(-1, os.SEEK_END)
+				if f.read(1) != b'\n':
+					self.file.write('\n')  # End the line cut by an aborted run, so the next record stays readable
+
+	@property
+	def case_name_list(self):
+		"""
+		Get case names already measured in this run
+		:return: case name list
+		"""
+		return [i['case'] for i in self.record_list]
+
+	def write(self, case_name, summary, raw_reference_list):
+		"""
+		Append one measured case
+		:param case_name: test case name
+		:param summary: summary list per rail: average, max, min, sdev, count, CI half width, reading count,
+		                waveform columns
+		:param raw_reference_list: raw readings reference per rail, '' if not exported
+		:return: None
+		"""
+		record = {'run': self.run, 'fingerprint': self.fingerprint, 'case': str(case_name),
+		          'time': datetime.now().isoformat(), 'summary': summary, 'raw': raw_reference_list}
+		self.file.write(json.dumps(record) + '\n')
+		self.file.flush()
+		os.fsync(self.file.fileno())  # Survives a killed process or host crash
+		self.record_list.append(record)
+
+	def close(self):
+		"""
+		Close journal file
+		:return: None
+		"""
+		if not self.file.closed:
+			self.file.close()
+
+
+def open_journal(file_name, setup_fingerprint, resume=False):
+	"""
+	Open results journal
+	:param file_name: journal file name, empty to disable journal
+	:param setup_fingerprint: fingerprint of measurement setup
+	:param resume: continue the last run with the same fingerprint
+	:return: ResultsJournal, None if disabled
+	"""
+	if not str(file_name).strip():
+		return None
+	return ResultsJournal(file_name, setup_fingerprint, resume)
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+import numpy as np
+from pandas import DataFrame
+from src.my_misc.my_timer import Span
+from src.my_misc.my_logging import create_logger
+import src.my_dmm.dmm_waveform as dmm_waveform
+
+log_store = create_logger()
+
+# Summary columns of one case on one rail, same order as measure_*_dmm returns after raw readings
+summary_name_list = ['1.Average', '2.Max', '3.Min', '4.Sdev', '5.Count']
+raw_name = '6.Raw'
+# Achieved precision columns, after the summary columns in measure_*_dmm returns and after raw readings in reports
+precision_name_list = ['7.CI', '8.Samples']
+# Current event columns from dmm_waveform.analyze of raw readings, after precision columns
+waveform_name_list = ['9.Events', '10.Charge (uC)', '11.Width (ms)', '12.Duty Cycle', '13.Floor (mA)',
+                      '14.Interval (s)', '15.Expected (s)']
+# Report number format of precision and waveform columns
+extra_format_list = ['.4f', '.0f'] + ['.0f', '.3f', '.3f', '.4f', '.4f', '.4f', '.4f']
+
+
+def format_summary(summary):
+	"""
+	Report values of the summary columns, the only formatting of DMM statistics for reports and logs
+	:param summary: average, max, min, sdev, count
+	:return: formatted summary list
+	"""
+	return [float(format(i, '.3f')) for i in summary[:4]] + [float(format(summary[4], '.0f'))]
+
+
+def format_raw(readings):
+	"""
+	Comma separated raw readings for logs, never written to the report: an Excel cell holds at most 32767 characters
+	:param readings: readings array (mA)
+	:return: comma separated readings
+	"""
+	return ','.join(map(str, np.asarray(readings).tolist()))  # Python floats, no NumPy scalar per reading
+
+
+class ResultsStore(object):
+	def __init__(self, rail_count, capacity=64, raw_export=None, journal=None):
+		"""
+		Columnar store of test case results, summary in preallocated NumPy columns, raw readings as typed arrays
+		:param rail_count: rail (active DMM) count
+		:param capacity: initial case capacity, doubled when full
+		:param raw_export: raw_export.RawExport streaming raw readings to file as each case is appended, or None
+		:param journal: results_journal.ResultsJournal persisting each appended case, or None
+		"""
+		self.rail_count = int(rail_count)
+		self.case_name_list = []
+		self.case_index = {}  # case name -> row, names are unique, a repeated case is stored as '<name> (2)' etc.
+		self.summary = np.empty((int(capacity), self.rail_count,
+		                         len(summary_name_list) + len(precision_name_list) + len(waveform_name_list)),
+		                        dtype=np.float64)
+		self.raw = {}  # (row, rail) -> float64 readings (mA), memmap views when acquired into raw_spool
+		self.raw_export = raw_export
+		self.raw_reference = {}  # (row, rail) -> raw readings reference in export file
+		self.journal = journal
+
+	def __len__(self):
+		"""
+		Get measured case count
+		:return: case count
+		"""
+		return len(self.case_name_list)
+
+	def append(self, case_name, reading_list, attrs=None):
+		"""
+		Append one measured case
+		:param case_name: test case name, made unique if already in the store
+		:param reading_list: one measure_*_dmm return per rail: raw data array, mean, max, min, std, count,
+		                     CI half width, reading count; precision is left empty (NaN) when not given
+		:param attrs: raw readings metadata for export, e.g. sample timer, trigger and sample count; with sample_interval
+		              (s), raw readings are analyzed for current events expected every event_interval (s), per trigger
+		              of sample_count readings as triggers are not contiguous in time
+		:return: case row
+		"""
+		with Span('post_process', case_name):  # Runs on the CasePipeline worker while the next case is set up
+			return self._append(case_name, reading_list, attrs)
+
+	def _append(self, case_name, reading_list, attrs):
+		"""
+		Append one measured case, see append
+		:return: case row
+		"""
+		row = self._new_row()
+		case_name = self._unique_name(case_name)
+		self.summary[row] = np.nan
+		waveform_col = len(summary_name_list) + len(precision_name_list)
+		for rail, reading in enumerate(reading_list):
+			self.summary[row, rail, :len(reading) - 1] = reading[1:]
+			self.raw[(row, rail)] = np.asarray(reading[0], dtype=np.float64)  # No copy of float64 or spool memmap
+			if attrs and 'sample_interval' in attrs and len(self.raw[(row, rail)]):
+				self.summary[row, rail, waveform_col:] = self._analyze(case_name, self.raw[(row, rail)], attrs)
+			if self.raw_export is not None:
+				self.raw_reference[(row, rail)] = self.raw_export.write(case_name, rail, self.raw[(row, rail)], attrs)
+		self.case_name_list.append(str(case_name))
+		self.case_index[str(case_name)] = row
+		if self.journal is not None:
+			self.journal.write(case_name, self.summary[row].tolist(),
+			                   [self.raw_reference.get((row, rail), '') for rail in range(self.rail_count)])
+		return row
+
+	@staticmethod
+	def _analyze(case_name, readings, attrs):
+		"""
+		Current event analytics of one case on one rail, one segment per trigger
+		:param case_name: test case name
+		:param readings: float64 readings array (mA)
+		:param attrs: raw readings metadata with sample_interval, optional sample_count and event_interval
+		:return: WaveformStats, NaN if readings are not whole triggers of sample count readings
+		"""
+		segment_length = int(attrs.get('sample_count') or len(readings))
+		if segment_length <= 0 or len(readings) % segment_length:
+			log_store.warning('[{0}] {1} readings are not whole triggers of {2} readings, no event analytics'
+			                  .format(case_name, len(readings), segment_length))
+			return [np.nan] * len(waveform_name_list)
+		return dmm_waveform.analyze(readings, attrs['sample_interval'], attrs.get('event_interval'), segment_length)
+
+	def restore(self, case_name, summary, raw_reference_list):
+		"""
+		Append one case measured by an earlier run, from a results journal record; raw readings stay in the export file
+		:param case_name: test case name
+		:param summary: summary list per rail: average, max, min, sdev, count[, precision and waveform columns]
+		:param raw_reference_list: raw readings reference per rail
+		:return: case row
+		"""
+		row = self._new_row()
+		case_name = self._unique_name(case_name)
+		summary = np.asarray(summary, dtype=np.float64)
+		self.summary[row] = np.nan  # Records written before precision or waveform columns have none
+		self.summary[row, :, :summary.shape[1]] = summary
+		for rail, reference in enumerate(raw_reference_list):
+			if reference:
+				self.raw_reference[(row, rail)] = reference
+		self.case_name_list.append(str(case_name))
+		self.case_index[str(case_name)] = row
+		return row
+
+	def _unique_name(self, case_name):
+		"""
+		Get case name not in the store yet, a repeated case gets a count suffix instead of replacing a report column
+		:param case_name: test case name
+		:return: unique case name
+		"""
+		case_name = str(case_name)
+		name, count = case_name, 1
+		while name in self.case_index:
+			count += 1
+			name = '{0} ({1})'.format(case_name, count)
+		return name
+
+	def _new_row(self):
+		"""
+		Get next case row, grow summary columns when full
+		:return: case row
+		"""
+		row = len(self.case_name_list)
+		if row == len(self.summary):
+			# Amortized growth, existing columns are copied only when capacity doubles
+			summary = np.empty((2 * row,) + self.summary.shape[1:], dtype=np.float64)
+			summary[:row] = self.summary
+			self.summary = summary
+		return row
+
+	def raw_readings(self, case_name, rail):
+		"""
+		Get raw readings of one case on one rail
+		:param case_name: test case name
+		:param rail: rail index, same order as VISA address list
+		:return: float64 readings array (mA)
+		"""
+		return self.raw[(self.case_index[str(case_name)], int(rail))]
+
+	def to_dataframe(self, rail, include_raw=True):
+		"""
+		Materialize one rail as DataFrame, reading statistics as index and test cases as columns
+		:param rail: rail index, same order as VISA address list
+		:param include_raw: add raw readings row: reference in the export file, empty when not exported
+		:return: DataFrame
+		"""
+		summary = self.summary[:len(self), int(rail)]
+		data = {}
+		for row, case_name in enumerate(self.case_name_list):
+			column = format_summary(summary[row])
+			if include_raw:
+				column.append(self.raw_reference.get((row, int(rail)), ''))
+			column += [float(format(value, spec)) for value, spec in zip(summary[row, 5:], extra_format_list)]
+			data[case_name] = column
+		index = summary_name_list + [raw_name] if include_raw else list(summary_name_list)
+		index += precision_name_list + waveform_name_list
+		return DataFrame(data, index=index, columns=self.case_name_list)
+
+	def to_dataframe_list(self, include_raw=True):
+		"""
+		Materialize all rails as DataFrame list
+		:param include_raw: add raw readings reference row
+		:return: DataFrame list, one per rail
+		"""
+		return [self.to_dataframe(i, include_raw) for i in range(self.rail_count)]
+
+	def close(self):
+		"""
+		Close raw readings export file and journal, release raw readings, summaries and references are kept
+		:return: None
+		"""
+		self.raw.clear()  # Drop spool memmaps, so spool files can be removed
+		if self.raw_export is not None:
+			self.raw_export.close()
+			self.raw_export = None
+		if self.journal is not None:
+			self.journal.close()
+			self.journal = None
@@ -2,13 +2,23 @@
 # -*- coding: utf-8 -*-
 # Author: Alex Wang
 
+import socket
+import threading
 from paramiko import client
+from paramiko.ssh_exception import SSHException
 import src.my_config.config_basic as config_basic
+import src.my_ssh.ssh_script as ssh_script
+import src.my_ssh.ssh_sim as ssh_sim
 from src.my_misc.my_decorator import hci_return_header_footer
+from src.my_misc.my_timer import Span
 from src.my_misc.my_logging import create_logger
 
 log = create_logger()
 
+# Process-wide SSH connection, reused by every helper until close_connection_ssh()
+_connection = None
+_connection_lock = threading.Lock()
+
 
 class SSH:
 	client = None
@@ -26,12 +36,60 @@ class SSH:
 		self.username = username
 		self.userPassword = password
 		self.rootPassword = password
+		self.connect()
+
+	@Span('ssh_connect')
+	def connect(self):
+		"""
+		Open authenticated SSH transport, keepalive detects a dropped link. Address may carry a port, e.g.
+		127.0.0.1:2222 for ssh_fake_dut
+		:return: None
+		"""
 		log.info("Connecting to server on ip address {0}".format(str(self.address)))
+		host, _, port = str(self.address).partition(':')
 		self.client = client.SSHClient()
 		self.client.set_missing_host_key_policy(client.AutoAddPolicy())
-		self.client.connect(self.address, username=self.username, password=self.userPassword, look_for_keys=False)
+		self.client.connect(host, port=int(port) if port else 22, username=self.username, password=self.userPassword,
+		                    look_for_keys=False)
+		self.transport = self.client.get_transport()
+		self.transport.set_keepalive(30)
+
+	def is_active(self):
+		"""
+		Check SSH transport is still alive
+		:return: True if transport is active
+		"""
+		return self.transport is not None and self.transport.is_active()
+
+	def close(self):
+		"""
+		Close SSH connection
+		:return: None
+		"""
+		if self.client:
+			self.client.close()
+		self.client = None
+		self.transport = None
+
+	def exec_command(self, command, get_pty=True):
+		"""
+		Open exec channel on the shared transport, reconnect once if the link dropped
+		:param command: cmd string
+		:param get_pty: request a pseudo terminal
+		:return: stdin, stdout, stderr
+		"""
+		if not self.is_active():
+			self.connect()
+		try:
+			return self.client.exec_command(command, get_pty=get_pty)
+		except (SSHException, EOFError, socket.error) as err:
+			log.info("SSH link lost ({0}), reconnecting".format(err))
+			self.close()
+			self.connect()
+			return self.client.exec_command(command, get_pty=get_pty)
 
 	@hci_return_header_footer()
+	@Span('ssh_command')
 	def send_command(self, command):
 		"""
 		Send SSH cmd
@@ -39,7 +97,7 @@ class SSH:
 		:return: [0] date return [1] error return
 		"""
 		if self.client:
-			stdin, stdout, stderr = self.client.exec_command(command, get_pty=True)
+			stdin, stdout, stderr = self.exec_command(command)
 			# stdin, stdout, stderr = self.client.exec_command('sudo ' + command)
 			# stdin.write(self.rootPassword + '\n')
 			stdin.flush()
@@ -78,17 +136,60 @@ class SSH:
 		else:
 			log.info("Connection not opened.")
 
+	@hci_return_header_footer()
+	@Span('ssh_script')
+	def send_script(self, step_list):
+		"""
+		Send steps as one shell script over a single exec channel
+		:param step_list: ssh_script.Step list
+		:return: ssh_script.StepResult list
+		"""
+		stdin, stdout, stderr = self.exec_command('sh -s', get_pty=False)
+		stdin.write(ssh_script.build_script(step_list))
+		stdin.flush()
+		stdin.channel.shutdown_write()
+		output_lines = str(stdout.read(), 'utf8').splitlines()
+		stdout.channel.recv_exit_status()
+		result_list = ssh_script.parse_script_output(step_list, output_lines)
+		for i in result_list:
+			log.info('[{0}] exit code: {1}\n{2}'.format(i.name, i.exit_code, '\n'.join(i.output)))
+		return result_list
+
 
 def open_connection_ssh():
 	"""
-	Open SSH connection based on server, username and password
+	Get process-wide SSH connection based on server, username and password, open it on first use
 	:return: SSH connection
 	"""
-	ssh_server = config_basic.config_ssh_server()
-	ssh_username = config_basic.config_ssh_username()
-	ssh_password = config_basic.config_ssh_password()
-	connection = SSH(ssh_server, ssh_username, ssh_password)
-	return connection
+	global _connection
+	with _connection_lock:
+		if _connection is None or not _connection.is_active():
+			if _connection is not None:
+				_connection.close()
+			ssh_server = config_basic.config_ssh_server()
+			ssh_username = config_basic.config_ssh_username()
+			ssh_password = config_basic.config_ssh_password()
+			# DUT host backend, SIM runs against an in-process simulated DUT host
+			if config_basic.config_ssh_backend() == 'SIM':
+				_connection = ssh_sim.SimSSH(ssh_server, ssh_username, ssh_password,
+				                             {config_basic.config_dut(): '00:11:22:33:44:55',
+				                              config_basic.config_ref(): '00:11:22:33:44:66'},
+				                             config_basic.config_ssh_sim_time_scale())
+			else:
+				_connection = SSH(ssh_server, ssh_username, ssh_password)
+		return _connection
+
+
+def close_connection_ssh():
+	"""
+	Close process-wide SSH connection
+	:return: None
+	"""
+	global _connection
+	with _connection_lock:
+		if _connection is not None:
+			_connection.close()
+			_connection = None
 
 
 """
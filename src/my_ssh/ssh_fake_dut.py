@@ -0,0 +1,512 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+import re
+import sys
+import time
+import shlex
+import socket
+import argparse
+import threading
+from collections import OrderedDict
+import paramiko
+import src.my_ssh.ssh_script as ssh_script
+from src.my_misc.my_logging import create_logger
+
+log_fake = create_logger()
+
+# HCI OGF/OCF of commands changing controller state
+opcode_write_scan_enable = (0x03, 0x001A)
+opcode_vendor_sleep = (0x3F, 0x0023)
+opcode_vendor_power = (0x3F, 0x0064)
+opcode_le_adv_enable = (0x08, 0x000A)
+opcode_le_scan_enable = (0x08, 0x000C)
+opcode_le_create_connection = (0x08, 0x000D)
+
+regex_wait_until = re.compile(r"^\[ \$rc -eq 0 \] && \{ wait_until (?P<timeout>\S+) (?P<condition>.*) \|\| rc=\$\?; \}$")
+regex_step_end = re.compile(r'^echo "' + ssh_script.STEP_END + r' (?P<index>[0-9]+) \$rc"$')
+
+
+class Controller(object):
+	def __init__(self, hci, address):
+		"""
+		Emulated controller state of one hci interface
+		:param hci: hci interface, e.g. hci0
+		:param address: BD addr
+		"""
+		self.hci = hci
+		self.address = address.upper()
+		self.reset()
+
+	def reset(self):
+		"""
+		HCI reset: scans, advertising and links are cleared, interface stays up
+		:return: None
+		"""
+		self.up = True
+		self.pscan = False
+		self.iscan = False
+		self.deep_sleep = False
+		self.power_index = None
+		self.le_adv = False
+		self.le_scan = False
+		self.link_dict = OrderedDict()  # (link type, BD addr) -> sniff interval (slots), 0: active mode
+
+
+class FakeDUT(object):
+	def __init__(self, hci_dict=None, latency=0.0, sleep_scale=1.0):
+		"""
+		Emulated DUT host: hciconfig and hcitool (cmd, cc, con, hcon, sniff, scc) against per-interface controller
+		state, plus the shell subset ssh_script.build_script emits, so case scripts run unchanged
+		:param hci_dict: hci interface -> BD addr, default hci0 and hci1
+		:param latency: time (s) of every hciconfig/hcitool call
+		:param sleep_scale: scale of sleep in scripts. 1.0: real time; 0: no sleep
+		"""
+		hci_dict = hci_dict or {'hci0': '00:11:22:33:44:55', 'hci1': '00:11:22:33:44:66'}
+		self.controller_dict = OrderedDict((hci, Controller(hci, address)) for hci, address in hci_dict.items())
+		self.latency = float(latency)
+		self.sleep_scale = float(sleep_scale)
+		self.lock = threading.RLock()  # Exec channels of one or more connections run in parallel
+		self.command_count = 0
+
+	def _controller(self, hci):
+		"""
+		Get controller of hci interface
+		:param hci: hci interface
+		:return: Controller, None if there is no such interface
+		"""
+		return self.controller_dict.get(hci)
+
+	def _peer(self, address):
+		"""
+		Get local controller owning BD addr, e.g. Ref of a DUT link
+		:param address: BD addr
+		:return: Controller, None if the address is remote
+		"""
+		for controller in self.controller_dict.values():
+			if controller.address == str(address).upper():
+				return controller
+		return None
+
+	def _sleep(self, t):
+		"""
+		Sleep scaled by sleep scale
+		:param t: time in second at real time
+		:return: None
+		"""
+		if self.sleep_scale > 0 and t > 0:
+			time.sleep(t * self.sleep_scale)
+
+	def hciconfig(self, argv):
+		"""
+		hciconfig [hciX [reset|up|down|noscan|pscan|iscan|piscan]]
+		:param argv: arguments after hciconfig
+		:return: output line list, exit code
+		"""
+		if not argv:
+			controller_list = list(self.controller_dict.values())
+		else:
+			controller = self._controller(argv[0])
+			if controller is None:
+				return ["Can't get device info: No such device"], 1
+			controller_list = [controller]
+			if len(argv) > 1:
+				command = argv[1]
+				if command == 'reset':
+					self._drop_links(controller)
+					controller.reset()
+				elif command in ('up', 'down'):
+					controller.up = command == 'up'
+				elif command in ('noscan', 'pscan', 'iscan', 'piscan'):
+					controller.pscan = command in ('pscan', 'piscan')
+					controller.iscan = command in ('iscan', 'piscan')
+				else:
+					return ['Unsupported command {0}'.format(command)], 1
+				return [], 0
+		line_list = []
+		for controller in controller_list:
+			flag_list = ['UP RUNNING' if controller.up else 'DOWN']
+			flag_list += [name for name, enable in (('PSCAN', controller.pscan), ('ISCAN', controller.iscan)) if enable]
+			line_list.append('{0}:\tType: Primary  Bus: USB'.format(controller.hci))
+			line_list.append('\tBD Address: {0}  ACL MTU: 1021:8  SCO MTU: 120:6'.format(controller.address))
+			line_list.append('\t' + ' '.join(flag_list))
+			line_list.append('')
+		return line_list, 0
+
+	def _drop_links(self, controller):
+		"""
+		Drop links of a controller and their local peer ends
+		:param controller: Controller
+		:return: None
+		"""
+		for link_type, address in controller.link_dict:
+			peer = self._peer(address)
+			if peer is not None:
+				peer.link_dict.pop((link_type, controller.address), None)
+		controller.link_dict.clear()
+
+	def _add_link(self, controller, link_type, address):
+		"""
+		Add link to controller, and to the local peer end if the address is local
+		:param controller: Controller
+		:param link_type: ACL, SCO or LE
+		:param address: remote BD addr
+		:return: None
+		"""
+		controller.link_dict[(link_type, str(address).upper())] = 0
+		peer = self._peer(address)
+		if peer is not None:
+			peer.link_dict[(link_type, controller.address)] = 0
+
+	def hcitool(self, argv):
+		"""
+		hcitool -i hciX cmd|cc|con|hcon|sniff|scc ...
+		:param argv: arguments after hcitool
+		:return: output line list, exit code
+		"""
+		if len(argv) < 3 or argv[0] != '-i':
+			return ['Usage: hcitool -i <hciX> <command> [command parameters]'], 1
+		controller = self._controller(argv[1])
+		if controller is None or not controller.up:
+			return ['Device is not available: No such device'], 1
+		command, args = argv[2], argv[3:]
+		if command == 'cmd':
+			return self._hci_cmd(controller, args)
+		if command == 'con':
+			return (['Connections:'] + ['\t< {0} {1} handle {2} state 1 lm MASTER'.format(link_type, address, i + 1)
+			                            for i, (link_type, address) in enumerate(controller.link_dict)]), 0
+		address = [i for i in args if not i.startswith('-')]
+		if command == 'cc' and address:
+			self._add_link(controller, 'ACL', address[0])
+			return [], 0
+		if command == 'hcon':
+			return [], 0  # Vendor link setup, no state change
+		if command in ('sniff', 'scc') and address:
+			acl_key = ('ACL', address[0].upper())
+			if acl_key not in controller.link_dict:
+				return ['Not connected.'], 1
+			if command == 'sniff':
+				controller.link_dict[acl_key] = int(address[1], 16) if len(address) > 1 else 0
+			else:
+				self._add_link(controller, 'SCO', address[0])
+			return [], 0
+		return ['Unknown command - {0}'.format(command)], 1
+
+	def _hci_cmd(self, controller, args):
+		"""
+		hcitool cmd <ogf> <ocf> [parameters]: apply state change and answer Command Complete
+		:param controller: Controller
+		:param args: ogf, ocf and parameter bytes as hex strings
+		:return: output line list, exit code
+		"""
+		try:
+			ogf, ocf = int(args[0], 16), int(args[1], 16)
+			param = [int(i, 16) for i in args[2:]]
+		except (IndexError, ValueError):
+			return ['Usage: hcitool cmd <ogf> <ocf> [parameters]'], 1
+		opcode = (ogf, ocf)
+		if opcode == opcode_write_scan_enable and param:
+			controller.iscan, controller.pscan = bool(param[0] & 1), bool(param[0] & 2)
+		elif opcode == opcode_vendor_sleep and param:
+			controller.deep_sleep = param[0] == 0x02
+		elif opcode == opcode_vendor_power and len(param) > 3 and param[0] == 0xB1:
+			controller.power_index = param[3]
+		elif opcode == opcode_le_adv_enable and param:
+			controller.le_adv = bool(param[0])
+		elif opcode == opcode_le_scan_enable and param:
+			controller.le_scan = bool(param[0])
+		elif opcode == opcode_le_create_connection and len(param) >= 12:
+			address = ':'.join('{0:02X}'.format(i) for i in reversed(param[6:12]))  # Peer address is little endian
+			self._add_link(controller, 'LE', address)
+		opcode_value = (ogf << 10) | ocf
+		return ['< HCI Command: ogf 0x{0:02x}, ocf 0x{1:04x}, plen {2}'.format(ogf, ocf, len(param)),
+		        '  ' + ' '.join('{0:02X}'.format(i) for i in param),
+		        '> HCI Event: 0x0e plen 4',
+		        '  01 {0:02X} {1:02X} 00'.format(opcode_value & 0xFF, opcode_value >> 8)], 0
+
+	def condition(self, condition, out=''):
+		"""
+		Evaluate ready condition: '[!] <cmd> | grep [-q] [-i] <pattern>' parts joined by ' && '
+		:param condition: condition string
+		:param out: "$out" of the step
+		:return: True if every part holds
+		"""
+		for part in condition.split(' && '):
+			part = part.strip()
+			negate = part.startswith('! ')
+			if negate:
+				part = part[2:]
+			source, _, grep = part.partition(' | ')
+			if source.strip() == 'echo "$out"':
+				line_list = out.splitlines()
+			else:
+				line_list = self.run_command(source)[0]
+			argv = shlex.split(grep)
+			pattern = [i for i in argv[1:] if not i.startswith('-')][0]
+			ignore_case = '-qi' in argv or '-i' in argv
+			if ignore_case:
+				found = any(pattern.lower() in i.lower() for i in line_list)
+			else:
+				found = any(pattern in i for i in line_list)
+			if found == negate:
+				return False
+		return True
+
+	def wait_until(self, timeout, condition, out=''):
+		"""
+		wait_until shell function: poll condition every 0.1s
+		:param timeout: timeout (s)
+		:param condition: condition string
+		:param out: "$out" of the step
+		:return: exit code 0, or ssh_script.READY_TIMEOUT
+		"""
+		end_time = time.monotonic() + float(timeout)
+		while not self.condition(condition, out):
+			if time.monotonic() >= end_time:
+				return ssh_script.READY_TIMEOUT
+			time.sleep(0.1)
+		return 0
+
+	def run_command(self, line, out=''):
+		"""
+		Run one command line
+		:param line: command line
+		:param out: "$out" of the running step
+		:return: output line list, exit code
+		"""
+		argv = shlex.split(line)
+		if not argv:
+			return [], 0
+		if argv[0] in ('hciconfig', 'hcitool'):
+			if self.latency > 0:
+				time.sleep(self.latency)
+			with self.lock:
+				self.command_count += 1
+				return getattr(self, argv[0])(argv[1:])
+		if argv[0] == 'sleep':
+			self._sleep(float(argv[1]))
+			return [], 0
+		if argv[0] == 'echo':
+			return [' '.join(argv[1:])], 0
+		if argv[0] == 'wait_until':
+			return [], self.wait_until(argv[1], argv[2], out)
+		return ['sh: {0}: not found'.format(argv[0])], 127
+
+	def run_command_list(self, command):
+		"""
+		Run newline separated command lines, e.g. ssh_basic.SSH.send_command
+		:param command: command string
+		:return: output line list, exit code of the last line
+		"""
+		output_list, exit_code = [], 0
+		for line in str(command).splitlines():
+			output, exit_code = self.run_command(line)
+			output_list += output
+		return output_list, exit_code
+
+	def run_script(self, script):
+		"""
+		Run a case script from ssh_script.build_script
+		:param script: script string
+		:return: output line list, exit code of the first failed step or 0
+		"""
+		output_list = []
+		line_list = script.splitlines()
+		i = 0
+		out, rc = '', 0
+		while i < len(line_list):
+			line = line_list[i]
+			i += 1
+			match_wait = regex_wait_until.match(line)
+			match_end = regex_step_end.match(line)
+			if line == 'wait_until() {':
+				while i < len(line_list) and line_list[i] != '}':
+					i += 1  # Shell function definition, emulated by wait_until
+				i += 1
+			elif line == 'out=$({':
+				step_output, rc, errexit = [], 0, False
+				while i < len(line_list) and line_list[i] != '} 2>&1)':
+					if line_list[i] == 'set -e':
+						errexit = True
+					elif not (errexit and rc):  # set -e: lines after the first failing one do not run
+						output, rc = self.run_command(line_list[i], '\n'.join(step_output))
+						step_output += output
+					i += 1
+				i += 1
+				out = '\n'.join(step_output)
+			elif line == 'rc=$?':
+				pass
+			elif line == '[ -n "$out" ] && echo "$out"':
+				if out:
+					output_list += out.splitlines()
+			elif match_wait:
+				if rc == 0:
+					rc = self.wait_until(match_wait.group('timeout'), shlex.split(match_wait.group('condition'))[0],
+					                     out)
+			elif match_end:
+				output_list.append('{0} {1} {2}'.format(ssh_script.STEP_END, match_end.group('index'), rc))
+			elif line == '[ $rc -eq 0 ] || exit $rc':
+				if rc:
+					return output_list, rc
+			else:
+				output, exit_code = self.run_command(line, out)
+				output_list += output
+		return output_list, 0
+
+
+class _ServerInterface(paramiko.ServerInterface):
+	def __init__(self, server):
+		"""
+		Paramiko server side of one connection: password auth, session channels, exec requests
+		:param server: FakeDUTServer
+		"""
+		self.server = server
+
+	def check_auth_password(self, username, password):
+		if (username, password) == (self.server.username, self.server.password):
+			return paramiko.AUTH_SUCCESSFUL
+		return paramiko.AUTH_FAILED
+
+	def get_allowed_auths(self, username):
+		return 'password'
+
+	def check_channel_request(self, kind, chanid):
+		if kind == 'session':
+			return paramiko.OPEN_SUCCEEDED
+		return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+	def check_channel_pty_request(self, channel, term, width, height, pixelwidth, pixelheight, modes):
+		return True
+
+	def check_channel_exec_request(self, channel, command):
+		threading.Thread(target=self.server.exec_command, args=(channel, command.decode('utf-8')),
+		                 daemon=True).start()
+		return True
+
+
+class FakeDUTServer(object):
+	def __init__(self, host='127.0.0.1', port=0, username='root', password='wireless', dut=None):
+		"""
+		Local SSH server emulating the DUT host, for ssh_basic.SSH without hardware, SSH_Server = <host>:<port>
+		:param host: listen address
+		:param port: listen port, 0 for a free port
+		:param username: login username
+		:param password: login password
+		:param dut: FakeDUT, default hci0 and hci1 without latency
+		"""
+		self.username = username
+		self.password = password
+		self.dut = dut or FakeDUT()
+		self.host_key = paramiko.ECDSAKey.generate()
+		self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+		self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+		self.socket.bind((host, int(port)))
+		self.socket.listen(5)
+		self.transport_list = []
+		self.thread = None
+		self.running = False
+
+	@property
+	def address(self):
+		"""
+		Get SSH_Server setting of this server
+		:return: '<host>:<port>'
+		"""
+		host, port = self.socket.getsockname()[:2]
+		return '{0}:{1}'.format(host, port)
+
+	def start(self):
+		"""
+		Accept connections on a background thread
+		:return: self
+		"""
+		self.running = True
+		self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+		self.thread.start()
+		log_fake.info('Fake DUT host on {0}'.format(self.address))
+		return self
+
+	def serve_forever(self):
+		"""
+		Accept connections until stopped
+		:return: None
+		"""
+		while self.running:
+			try:
+				sock, _ = self.socket.accept()
+			except OSError:
+				break  # Listening socket closed by stop
+			transport = paramiko.Transport(sock)
+			transport.add_server_key(self.host_key)
+			transport.start_server(server=_ServerInterface(self))
+			self.transport_list.append(transport)
+
+	def exec_command(self, channel, command):
+		"""
+		Run one exec request: 'sh -s' reads the case script from stdin, other commands run line by line
+		:param channel: paramiko Channel
+		:param command: command string
+		:return: None
+		"""
+		try:
+			if command.strip() == 'sh -s':
+				chunk_list = []
+				chunk = channel.recv(65536)
+				while chunk:
+					chunk_list.append(chunk)
+					chunk = channel.recv(65536)
+				output_list, exit_code = self.dut.run_script(b''.join(chunk_list).decode('utf-8'))
+			else:
+				output_list, exit_code = self.dut.run_command_list(command)
+			if output_list:
+				channel.sendall(('\n'.join(output_list) + '\n').encode('utf-8'))
+			channel.send_exit_status(exit_code)
+		finally:
+			# EOF only, the client closes the channel; a close sent before the transport answers the exec request
+			# would fail the request on the client side
+			channel.shutdown_write()
+
+	def stop(self):
+		"""
+		Close listening socket and connections
+		:return: None
+		"""
+		self.running = False
+		self.socket.close()
+		for transport in self.transport_list:
+			transport.close()
+		self.transport_list = []
+
+
+def main(argv=None):
+	"""
+	Run fake DUT host until Ctrl+C, e.g. python -m src.my_ssh.ssh_fake_dut --port 2222, then set
+	SSH_Server = 127.0.0.1:2222 in config.ini
+	:param argv: command line arguments, None for sys.argv
+	:return: None
+	"""
+	parser = argparse.ArgumentParser(description='Local SSH server emulating the DUT host')
+	parser.add_argument('--host', default='127.0.0.1')
+	parser.add_argument('--port', type=int, default=2222)
+	parser.add_argument('--username', default='root')
+	parser.add_argument('--password', default='wireless')
+	parser.add_argument('--hci', nargs='+', default=['hci0=00:11:22:33:44:55', 'hci1=00:11:22:33:44:66'],
+	                    help='hci interface and BD addr, e.g. hci0=00:11:22:33:44:55')
+	parser.add_argument('--latency', type=float, default=0.0, help='time (s) of every hciconfig/hcitool call')
+	parser.add_argument('--sleep-scale', type=float, default=1.0, help='1.0: real time sleep; 0: no sleep')
+	args = parser.parse_args(argv)
+
+	hci_dict = OrderedDict(i.split('=', 1) for i in args.hci)
+	server = FakeDUTServer(args.host, args.port, args.username, args.password,
+	                       FakeDUT(hci_dict, args.latency, args.sleep_scale)).start()
+	try:
+		while True:
+			time.sleep(1)
+	except KeyboardInterrupt:
+		server.stop()
+	return None
+
+
+if __name__ == '__main__':
+	main(sys.argv[1:])
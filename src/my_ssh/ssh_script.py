@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+import re
+from collections import namedtuple
+
+# One step of a remote case script: name, shell cmd (may be multi-line), settle time (s) after the step,
+# ready condition (shell cmd polled by wait_until until it succeeds, "$out" holds the step output) and its timeout (s),
+# 0 to test the condition once, e.g. on "$out" which does not change while polled
+Step = namedtuple('Step', ['name', 'cmd', 'settle', 'ready', 'timeout'], defaults=(0, None, 10))
+# Result of one step: name, shell cmd, exit code (None if the step never ran), output lines
+StepResult = namedtuple('StepResult', ['name', 'cmd', 'exit_code', 'output'])
+
+STEP_BEGIN = '@@CC_STEP_BEGIN'
+STEP_END = '@@CC_STEP_END'
+
+regex_step_begin = re.compile(r'^' + STEP_BEGIN + r' (?P<index>[0-9]+)$')
+regex_step_end = re.compile(r'^' + STEP_END + r' (?P<index>[0-9]+) (?P<exit_code>[0-9]+)$')
+
+# Exit code of a step whose ready condition did not hold before timeout, same as coreutils timeout
+READY_TIMEOUT = 124
+
+# Shell function polling a condition every 0.1s: wait_until <timeout (s)> <condition cmd>
+WAIT_UNTIL = (
+	'wait_until() {\n'
+	'  wait_end=$(( $(date +%s) + $1 ))\n'
+	'  while ! eval "$2" >/dev/null 2>&1; do\n'
+	'    [ "$(date +%s)" -ge "$wait_end" ] && return ' + str(READY_TIMEOUT) + '\n'
+	'    sleep 0.1\n'
+	'  done\n'
+	'}')
+
+
+def quote(cmd):
+	"""
+	Quote a string as one single-quoted shell word
+	:param cmd: string
+	:return: quoted string
+	"""
+	return "'" + str(cmd).replace("'", "'\\''") + "'"
+
+
+def build_script(step_list):
+	"""
+	Compose steps into one shell script, each step output and exit code is framed by markers.
+	A step with ready condition returns as soon as the condition holds instead of sleeping.
+	Any failing line of a step fails the step (set -e), and the script exits with the exit code of the first failed
+	step, so later steps do not drive the DUT further.
+	:param step_list: Step list
+	:return: shell script string
+	"""
+	line_list = [WAIT_UNTIL]
+	for i, step in enumerate(step_list):
+		line_list.append('echo "{0} {1}"'.format(STEP_BEGIN, i))
+		line_list.append('out=$({')
+		line_list.append('set -e')  # Only in the step subshell
+		line_list.append(step.cmd)
+		line_list.append('} 2>&1)')
+		line_list.append('rc=$?')
+		line_list.append('[ -n "$out" ] && echo "$out"')
+		if step.ready:
+			line_list.append('[ $rc -eq 0 ] && {{ wait_until {0} {1} || rc=$?; }}'.format(step.timeout,
+			                                                                          quote(step.ready)))
+		line_list.append('echo "{0} {1} $rc"'.format(STEP_END, i))
+		line_list.append('[ $rc -eq 0 ] || exit $rc')
+		if step.settle:
+			line_list.append('sleep {0}'.format(step.settle))
+	return '\n'.join(line_list) + '\n'
+
+
+def parse_script_output(step_list, output_lines):
+	"""
+	Split script output into per-step results
+	:param step_list: Step list the script was built from
+	:param output_lines: script stdout lines
+	:return: StepResult list, same order as step list
+	"""
+	output_dict = {}
+	exit_code_dict = {}
+	index = None
+	for line in output_lines:
+		line = line.rstrip('\r\n')
+		match_begin = regex_step_begin.match(line)
+		match_end = regex_step_end.match(line)
+		if match_begin:
+			index = int(match_begin.group('index'))
+			output_dict[index] = []
+		elif match_end:
+			exit_code_dict[int(match_end.group('index'))] = int(match_end.group('exit_code'))
+			index = None
+		elif index is not None and line:
+			output_dict[index].append(line)
+	return [StepResult(step.name, step.cmd, exit_code_dict.get(i), output_dict.get(i, []))
+	        for i, step in enumerate(step_list)]
@@ -5,7 +5,7 @@
 import src.my_ssh.ssh_basic as ssh_basic
 import src.my_bt_case.bt_case as bt_case
 import src.my_config.config_basic as config_basic
-import time
+from src.my_ssh.ssh_script import Step
 
 
 # ssh_basic.open_connection_ssh().send_command('whoami')
@@ -57,6 +57,17 @@ def bt_ble_init():
 	return bt_case.BLE(chip_version, dut, ref)
 
 
+def bt_ready_init():
+	"""
+	Init ready conditions of test case steps
+	:return: Ready condition class
+	"""
+	chip_version = config_basic.config_chip_version()
+	dut = config_basic.config_dut()
+	ref = config_basic.config_ref()
+	return bt_case.Ready(chip_version, dut, ref)
+
+
 def cc_bt_reset(hci):
 	"""
 	Send BT reset cmd
@@ -95,25 +106,88 @@ def cc_bt_set_power_level(power_level):
 	return None
 
 
+def run_steps(step_list):
+	"""
+	Send case steps to DUT host as one remote script, a DUT not in the case state must not be measured.
+	The script stops at the first failed step, a step fails on any failing line; steps after it do not run.
+	:param step_list: ssh_script.Step list
+	:return: ssh_script.StepResult list, IOError on the first step with non-zero exit code or not run
+	"""
+	result_list = ssh_basic.open_connection_ssh().send_script(step_list)
+	for result in result_list:
+		if result.exit_code != 0:
+			# None: the script stopped before the step, e.g. connection lost; a failed step is always reported first
+			raise IOError('DUT step [{0}] failed, exit code {1}: {2}'.format(result.name, result.exit_code,
+			                                                                 ' | '.join(result.output[-3:])))
+	return result_list
+
+
+def bt_init_status_steps(hci_dut, hci_ref, power_level):
+	"""
+	BT init status steps: reset DUT and Ref, deep sleep, no scan, set power level.
+	Every step returns as soon as the controller reports the new state.
+	:param hci_dut: DUT hci interface
+	:param hci_ref: Ref hci interface
+	:param power_level: Power level
+	:return: Step list
+	"""
+	ready = bt_ready_init()
+	return [Step('reset_dut', bt_bt_init().bt_reset(hci_dut), ready=ready.hci_up(hci_dut)),
+	        Step('reset_ref', bt_bt_init().bt_reset(hci_ref), ready=ready.hci_up(hci_ref)),
+	        Step('deepsleep', bt_bt_init().bt_deepsleep(), ready=ready.cmd_complete(), timeout=0),
+	        Step('noscan', bt_bt_init().bt_noscan(), ready=ready.scan(0, 0)),
+	        Step('set_power_level', bt_power_init().bt_set_power_level(power_level), ready=ready.cmd_complete(),
+	             timeout=0)]
+
+
+def bt_acl_sniff_steps(hci_dut, dut_addr, hci_ref, ref_addr, power_level, interval, settle_key='ACL_Sniff'):
+	"""
+	BT ACL sniff master role steps: ACL connection, then sniff request once the link is up
+	:param hci_dut: DUT hci interface
+	:param dut_addr: DUT BD addr
+	:param hci_ref: Ref hci interface
+	:param ref_addr: Ref BD addr
+	:param power_level: power level
+	:param interval: sniff interval '1.28s' or '0.5s'
+	:param settle_key: [Case_Settle] key of the settle time after sniff request, sniff mode is not visible in hcitool con
+	:return: Step list
+	"""
+	if interval == '0.5s':
+		cmd = bt_bt_init().bt_acl_sniff_0dot5s_master(dut_addr, ref_addr)
+	else:
+		cmd = bt_bt_init().bt_acl_sniff_1dot28s_master(dut_addr, ref_addr)
+	ready = bt_ready_init()
+	return (bt_init_status_steps(hci_dut, hci_ref, power_level) +
+	        [Step('acl_create_connection', bt_bt_init().bt_acl_create_connection(ref_addr),
+	              ready=ready.link('ACL', ref_addr)),
+	         Step('acl_sniff_{0}_master'.format(interval), cmd, config_basic.config_case_settle(settle_key),
+	              ready=ready.link('ACL', ref_addr))])
+
+
 def cc_bt_init_status(hci_dut, hci_ref, power_level):
 	"""
 	Send BT init status cmd
 	:param hci_dut: DUT hci interface
 	:param hci_ref: Ref hci interface
 	:param power_level: Power level
-	:return: None
+	:return: StepResult list
 	"""
-	cc_bt_reset(hci_dut)
-	time.sleep(1)
-	cc_bt_reset(hci_ref)
-	time.sleep(1)
-	cc_bt_deepsleep()
-	time.sleep(1)
-	cc_bt_noscan()
-	time.sleep(1)
-	cc_bt_set_power_level(power_level)
-	time.sleep(1)
-	return None
+	return run_steps(bt_init_status_steps(hci_dut, hci_ref, power_level))
+
+
+def cc_bt_link_power_level(ref_addr, power_level, link_type=None):
+	"""
+	Send BT set power level cmd only, DUT keeps its current link or adv state
+	:param ref_addr: Ref BD addr
+	:param power_level: power level
+	:param link_type: ACL, SCO or LE link expected to be still up afterwards, None: no link (e.g. adv)
+	:return: StepResult list
+	"""
+	ready = bt_ready_init()
+	cmd = bt_power_init().bt_set_power_level(power_level)
+	if link_type:
+		return run_steps([Step('set_power_level', cmd, ready=ready.link(link_type, ref_addr))])
+	return run_steps([Step('set_power_level', cmd, ready=ready.cmd_complete(), timeout=0)])
 
 
 def cc_bt_idle(hci_dut, hci_ref, power_level):
@@ -122,13 +196,10 @@ def cc_bt_idle(hci_dut, hci_ref, power_level):
 	:param hci_dut: DUT hci interface
 	:param hci_ref: Ref hci interface
 	:param power_level: power level
-	:return: None
+	:return: StepResult list
 	"""
-	cc_bt_init_status(hci_dut, hci_ref, power_level)
-	time.sleep(1)
-	ssh_basic.open_connection_ssh().send_command(bt_bt_init().bt_idle())
-	time.sleep(2)
-	return None
+	return run_steps(bt_init_status_steps(hci_dut, hci_ref, power_level) +
+	                 [Step('bt_idle', bt_bt_init().bt_idle(), ready=bt_ready_init().cmd_complete(), timeout=0)])
 
 
 def cc_bt_pscan(hci_dut, hci_ref, power_level):
@@ -137,13 +208,10 @@ def cc_bt_pscan(hci_dut, hci_ref, power_level):
 	:param hci_dut: DUT hci interface
 	:param hci_ref: Ref hci interface
 	:param power_level: power level
-	:return: None
+	:return: StepResult list
 	"""
-	cc_bt_init_status(hci_dut, hci_ref, power_level)
-	time.sleep(1)
-	ssh_basic.open_connection_ssh().send_command(bt_bt_init().bt_pscan())
-	time.sleep(2)
-	return None
+	return run_steps(bt_init_status_steps(hci_dut, hci_ref, power_level) +
+	                 [Step('bt_pscan', bt_bt_init().bt_pscan(), ready=bt_ready_init().scan(1, 0))])
 
 
 def cc_bt_iscan(hci_dut, hci_ref, power_level):
@@ -152,13 +220,10 @@ def cc_bt_iscan(hci_dut, hci_ref, power_level):
 	:param hci_dut: DUT hci interface
 	:param hci_ref: Ref hci interface
 	:param power_level: power level
-	:return: None
+	:return: StepResult list
 	"""
-	cc_bt_init_status(hci_dut, hci_ref, power_level)
-	time.sleep(1)
-	ssh_basic.open_connection_ssh().send_command(bt_bt_init().bt_iscan())
-	time.sleep(2)
-	return None
+	return run_steps(bt_init_status_steps(hci_dut, hci_ref, power_level) +
+	                 [Step('bt_iscan', bt_bt_init().bt_iscan(), ready=bt_ready_init().scan(0, 1))])
 
 
 def cc_bt_piscan(hci_dut, hci_ref, power_level):
@@ -167,13 +232,10 @@ def cc_bt_piscan(hci_dut, hci_ref, power_level):
 	:param hci_dut: DUT hci interface
 	:param hci_ref: Ref hci interface
 	:param power_level: power level
-	:return: None
+	:return: StepResult list
 	"""
-	cc_bt_init_status(hci_dut, hci_ref, power_level)
-	time.sleep(1)
-	ssh_basic.open_connection_ssh().send_command(bt_bt_init().bt_piscan())
-	time.sleep(2)
-	return None
+	return run_steps(bt_init_status_steps(hci_dut, hci_ref, power_level) +
+	                 [Step('bt_piscan', bt_bt_init().bt_piscan(), ready=bt_ready_init().scan(1, 1))])
 
 
 def cc_bt_acl_sniff_1dot28s_master(hci_dut, dut_addr, hci_ref, ref_addr, power_level):
@@ -184,13 +246,9 @@ def cc_bt_acl_sniff_1dot28s_master(hci_dut, dut_addr, hci_ref, ref_addr, power_l
 	:param hci_ref: Ref hci interface
 	:param ref_addr: Ref BD addr
 	:param power_level: power level
-	:return: None
+	:return: StepResult list
 	"""
-	cc_bt_init_status(hci_dut, hci_ref, power_level)
-	time.sleep(1)
-	ssh_basic.open_connection_ssh().send_command(bt_bt_init().bt_acl_sniff_1dot28s_master(dut_addr, ref_addr))
-	time.sleep(2)
-	return None
+	return run_steps(bt_acl_sniff_steps(hci_dut, dut_addr, hci_ref, ref_addr, power_level, '1.28s'))
 
 
 def cc_bt_acl_sniff_0dot5s_master(hci_dut, dut_addr, hci_ref, ref_addr, power_level):
@@ -201,13 +259,9 @@ def cc_bt_acl_sniff_0dot5s_master(hci_dut, dut_addr, hci_ref, ref_addr, power_le
 	:param hci_ref: Ref hci interface
 	:param ref_addr: Ref BD addr
 	:param power_level: power level
-	:return: None
+	:return: StepResult list
 	"""
-	cc_bt_init_status(hci_dut, hci_ref, power_level)
-	time.sleep(1)
-	ssh_basic.open_connection_ssh().send_command(bt_bt_init().bt_acl_sniff_0dot5s_master(dut_addr, ref_addr))
-	time.sleep(2)
-	return None
+	return run_steps(bt_acl_sniff_steps(hci_dut, dut_addr, hci_ref, ref_addr, power_level, '0.5s'))
 
 
 def cc_bt_sco_hv3(hci_dut, dut_addr, hci_ref, ref_addr, power_level):
@@ -218,13 +272,11 @@ def cc_bt_sco_hv3(hci_dut, dut_addr, hci_ref, ref_addr, power_level):
 	:param hci_ref: Ref hci interface
 	:param ref_addr: Ref BD addr
 	:param power_level: power level
-	:return: None
+	:return: StepResult list
 	"""
-	cc_bt_acl_sniff_1dot28s_master(hci_dut, dut_addr, hci_ref, ref_addr, power_level)
-	time.sleep(1)
-	ssh_basic.open_connection_ssh().send_command(bt_bt_init().bt_sco_hv3(ref_addr))
-	time.sleep(5)
-	return None
+	return run_steps(bt_acl_sniff_steps(hci_dut, dut_addr, hci_ref, ref_addr, power_level, '1.28s', 'SCO_Sniff') +
+	                 [Step('bt_sco_hv3', bt_bt_init().bt_sco_hv3(ref_addr), config_basic.config_case_settle('SCO'),
+	                       ready=bt_ready_init().link('SCO', ref_addr))])
 
 
 def cc_bt_sco_ev3(hci_dut, dut_addr, hci_ref, ref_addr, power_level):
@@ -235,13 +287,11 @@ def cc_bt_sco_ev3(hci_dut, dut_addr, hci_ref, ref_addr, power_level):
 	:param hci_ref: Ref hci interface
 	:param ref_addr: Ref BD addr
 	:param power_level: power level
-	:return: None
+	:return: StepResult list
 	"""
-	cc_bt_acl_sniff_1dot28s_master(hci_dut, dut_addr, hci_ref, ref_addr, power_level)
-	time.sleep(1)
-	ssh_basic.open_connection_ssh().send_command(bt_bt_init().bt_sco_ev3(ref_addr))
-	time.sleep(5)
-	return None
+	return run_steps(bt_acl_sniff_steps(hci_dut, dut_addr, hci_ref, ref_addr, power_level, '1.28s', 'SCO_Sniff') +
+	                 [Step('bt_sco_ev3', bt_bt_init().bt_sco_ev3(ref_addr), config_basic.config_case_settle('SCO'),
+	                       ready=bt_ready_init().link('SCO', ref_addr))])
 
 
 def cc_ble_adv_1dot28s_3channel(hci_dut='hci0', hci_ref='hci1', power_level='0', enable_ble_adv=1):
@@ -251,13 +301,11 @@ def cc_ble_adv_1dot28s_3channel(hci_dut='hci0', hci_ref='hci1', power_level='0',
 	:param hci_ref: Ref hci interface
 	:param power_level: power level
 	:param enable_ble_adv: enable BLE adv flag
-	:return: None
+	:return: StepResult list
 	"""
-	cc_bt_init_status(hci_dut, hci_ref, power_level)
-	time.sleep(1)
-	ssh_basic.open_connection_ssh().send_command(bt_ble_init().ble_adv_1dot28s_3channel(enable_ble_adv))
-	time.sleep(2)
-	return None
+	return run_steps(bt_init_status_steps(hci_dut, hci_ref, power_level) +
+	                 [Step('ble_adv_1.28s_3channel', bt_ble_init().ble_adv_1dot28s_3channel(enable_ble_adv),
+	                       ready=bt_ready_init().cmd_complete(), timeout=0)])
 
 
 def cc_ble_scan_1dot28s(hci_dut='hci0', hci_ref='hci1', power_level=0, enable_ble_scan=1):
@@ -267,13 +315,11 @@ def cc_ble_scan_1dot28s(hci_dut='hci0', hci_ref='hci1', power_level=0, enable_bl
 	:param hci_ref: Ref hci interface
 	:param power_level: power level
 	:param enable_ble_scan: enable BLE scan flag
-	:return: None
+	:return: StepResult list
 	"""
-	cc_bt_init_status(hci_dut, hci_ref, power_level)
-	time.sleep(1)
-	ssh_basic.open_connection_ssh().send_command(bt_ble_init().ble_scan_1dot28s(enable_ble_scan))
-	time.sleep(2)
-	return None
+	return run_steps(bt_init_status_steps(hci_dut, hci_ref, power_level) +
+	                 [Step('ble_scan_1.28s', bt_ble_init().ble_scan_1dot28s(enable_ble_scan),
+	                       ready=bt_ready_init().cmd_complete(), timeout=0)])
 
 
 def cc_ble_scan_1s(hci_dut='hci0', hci_ref='hci1', power_level=0, enable_ble_scan=1):
@@ -283,13 +329,11 @@ def cc_ble_scan_1s(hci_dut='hci0', hci_ref='hci1', power_level=0, enable_ble_sca
 	:param hci_ref: Ref hci interface
 	:param power_level: power level
 	:param enable_ble_scan: enable BLE scan flag
-	:return: None
+	:return: StepResult list
 	"""
-	cc_bt_init_status(hci_dut, hci_ref, power_level)
-	time.sleep(1)
-	ssh_basic.open_connection_ssh().send_command(bt_ble_init().ble_scan_1s(enable_ble_scan))
-	time.sleep(2)
-	return None
+	return run_steps(bt_init_status_steps(hci_dut, hci_ref, power_level) +
+	                 [Step('ble_scan_1s', bt_ble_init().ble_scan_1s(enable_ble_scan),
+	                       ready=bt_ready_init().cmd_complete(), timeout=0)])
 
 
 def cc_ble_scan_10ms(hci_dut='hci0', hci_ref='hci1', power_level=0, enable_ble_scan=1):
@@ -299,13 +343,11 @@ def cc_ble_scan_10ms(hci_dut='hci0', hci_ref='hci1', power_level=0, enable_ble_s
 	:param hci_ref: Ref hci interface
 	:param power_level: power level
 	:param enable_ble_scan: enable BLE scan flag
-	:return: None
+	:return: StepResult list
 	"""
-	cc_bt_init_status(hci_dut, hci_ref, power_level)
-	time.sleep(1)
-	ssh_basic.open_connection_ssh().send_command(bt_ble_init().ble_scan_10ms(enable_ble_scan))
-	time.sleep(2)
-	return None
+	return run_steps(bt_init_status_steps(hci_dut, hci_ref, power_level) +
+	                 [Step('ble_scan_10ms', bt_ble_init().ble_scan_10ms(enable_ble_scan),
+	                       ready=bt_ready_init().cmd_complete(), timeout=0)])
 
 
 def cc_ble_connection_1dot28s(hci_dut='hci0', hci_ref='hci1', ref_addr='11.22.33.44.55.66', power_level='0'):
@@ -315,10 +357,11 @@ def cc_ble_connection_1dot28s(hci_dut='hci0', hci_ref='hci1', ref_addr='11.22.33
 	:param hci_ref: Ref hci interface
 	:param ref_addr: Ref BD addr
 	:param power_level: power level
-	:return: None
-	"""
-	cc_bt_init_status(hci_dut, hci_ref, power_level)
-	time.sleep(1)
-	ssh_basic.open_connection_ssh().send_command(bt_ble_init().ble_connection_1dot28s(ref_addr))
-	time.sleep(10)
-	return None
+	:return: StepResult list
+	"""
+	ready = bt_ready_init()
+	return run_steps(bt_init_status_steps(hci_dut, hci_ref, power_level) +
+	                 [Step('ble_create_connection', bt_ble_init().ble_create_connection(ref_addr),
+	                       ready=ready.link('LE', ref_addr)),
+	                  Step('ble_connection_1.28s', bt_ble_init().ble_connection_1dot28s(),
+	                       config_basic.config_case_settle('LE_Connection'), ready=ready.link('LE', ref_addr))])
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Alex Wang
+
+import time
+import src.my_ssh.ssh_script as ssh_script
+from src.my_misc.my_timer import Span
+from src.my_misc.my_logging import create_logger
+
+log_sim = create_logger()
+
+# Round trip of one exec channel on the bench DUT host (s), before time scale
+round_trip = 0.05
+
+
+class SimSSH(object):
+	def __init__(self, address, username, password, hci_dict=None, time_scale=0.0):
+		"""
+		In-process simulated DUT host, same interface as ssh_basic.SSH. Every cmd succeeds, ready conditions hold
+		at once, settle times and channel round trips are slept scaled by time scale.
+		:param address: IP address, logged only
+		:param username: Username, not used
+		:param password: Password, not used
+		:param hci_dict: hci interface -> BD addr reported by hciconfig, default hci0 and hci1
+		:param time_scale: 1.0: real time; 0: no latency
+		"""
+		self.address = address
+		self.username = username
+		self.hci_dict = hci_dict or {'hci0': '00:11:22:33:44:55', 'hci1': '00:11:22:33:44:66'}
+		self.time_scale = float(time_scale)
+		self.active = False
+		self.command_list = []  # Every cmd and step cmd received, in order
+		self.connect()
+
+	@Span('ssh_connect')
+	def connect(self):
+		"""
+		Open simulated connection
+		:return: None
+		"""
+		log_sim.info('Simulated DUT host on {0}'.format(self.address))
+		self._sleep(round_trip)
+		self.active = True
+
+	def is_active(self):
+		"""
+		Check simulated connection is open
+		:return: True if open
+		"""
+		return self.active
+
+	def close(self):
+		"""
+		Close simulated connection
+		:return: None
+		"""
+		self.active = False
+
+	def _sleep(self, t):
+		"""
+		Sleep scaled by time scale
+		:param t: time in second at real time
+		:return: None
+		"""
+		if self.time_scale > 0 and t > 0:
+			time.sleep(t * self.time_scale)
+
+	def hciconfig(self):
+		"""
+		Simulated hciconfig output
+		:return: output line list
+		"""
+		line_list = []
+		for hci, address in self.hci_dict.items():
+			line_list.append('{0}:\tType: Primary  Bus: USB'.format(hci))
+			line_list.append('\tBD Address: {0}  ACL MTU: 1021:8  SCO MTU: 120:6'.format(address))
+			line_list.append('\tUP RUNNING')
+		return line_list
+
+	@Span('ssh_command')
+	def send_command(self, command):
+		"""
+		Send simulated cmd
+		:param command: cmd string
+		:return: [0] date return [1] error return
+		"""
+		self.command_list.append(command)
+		self._sleep(round_trip)
+		if str(command).strip() == 'hciconfig':
+			return self.hciconfig(), []
+		return [], []
+
+	@Span('ssh_script')
+	def send_script(self, step_list):
+		"""
+		Run steps on simulated DUT host, output is parsed the same way as a real remote script
+		:param step_list: ssh_script.Step list
+		:return: ssh_script.StepResult list
+		"""
+		self._sleep(round_trip)
+		output_lines = []
+		for i, step in enumerate(step_list):
+			self.command_list.append(step.cmd)
+			output_lines.append('{0} {1}'.format(ssh_script.STEP_BEGIN, i))
+			output_lines.append('{0} {1} 0'.format(ssh_script.STEP_END, i))
+			self._sleep(step.settle)
+		return ssh_script.parse_script_output(step_list, output_lines)